@@ -0,0 +1,194 @@
+"""Run the Bulk API 2.0 extract path against a local stand-in.
+
+The offline Salesforce backends do not simulate Bulk API 2.0, so this starts a
+small HTTP server on localhost that implements the three query job endpoints --
+create, status and paged CSV results -- and points ``extract_frame`` at it with
+``instance_url``. The job reports ``InProgress`` for ``--polls`` status checks
+before completing, results are served ``BULK_RESULT_PAGE_SIZE`` records at a time
+behind ``Sforce-Locator`` headers, and the CSV mixes nulls, literal "NA" text, quoted
+commas and newlines, and leading-zero IDs so the typed ingestion is checked
+against the source rows. A job that fails must raise ``BulkQueryError``.
+
+Usage:
+    python benchmarks/bench_bulk_extract.py --rows 250000 --polls 2
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+from simple_salesforce import Salesforce
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['SF_BULK_MODE'] = 'always'
+
+from bulk_extract import BULK_RESULT_PAGE_SIZE, BulkQueryError, bulk_extract_frame, extract_frame  # noqa: E402
+
+FIELDS = ['Id', 'Name', 'PolicyType', 'ExpirationDate', 'NameInsured.Name', 'Total_Policy_Premium__c']
+NUMERIC_FIELDS = ['Total_Policy_Premium__c']
+
+
+def make_policies(rows, seed=7):
+    """Generate InsurancePolicy-shaped rows with the values that trip up CSV parsing."""
+    rng = np.random.default_rng(seed)
+    names = np.array(['Acme, Inc.', 'Smith "Family" Trust', 'Line one\nline two', 'NA', 'null', 'Plain Account'])
+    frame = pd.DataFrame({
+        'Id': [f"0YT{i:015d}" for i in range(rows)],
+        'Name': [f"POL-{i:07d}" for i in range(rows)],
+        'PolicyType': rng.choice(['Auto', 'Homeowners', 'Flood', 'Umbrella'], rows).astype(object),
+        'ExpirationDate': (pd.Timestamp('2026-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), 'D'))
+        .strftime('%Y-%m-%d').astype(object),
+        'NameInsured.Name': rng.choice(names, rows).astype(object),
+        'Total_Policy_Premium__c': rng.gamma(2.0, 900.0, rows).round(2),
+    })
+    # Salesforce writes nulls as empty fields
+    frame.loc[rng.random(rows) < 0.05, 'NameInsured.Name'] = None
+    frame.loc[rng.random(rows) < 0.05, 'Total_Policy_Premium__c'] = np.nan
+    return frame
+
+
+class BulkStandIn(ThreadingHTTPServer):
+    """Serves Bulk API 2.0 query jobs over one in-memory frame."""
+
+    daemon_threads = True
+
+    def __init__(self, frame, polls):
+        super().__init__(('127.0.0.1', 0), BulkHandler)
+        self.frame = frame
+        self.polls = polls
+        self.jobs = {}
+        self.requests = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class BulkHandler(BaseHTTPRequestHandler):
+    JOB_PATH = re.compile(r'^/services/data/v[\d.]+/jobs/query(?:/(?P<job>[^/]+)(?P<results>/results)?)?$')
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        match = self.JOB_PATH.match(urlparse(self.path).path)
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if match is None or match.group('job'):
+            return self._json([{'errorCode': 'NOT_FOUND'}], 404)
+        server = self.server
+        with server.lock:
+            server.requests['create'] += 1
+            job_id = f"750{len(server.jobs):015d}"
+            fields = [field.strip() for field in re.match(r'SELECT (.+?) FROM', request['query']).group(1).split(',')]
+            failed = 'Bogus__c' in fields
+            server.jobs[job_id] = {'fields': fields, 'polls_left': server.polls, 'failed': failed}
+        self._json({'id': job_id, 'state': 'UploadComplete'})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        match = self.JOB_PATH.match(url.path)
+        server = self.server
+        job = server.jobs.get(match.group('job')) if match else None
+        if job is None:
+            return self._json([{'errorCode': 'NOT_FOUND'}], 404)
+
+        if not match.group('results'):
+            with server.lock:
+                server.requests['status'] += 1
+                if job['failed']:
+                    return self._json({'id': match.group('job'), 'state': 'Failed',
+                                       'errorMessage': "No such column 'Bogus__c'"})
+                state = 'InProgress' if job['polls_left'] > 0 else 'JobComplete'
+                job['polls_left'] -= 1
+            return self._json({'id': match.group('job'), 'state': state})
+
+        params = parse_qs(url.query)
+        offset = int(params.get('locator', ['0'])[0])
+        limit = int(params.get('maxRecords', [len(server.frame)])[0])
+        chunk = server.frame.iloc[offset:offset + limit][job['fields']]
+        body = chunk.to_csv(index=False, lineterminator='\n').encode()
+        next_offset = offset + limit
+        with server.lock:
+            server.requests['results'] += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Sforce-Locator', str(next_offset) if next_offset < len(server.frame) else 'null')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def check_types(frame, expected):
+    """Compare the bulk frame with the source rows; returns a list of problems."""
+    problems = []
+    if list(frame.columns) != FIELDS:
+        problems.append(f"columns {list(frame.columns)}")
+    if len(frame) != len(expected):
+        return problems + [f"{len(frame):,} rows, expected {len(expected):,}"]
+    if frame['Total_Policy_Premium__c'].dtype != 'float64':
+        problems.append(f"premium dtype {frame['Total_Policy_Premium__c'].dtype}")
+    if not np.allclose(frame['Total_Policy_Premium__c'], expected['Total_Policy_Premium__c'], equal_nan=True):
+        problems.append('premium values differ')
+    for field in FIELDS:
+        if field in NUMERIC_FIELDS:
+            continue
+        got = frame[field].astype(object).where(frame[field].notna(), None).tolist()
+        want = expected[field].astype(object).where(expected[field].notna(), None).tolist()
+        if got != want:
+            problems.append(f"{field} values differ")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=250000)
+    parser.add_argument('--polls', type=int, default=2, help='InProgress status checks before a job completes')
+    args = parser.parse_args()
+
+    policies = make_policies(args.rows)
+    server = BulkStandIn(policies, args.polls)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sf = Salesforce(instance_url=server.url, session_id='stand-in')
+
+    started = time.perf_counter()
+    frame, mode = extract_frame(sf, 'InsurancePolicy', FIELDS, numeric_fields=NUMERIC_FIELDS,
+                                instance_url=server.url)
+    seconds = time.perf_counter() - started
+    problems = check_types(frame, policies)
+    expected_pages = max(-(-args.rows // BULK_RESULT_PAGE_SIZE), 1)
+
+    try:
+        bulk_extract_frame(sf, 'InsurancePolicy', ['Id', 'Bogus__c'], instance_url=server.url)
+        failure = 'no error raised'
+    except BulkQueryError as e:
+        failure = f"raised BulkQueryError ({e})"
+    server.shutdown()
+
+    print(f"rows={args.rows:,} page_size={BULK_RESULT_PAGE_SIZE:,} polls={args.polls}")
+    print(f"mode: {mode}  extracted {len(frame):,} rows in {seconds:.2f}s")
+    print(f"requests: {dict(server.requests)}  (expected {expected_pages} result pages)")
+    print(f"types: {'ok' if not problems else '; '.join(problems)}")
+    print(f"failed job: {failure}")
+    if problems or server.requests['results'] != expected_pages or 'no error' in failure:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,399 @@
+"""End-to-end timings for every dashboard view and tab.
+
+Drives ``load_balance.py`` (one scenario per "View Breakdown By" mode) and
+``prodsc.main()`` (one scenario per tab) headlessly with Streamlit's AppTest
+against the synthetic Salesforce backend, at one or more org sizes. Each
+scenario reports:
+
+* fetch -- wall time with at least one Salesforce API call in flight,
+* render -- time inside Streamlit element calls (charts, tables, metrics, text),
+* transform -- the rest of the run (record flattening, pandas work, figure building),
+* peak memory -- the tracemalloc peak of a second, untimed run.
+
+Every measured run starts from cold caches (SOQL cache, window cache,
+dimension tables, session, snapshot) with the background window prefetch off.
+Timings are the median of ``--repeat`` runs. Results are compared with the
+stored baseline in ``benchmarks/baselines``; a metric that grows by more than
+``--tolerance`` *and* by more than its absolute noise floor is flagged and the
+script exits with status 1. The committed baseline was recorded at 10,000
+policies; re-record it with ``--save-baseline`` on the machine that runs the gate.
+
+Usage:
+    python benchmarks/bench_dashboards.py --sizes 10000,100000,1000000
+    python benchmarks/bench_dashboards.py --sizes 10000 --repeat 5 --save-baseline
+"""
+import argparse
+import functools
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The synthetic backend must be selected before the session manager is created
+os.environ['SF_BACKEND'] = 'synthetic'
+os.environ.setdefault('SF_DIMENSION_DIR', '')
+os.environ.setdefault('SF_WINDOW_CACHE_DIR', '')
+os.environ['SF_PREFETCH_INTERVAL'] = '0'
+
+import streamlit  # noqa: E402
+from streamlit.delta_generator import DeltaGenerator  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import fake_salesforce  # noqa: E402
+from dimension_cache import DIMENSION_SPECS, get_dimension_table  # noqa: E402
+from fake_salesforce import SyntheticOrg, use_synthetic_org  # noqa: E402
+from sf_session import get_session_manager  # noqa: E402
+from soql_cache import get_soql_cache  # noqa: E402
+from window_cache import get_window_cache  # noqa: E402
+
+LOAD_BALANCE_VIEWS = ["Workload Overview", "Policy Type Analysis", "Account Manager Details", "Expiration Timeline"]
+PRODSC_TABS = {
+    'create_overview_tab': 'Overview',
+    'create_performance_tab': 'Performance',
+    'create_producer_performance_tab': 'Producer Performance',
+    'create_individual_producer_tab': 'Individual Producer',
+}
+RENDER_METHODS = [
+    'plotly_chart', 'dataframe', 'table', 'metric', 'markdown', 'write', 'caption', 'header', 'subheader',
+    'title', 'info', 'success', 'warning', 'error', 'download_button', 'bar_chart', 'line_chart', 'json',
+]
+METRICS = ['total_s', 'fetch_s', 'transform_s', 'render_s', 'peak_mb']
+# Growth below these floors is treated as noise rather than a regression; sub-second
+# scenarios swing by a few hundred milliseconds between runs on a shared machine
+NOISE_FLOORS = {'total_s': 0.25, 'fetch_s': 0.25, 'transform_s': 0.25, 'render_s': 0.25, 'peak_mb': 5.0}
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'bench_dashboards.json')
+
+
+class PhaseClock:
+    """Accumulates fetch and render time for the current run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.fetch = 0.0
+        self.render = 0.0
+        self.api_calls = 0
+        self._in_flight = 0
+        self._fetch_started = None
+        self._render_depth = 0
+
+    def fetch_started(self):
+        with self._lock:
+            self.api_calls += 1
+            if self._in_flight == 0:
+                self._fetch_started = time.perf_counter()
+            self._in_flight += 1
+
+    def fetch_finished(self):
+        with self._lock:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self.fetch += time.perf_counter() - self._fetch_started
+
+    def snapshot(self):
+        with self._lock:
+            return self.fetch, self.render, self.api_calls
+
+
+clock = PhaseClock()
+
+
+def _timed_fetch(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        clock.fetch_started()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            clock.fetch_finished()
+    return wrapper
+
+
+def _timed_render(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        # Elements built from other elements (e.g. write -> markdown) count once
+        if clock._render_depth:
+            return method(*args, **kwargs)
+        clock._render_depth += 1
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            clock._render_depth -= 1
+            clock.render += time.perf_counter() - started
+    return wrapper
+
+
+def install_instrumentation():
+    """Time offline API calls and Streamlit element calls."""
+    for name in ('query', 'query_more'):
+        setattr(fake_salesforce.OfflineSalesforce, name,
+                _timed_fetch(getattr(fake_salesforce.OfflineSalesforce, name)))
+    for name in RENDER_METHODS:
+        bound = getattr(streamlit, name, None)
+        timed = _timed_render(getattr(DeltaGenerator, name))
+        setattr(DeltaGenerator, name, timed)
+        # ``st.<name>`` is bound to the main container at import time
+        if isinstance(bound, types.MethodType):
+            setattr(streamlit, name, types.MethodType(timed, bound.__self__))
+
+
+def reset_caches(snapshot_root):
+    """Start the next run cold: no cached results, windows, dimensions, session or snapshot."""
+    get_soql_cache().clear()
+    get_window_cache().invalidate()
+    for name in DIMENSION_SPECS:
+        get_dimension_table(name).invalidate()
+    get_session_manager().invalidate()
+    if snapshot_root is not None:
+        os.environ['SF_SNAPSHOT_DIR'] = tempfile.mkdtemp(dir=snapshot_root)
+
+
+def time_run(run, snapshot_root):
+    """Time one cold run, split into fetch, transform and render."""
+    reset_caches(snapshot_root)
+    clock.reset()
+    started = time.perf_counter()
+    run()
+    total = time.perf_counter() - started
+    return split_phases(total, *clock.snapshot())
+
+
+def median_timings(runs):
+    """Combine repeated timings of one scenario into their per-metric median."""
+    return {
+        metric: round(statistics.median(run[metric] for run in runs), 3) if metric != 'api_calls'
+        else int(statistics.median(run[metric] for run in runs))
+        for metric in runs[0]
+    }
+
+
+def trace_peak(run, snapshot_root, sections=None):
+    """Return the tracemalloc peak (MB) of one cold run; tracing is slow, so this run is not timed."""
+    reset_caches(snapshot_root)
+    tracemalloc.start()
+    if sections is not None:
+        sections.tracing = True
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        if sections is not None:
+            peak = max(peak, sections.run_peak)
+    finally:
+        tracemalloc.stop()
+        if sections is not None:
+            sections.tracing = False
+    return round(peak / 1e6, 1)
+
+
+def split_phases(total, fetch, render, api_calls):
+    return {
+        'total_s': round(total, 3),
+        'fetch_s': round(fetch, 3),
+        'transform_s': round(max(total - fetch - render, 0.0), 3),
+        'render_s': round(render, 3),
+        'api_calls': api_calls,
+    }
+
+
+def _check(at, scenario):
+    if at.exception:
+        raise RuntimeError(f"{scenario} raised: {at.exception[0].message}")
+
+
+def _widget(widgets, label):
+    return next(widget for widget in widgets if widget.label.startswith(label))
+
+
+def bench_load_balance(args, snapshot_root):
+    results = {}
+    for view in LOAD_BALANCE_VIEWS:
+        at = AppTest.from_file(os.path.join(ROOT, 'load_balance.py'), default_timeout=args.timeout)
+        at.run()
+        _check(at, view)
+        _widget(at.sidebar.selectbox, 'Select Time Period').set_value(args.window)
+        _widget(at.sidebar.radio, '📊 View Breakdown By').set_value(view)
+
+        def run(at=at, view=view):
+            at.run()
+            _check(at, view)
+
+        results[f"load_balance / {view}"] = median_timings(
+            [time_run(run, snapshot_root) for _ in range(args.repeat)]
+        )
+        if args.memory:
+            results[f"load_balance / {view}"]['peak_mb'] = trace_peak(run, snapshot_root)
+    return results
+
+
+def _prodsc_app():
+    import prodsc
+    prodsc.main()
+
+
+class TabSections:
+    """Wraps prodsc's tab builders to attribute time and memory to each tab."""
+
+    def __init__(self, module):
+        self.tracing = False
+        self.run_peak = 0
+        self.totals = {}
+        for function_name, label in PRODSC_TABS.items():
+            setattr(module, function_name, self._wrap(getattr(module, function_name), label))
+
+    def reset(self):
+        self.totals = {}
+        self.run_peak = 0
+
+    def _wrap(self, function, label):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if self.tracing:
+                self.run_peak = max(self.run_peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+            fetch, render, api_calls = clock.snapshot()
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                end_fetch, end_render, end_calls = clock.snapshot()
+                totals = self.totals.setdefault(label, {'total': 0.0, 'fetch': 0.0, 'render': 0.0, 'api_calls': 0})
+                totals['total'] += elapsed
+                totals['fetch'] += end_fetch - fetch
+                totals['render'] += end_render - render
+                totals['api_calls'] += end_calls - api_calls
+                if self.tracing:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    totals['peak'] = max(totals.get('peak', 0), peak)
+                    self.run_peak = max(self.run_peak, peak)
+                    tracemalloc.reset_peak()
+        return wrapper
+
+
+def bench_prodsc(args, snapshot_root):
+    at = AppTest.from_function(_prodsc_app, default_timeout=args.timeout)
+    at.run()
+    _check(at, 'prodsc')
+    import prodsc
+    sections = TabSections(prodsc)
+
+    producers = _widget(at.sidebar.multiselect, 'Select Producers')
+    producers.set_value(list(producers.options[:args.producer_tabs]))
+
+    def run():
+        sections.reset()
+        at.run()
+        _check(at, 'prodsc')
+
+    runs = {}
+    for _ in range(args.repeat):
+        runs.setdefault('prodsc / (page)', []).append(time_run(run, snapshot_root))
+        for label, totals in sections.totals.items():
+            runs.setdefault(f"prodsc / {label}", []).append(
+                split_phases(totals['total'], totals['fetch'], totals['render'], totals['api_calls'])
+            )
+    timings = {scenario: median_timings(scenario_runs) for scenario, scenario_runs in runs.items()}
+    if args.memory:
+        timings['prodsc / (page)']['peak_mb'] = trace_peak(run, snapshot_root, sections)
+        for label, totals in sections.totals.items():
+            timings[f"prodsc / {label}"]['peak_mb'] = round(totals.get('peak', 0) / 1e6, 1)
+    return timings
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def save_baseline(path, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
+
+
+def find_regressions(result, baseline, tolerance):
+    """Return ``"metric +N%"`` notes for metrics that grew past the tolerance."""
+    notes = []
+    for metric in METRICS:
+        value, base = result.get(metric), (baseline or {}).get(metric)
+        if value is None or not base:
+            continue
+        if value > base * (1 + tolerance) and value - base > NOISE_FLOORS[metric]:
+            notes.append(f"{metric} +{(value / base - 1) * 100:.0f}%")
+    return notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='comma-separated policy counts')
+    parser.add_argument('--window', default='Next 90 Days', help='load_balance predefined time period')
+    parser.add_argument('--producer-tabs', type=int, default=2, help='producers selected in prodsc')
+    parser.add_argument('--latency-ms', default='0', help='simulated latency per API call, e.g. 120 or 80-200')
+    parser.add_argument('--snapshot', action='store_true', help='run with the local policy snapshot store')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='skip the peak memory runs')
+    parser.add_argument('--timeout', type=float, default=3600, help='seconds allowed per app run')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per scenario; the median is reported')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed growth before flagging (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    os.environ['SF_FAKE_LATENCY_MS'] = args.latency_ms
+    os.environ['SF_SNAPSHOT_DIR'] = ''
+    snapshot_root = tempfile.mkdtemp(prefix='bench_snapshot_') if args.snapshot else None
+    install_instrumentation()
+
+    baseline = load_baseline(args.baseline)
+    results = {}
+    regressions = 0
+    header = (f"{'scenario':<45} {'policies':>9} {'total s':>8} {'fetch s':>8} {'transf s':>8} "
+              f"{'render s':>8} {'peak MB':>8} {'calls':>6}  vs baseline")
+    print(header)
+    print('-' * len(header))
+    try:
+        for size in [int(size) for size in args.sizes.split(',') if size]:
+            started = time.perf_counter()
+            use_synthetic_org(SyntheticOrg(policies=size))
+            print(f"# generated synthetic org with {size:,} policies in {time.perf_counter() - started:.1f}s")
+            scenarios = {}
+            scenarios.update(bench_load_balance(args, snapshot_root))
+            scenarios.update(bench_prodsc(args, snapshot_root))
+            for scenario, result in scenarios.items():
+                key = f"{scenario}|{size}"
+                results[key] = result
+                notes = find_regressions(result, baseline.get(key), args.tolerance)
+                regressions += bool(notes)
+                flag = ('REGRESSION ' + ', '.join(notes)) if notes else ('ok' if key in baseline else 'no baseline')
+                peak = result.get('peak_mb')
+                print(f"{scenario:<45} {size:>9,} {result['total_s']:>8.2f} {result['fetch_s']:>8.2f} "
+                      f"{result['transform_s']:>8.2f} {result['render_s']:>8.2f} "
+                      f"{peak if peak is not None else '-':>8} {result['api_calls']:>6}  {flag}")
+    finally:
+        if snapshot_root is not None:
+            shutil.rmtree(snapshot_root, ignore_errors=True)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, dict(baseline, **results))
+        print(f"\nBaseline saved to {args.baseline}")
+    if regressions:
+        print(f"\n{regressions} scenario(s) regressed by more than {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
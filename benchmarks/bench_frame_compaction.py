@@ -0,0 +1,97 @@
+"""Memory report for the compact policy snapshot representation.
+
+Builds a synthetic InsurancePolicy snapshot shaped like the frames
+``record_builder.query_frame`` produces, compacts it the way
+``PolicySnapshotStore`` stores it, and prints per-column memory before and
+after, plus the cost of expanding a one-month window for a view.
+
+Usage:
+    python benchmarks/bench_frame_compaction.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_compaction import compact_frame, day_offset, memory_report  # noqa: E402
+from snapshot_store import CATEGORY_FIELDS, DATE_FIELDS, NUMERIC_FIELDS, expand_snapshot  # noqa: E402
+
+POLICY_TYPES = ['Personal Auto', 'Commercial Auto', 'Flood', 'Flood - CL', 'Flood - PL', 'Homeowners', 'Umbrella',
+                'Boat', 'Commercial Package', 'Workers Compensation']
+STATUSES = ['Active', 'Renewing', 'Pending Cancellation', 'Non-Renewal', 'Reinstating', 'Reinstated']
+
+
+def make_snapshot(rows, seed=7):
+    """Generate a snapshot-shaped frame with text dates and float amounts."""
+    rng = np.random.default_rng(seed)
+    accounts = max(rows // 3, 1)
+    managers = [f"Manager {i}" for i in range(40)]
+    producers = [f"Producer {i}" for i in range(120)]
+    carriers = [f"Carrier {i}" for i in range(60)]
+    effective = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 730, rows), unit='D')
+    account_ids = rng.integers(0, accounts, rows)
+
+    def pick(values, null_rate=0.0):
+        picked = np.asarray(values, dtype=object)[rng.integers(0, len(values), rows)]
+        if null_rate:
+            picked[rng.random(rows) < null_rate] = None
+        return [str(value) if value is not None else None for value in picked]
+
+    return pd.DataFrame({
+        'Id': [f"0YT{i:015d}" for i in range(rows)],
+        'Name': [f"POL-{i:08d}" for i in range(rows)],
+        'PolicyName': pick(POLICY_TYPES),
+        'PolicyType': pick(POLICY_TYPES),
+        'Status': pick(STATUSES),
+        'EffectiveDate': effective.strftime('%Y-%m-%d').tolist(),
+        'ExpirationDate': (effective + pd.DateOffset(years=1)).strftime('%Y-%m-%d').tolist(),
+        'Business_Type_Reporting__c': pick(['New Business', 'Renewal']),
+        'NameInsuredId': [f"001{i:015d}" for i in account_ids],
+        'NameInsured.Name': [f"Account {i}" for i in account_ids],
+        'NameInsured.Account_Manager__c': pick([f"005{i:015d}" for i in range(40)], null_rate=0.05),
+        'NameInsured.Account_Manager__r.Name': pick(managers, null_rate=0.05),
+        'ProducerId': pick([f"0PR{i:015d}" for i in range(120)], null_rate=0.2),
+        'Producer.Name': pick(producers, null_rate=0.2),
+        'Producer_2__c': pick([f"0PR{i:015d}" for i in range(120)], null_rate=0.7),
+        'Producer_2__r.Name': pick(producers, null_rate=0.7),
+        'WritingCarrierAccount.Name': pick(carriers, null_rate=0.1),
+        'Total_Policy_Premium__c': np.round(rng.gamma(2.0, 1500.0, rows), 2),
+        'PremiumAmount': np.round(rng.gamma(2.0, 1400.0, rows), 2),
+        'TaxesSurcharges': np.round(rng.gamma(2.0, 100.0, rows), 2),
+        'SystemModstamp': (effective.strftime('%Y-%m-%dT%H:%M:%S.000+0000')).tolist(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    snapshot = make_snapshot(args.rows)
+
+    started = time.perf_counter()
+    compact = compact_frame(snapshot, categorical=CATEGORY_FIELDS, dates=DATE_FIELDS, money=NUMERIC_FIELDS)
+    compact_seconds = time.perf_counter() - started
+
+    report = memory_report(snapshot, compact)
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(report.to_string(index=False))
+
+    started = time.perf_counter()
+    window = compact['ExpirationDate'].between(day_offset('2025-06-01'), day_offset('2025-06-30')).fillna(False)
+    expanded = expand_snapshot(compact[window])
+    window_seconds = time.perf_counter() - started
+
+    total = report.iloc[-1]
+    print(f"\nrows={args.rows:,}  before={total['Before (bytes)'] / 1e6:,.1f} MB  "
+          f"after={total['After (bytes)'] / 1e6:,.1f} MB  saved={total['Saved %']}%")
+    print(f"compact: {compact_seconds:.2f}s  one-month window ({len(expanded):,} rows) filter+expand: {window_seconds:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Benchmark relationship-name flattening for prodsc policy frames.
+
+Compares the original row-wise ``DataFrame.apply(..., axis=1)`` passes over raw
+nested query records with the streaming column builder plus the vectorized
+``flatten_relationship_fields`` pass.
+
+Only ProducerIdentifier is compared for equality: the original
+``safe_get_nested_field`` walked the row Series, which is not a dict, so its
+WritingCarrierName and AccountName passes returned '' for every row.
+
+Usage:
+    python benchmarks/bench_relationship_flatten.py --rows 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from record_builder import flatten_records, flatten_relationship_fields  # noqa: E402
+
+RELATIONSHIP_NAMES = {
+    'ProducerIdentifier': (['Producer.Name', 'Producer_2__r.Name'], 'Unknown Producer'),
+    'WritingCarrierName': (['WritingCarrierAccount.Name'], ''),
+    'AccountName': (['NameInsured.Name'], ''),
+}
+FIELDS = ['Id', 'Producer.Name', 'Producer_2__r.Name', 'WritingCarrierAccount.Name', 'NameInsured.Name']
+
+
+def make_records(rows, seed=7):
+    """Generate InsurancePolicy-shaped records with a mix of null and empty relationships."""
+    rng = random.Random(seed)
+
+    def relationship(prefix, null_rate=0.1, empty_rate=0.05):
+        roll = rng.random()
+        if roll < null_rate:
+            return None
+        if roll < null_rate + empty_rate:
+            return {'attributes': {'type': prefix}, 'Name': ''}
+        return {'attributes': {'type': prefix}, 'Name': f"{prefix} {rng.randint(1, 500)}"}
+
+    return [
+        {
+            'attributes': {'type': 'InsurancePolicy'},
+            'Id': f"0YT{i:015d}",
+            'Producer': relationship('Producer', null_rate=0.3),
+            'Producer_2__r': relationship('Producer', null_rate=0.5),
+            'WritingCarrierAccount': relationship('Carrier'),
+            'NameInsured': relationship('Account'),
+        }
+        for i in range(rows)
+    ]
+
+
+def legacy_flatten(records):
+    """The original prodsc row-wise extraction over a frame of raw nested records."""
+    policy_df = pd.DataFrame(records).drop('attributes', axis=1, errors='ignore')
+
+    def safe_get_nested_field(row, field_path):
+        try:
+            if '.' in field_path:
+                parts = field_path.split('.')
+                current = row
+                for part in parts:
+                    if isinstance(current, dict) and part in current:
+                        current = current[part]
+                    else:
+                        return ''
+                return current if current is not None else ''
+            else:
+                return row.get(field_path, '') if row.get(field_path) is not None else ''
+        except Exception:
+            return ''
+
+    def get_producer_name(row):
+        producer_name = safe_get_nested_field(row, 'Producer.Name')
+        if producer_name:
+            return producer_name
+        producer2_name = safe_get_nested_field(row, 'Producer_2__r.Name')
+        if producer2_name:
+            return producer2_name
+        if isinstance(row.get('Producer'), dict) and row.get('Producer', {}).get('Name'):
+            return row['Producer']['Name']
+        if isinstance(row.get('Producer_2__r'), dict) and row.get('Producer_2__r', {}).get('Name'):
+            return row['Producer_2__r']['Name']
+        return 'Unknown Producer'
+
+    return pd.DataFrame({
+        'ProducerIdentifier': policy_df.apply(get_producer_name, axis=1),
+        'WritingCarrierName': policy_df.apply(lambda row: safe_get_nested_field(row, 'WritingCarrierAccount.Name'), axis=1),
+        'AccountName': policy_df.apply(lambda row: safe_get_nested_field(row, 'NameInsured.Name'), axis=1),
+    })
+
+
+def vectorized_flatten(records):
+    """Stream records into flat columns, then derive all relationship names column-wise."""
+    flat = flatten_records(records, FIELDS)
+    return pd.DataFrame(flatten_relationship_fields(flat, RELATIONSHIP_NAMES))
+
+
+def best_of(func, records, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(records)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    records = make_records(args.rows)
+    legacy_time, legacy = best_of(legacy_flatten, records, args.repeat)
+    vector_time, vectorized = best_of(vectorized_flatten, records, args.repeat)
+
+    pd.testing.assert_series_equal(
+        legacy['ProducerIdentifier'].astype(object).reset_index(drop=True),
+        vectorized['ProducerIdentifier'].astype(object).reset_index(drop=True),
+    )
+
+    flat = flatten_records(records, FIELDS)
+    column_time, _ = best_of(lambda frame: flatten_relationship_fields(frame, RELATIONSHIP_NAMES), flat, args.repeat)
+
+    print(f"rows:                 {args.rows:,}")
+    print(f"row-wise apply:       {legacy_time:8.3f}s")
+    print(f"builder + vectorized: {vector_time:8.3f}s")
+    print(f"  vectorized pass:    {column_time:8.3f}s")
+    print(f"speedup:              {legacy_time / vector_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark workload threshold banding at per-week x per-manager scale.
+
+Compares the original row-wise banding (``get_workload_category`` applied per
+count, then separate ``apply`` passes for color, icon and label) with the single
+vectorized ``band_workloads`` step, on weighted weekly counts for every manager.
+
+Usage:
+    python benchmarks/bench_workload_banding.py --managers 5000 --weeks 52
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workload import band_workloads, get_workload_category, get_workload_thresholds  # noqa: E402
+
+
+def make_weekly_counts(managers, weeks, seed=7):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'AccountManager': np.repeat([f"Manager {i:05d}" for i in range(managers)], weeks),
+        'Week': np.tile(np.arange(1, weeks + 1), managers),
+        # Weighted counts: Flood lines count half, so values are not whole numbers
+        'WeightedCount': rng.gamma(4.0, 60.0, managers * weeks).round() / 2,
+    })
+
+
+def band_rowwise(counts, thresholds):
+    category = counts.apply(lambda x: get_workload_category(x, thresholds))
+    return pd.DataFrame({
+        'WorkloadCategory': category,
+        'CategoryColor': category.apply(lambda x: thresholds[x]['color']),
+        'CategoryIcon': category.apply(lambda x: thresholds[x]['icon']),
+        'CategoryLabel': category.apply(lambda x: thresholds[x]['label']),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--managers', type=int, default=5000)
+    parser.add_argument('--weeks', type=int, default=52)
+    args = parser.parse_args()
+
+    thresholds = get_workload_thresholds()
+    weekly = make_weekly_counts(args.managers, args.weeks)
+    counts = weekly['WeightedCount']
+
+    started = time.perf_counter()
+    rowwise = band_rowwise(counts, thresholds)
+    rowwise_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vectorized = band_workloads(counts, thresholds)
+    vectorized_seconds = time.perf_counter() - started
+
+    same = (rowwise['WorkloadCategory'].to_numpy() == vectorized['WorkloadCategory'].astype(str).to_numpy()).all()
+    for column in ('CategoryColor', 'CategoryIcon', 'CategoryLabel'):
+        same &= (rowwise[column].to_numpy() == vectorized[column].to_numpy()).all()
+
+    # Half-time managers: thresholds scale with capacity
+    capacity = np.where(weekly['AccountManager'].str[-1].isin(['0', '5']), 0.5, 1.0)
+    started = time.perf_counter()
+    band_workloads(counts, thresholds, capacity=capacity)
+    capacity_seconds = time.perf_counter() - started
+
+    print(f"counts={len(counts):,} ({args.managers:,} managers x {args.weeks} weeks)")
+    print(f"row-wise apply:        {rowwise_seconds:.3f}s")
+    print(f"band_workloads:        {vectorized_seconds:.3f}s  ({rowwise_seconds / vectorized_seconds:,.0f}x)")
+    print(f"with capacity scaling: {capacity_seconds:.3f}s")
+    print(f"identical bands: {bool(same)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Batched ``IN (...)`` lookups of Salesforce records by ID.
+
+simple_salesforce sends each SOQL statement as a GET query parameter, so a
+long ``Id IN (...)`` list hits the REST URI limit (roughly 16 KB once
+URL-encoded) well before SOQL's 100,000-character statement limit. The helpers
+here pack as many IDs into each statement as the limit allows and run the
+resulting batches concurrently, capped by ``SF_MAX_CONCURRENT_QUERIES``.
+"""
+import os
+from urllib.parse import quote_plus
+
+import pandas as pd
+
+from concurrent_fetch import run_concurrently
+from record_builder import query_frame
+from soql_cache import cached_query_frame
+
+
+def get_max_query_length():
+    """Return the URL-encoded length budget for one SOQL statement (SF_MAX_QUERY_LENGTH)."""
+    return int(os.getenv("SF_MAX_QUERY_LENGTH", "15000"))
+
+
+def _encoded_length(text):
+    return len(quote_plus(text))
+
+
+def pack_id_batches(ids, template, max_length=None):
+    """Split ``ids`` into batches that keep ``template.format(ids=...)`` under the length budget.
+
+    ``template`` is a SOQL statement with an ``{ids}`` placeholder inside ``IN (...)``.
+    Duplicates and empty IDs are dropped; order is otherwise preserved.
+    """
+    limit = max_length or get_max_query_length()
+    base_length = _encoded_length(template.format(ids=''))
+
+    batches = []
+    batch = []
+    length = base_length
+    for record_id in dict.fromkeys(record_id for record_id in ids if record_id):
+        # Each ID costs its quoted literal plus the ", " separator
+        id_length = _encoded_length(f"'{record_id}', ")
+        if batch and length + id_length > limit:
+            batches.append(batch)
+            batch = []
+            length = base_length
+        batch.append(record_id)
+        length += id_length
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def render_id_query(template, batch):
+    """Fill a template's ``{ids}`` placeholder with a quoted, comma-separated ID list."""
+    return template.format(ids=', '.join(f"'{record_id}'" for record_id in batch))
+
+
+def query_by_ids(sf, template, ids, fields, numeric_fields=(), max_length=None, max_workers=None, cached=False):
+    """Run ``template`` once per packed ID batch and return all rows as one flat DataFrame.
+
+    Batches run concurrently (at most ``max_workers`` at a time; serially when the
+    lookup itself runs inside a ``run_concurrently`` task) and the lookup raises if
+    any batch fails, since a partial result would silently drop rows.
+    With ``cached`` set, each batch goes through the process-wide SOQL result cache.
+    """
+    fetch = cached_query_frame if cached else query_frame
+    batches = pack_id_batches(ids, template, max_length)
+    if not batches:
+        return pd.DataFrame(columns=fields)
+
+    if len(batches) == 1:
+        return fetch(sf, render_id_query(template, batches[0]), fields, numeric_fields)
+
+    tasks = {
+        index: (lambda query=render_id_query(template, batch): fetch(sf, query, fields, numeric_fields))
+        for index, batch in enumerate(batches)
+    }
+    results, errors = run_concurrently(tasks, max_workers=max_workers)
+    if errors:
+        raise next(iter(errors.values()))
+    return pd.concat([results[index] for index in range(len(batches))], ignore_index=True)
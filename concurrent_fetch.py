@@ -0,0 +1,99 @@
+"""Run independent Salesforce fetches concurrently on a thread pool.
+
+The Salesforce client spends nearly all of its time waiting on the network, so
+independent queries can overlap in threads and a page waits roughly as long as
+its slowest query instead of the sum of all of them. Tasks that call
+``run_concurrently`` themselves (e.g. a batched ``query_by_ids`` lookup inside
+a dashboard section) run their subtasks serially in the worker, so the number
+of queries in flight never exceeds the cap.
+"""
+import contextvars
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Set inside pool workers; nested run_concurrently calls then run serially
+_in_worker = contextvars.ContextVar('sf_fetch_in_worker', default=False)
+
+
+def get_max_concurrency():
+    """Return the concurrency cap for parallel Salesforce queries (SF_MAX_CONCURRENT_QUERIES)."""
+    return max(int(os.getenv("SF_MAX_CONCURRENT_QUERIES", "4")), 1)
+
+
+def _script_run_ctx():
+    """Return the calling Streamlit session's script context, or None outside a dashboard.
+
+    Streamlit is only consulted when a dashboard has already loaded it, so headless
+    callers (loaders, the prefetch CLI) never import it.
+    """
+    if 'streamlit' not in sys.modules:
+        return None
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    return get_script_run_ctx(suppress_warning=True)
+
+
+def _worker_initializer(script_ctx):
+    # Lets st.* calls made by fetch helpers render into the calling Streamlit session
+    if script_ctx is not None:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx
+        add_script_run_ctx(threading.current_thread(), script_ctx)
+
+
+def _run_task(task):
+    _in_worker.set(True)
+    return task()
+
+
+def _run_serially(tasks):
+    results = {}
+    errors = {}
+    for name, task in tasks.items():
+        try:
+            results[name] = task()
+        except Exception as e:
+            results[name] = None
+            errors[name] = e
+    return results, errors
+
+
+def run_concurrently(tasks, max_workers=None):
+    """Run a dict of zero-argument callables concurrently.
+
+    Returns ``(results, errors)``: ``results`` maps every task name to its return
+    value (None if it raised) and ``errors`` maps the names of failed tasks to
+    their exception, so one failing query never blocks the others. Called from
+    inside another ``run_concurrently`` task, the tasks run one after another in
+    that worker instead of starting a second pool.
+    """
+    if not tasks:
+        return {}, {}
+    if _in_worker.get():
+        return _run_serially(tasks)
+
+    workers = min(len(tasks), max_workers or get_max_concurrency())
+    script_ctx = _script_run_ctx()
+
+    results = {}
+    errors = {}
+    with ThreadPoolExecutor(
+        max_workers=workers,
+        thread_name_prefix='sf-fetch',
+        initializer=_worker_initializer,
+        initargs=(script_ctx,),
+    ) as executor:
+        # Each task runs in a copy of the caller's context so query metrics keep their view
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, _run_task, task) for name, task in tasks.items()
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = None
+                errors[name] = e
+    return results, errors
@@ -0,0 +1,346 @@
+"""Persistent dimension tables for slowly changing Salesforce lookups.
+
+Producers, renewing carriers and account managers change rarely but were
+re-queried on every rerun. A ``DimensionTable`` keeps one object's ID -> name
+mapping on local disk and refreshes it incrementally on a schedule:
+
+* *Preloaded* tables (producers, carriers) hold every row in scope. The first use
+  runs a full load; later refreshes only fetch rows whose ``SystemModstamp``
+  moved past the stored watermark.
+* *On-demand* tables (account managers, keyed by Account ID) are filled only for
+  the IDs asked for; their refresh re-reads changed rows among the cached IDs.
+
+When the value is read through a relationship (``Account_Manager__r.Name``), a
+refresh also picks up rows whose related record changed, so renaming the
+manager's User reaches the table without the Account being edited.
+
+IDs the table has not seen yet are fetched with packed ``IN (...)`` batches, and
+IDs Salesforce returns no value for are remembered as misses. Refreshes re-check
+the misses of preloaded tables, whose scope (e.g. "has a renewing Opportunity")
+can change without the row's own stamp moving; on-demand misses are re-read like
+any other cached ID once their row changes. So a name or miss is at most one
+refresh interval stale, and a periodic full reload drops rows that left the
+table's scope.
+
+Names are dictionary encoded: ``encode`` turns a column of IDs into int32 codes
+that index the ``values`` array, so fact tables can join on integer codes.
+"""
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from chunked_lookup import query_by_ids
+from record_builder import query_frame
+from snapshot_store import format_soql_datetime
+
+# Local-clock watermarks for on-demand tables step back this far to absorb clock skew
+_WATERMARK_SKEW = timedelta(minutes=5)
+
+
+class DimensionTable:
+    """Persistent, incrementally refreshed ID -> name table over one Salesforce object."""
+
+    def __init__(self, name, object_name, value_field='Name', where_clause='', preload=True,
+                 directory=None, refresh_interval=900, full_reload_interval=24 * 3600):
+        self.name = name
+        self.object_name = object_name
+        self.value_field = value_field
+        self.where_clause = where_clause
+        self.preload = preload
+        self.directory = directory
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self.path = os.path.join(directory, f'dimension_{name}.json') if directory else None
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._ids = []
+        self._values = []
+        self._positions = {}
+        self._index = None
+        self._name_index = None
+        self._meta = {}
+        self.last_refresh_info = {}
+        self.rows_fetched = 0
+
+    # -- storage -----------------------------------------------------------
+
+    def _signature(self):
+        return f"{self.object_name}|{self.value_field}|{self.where_clause}|{int(self.preload)}"
+
+    def _read_disk(self):
+        """Load persisted rows, ignoring missing, corrupt or incompatible files."""
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                payload = json.load(fh)
+            if payload.get('signature') != self._signature():
+                return
+            self._set_rows(payload['ids'], payload['values'])
+            self._meta = payload['meta']
+        except Exception:
+            self._set_rows([], [])
+            self._meta = {}
+
+    def _write_disk(self):
+        """Atomically persist the rows and refresh metadata."""
+        if self.path is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump({
+                'signature': self._signature(),
+                'meta': self._meta,
+                'ids': self._ids,
+                'values': self._values,
+            }, fh)
+        os.replace(tmp_path, self.path)
+
+    def _set_rows(self, ids, values):
+        self._ids = list(ids)
+        self._values = list(values)
+        self._positions = {record_id: position for position, record_id in enumerate(self._ids)}
+        self._index = None
+        self._name_index = None
+
+    def _merge(self, ids, values):
+        """Insert or update rows; new IDs get new codes, existing codes never move."""
+        self._name_index = None
+        for record_id, value in zip(ids, values):
+            position = self._positions.get(record_id)
+            if position is None:
+                self._positions[record_id] = len(self._ids)
+                self._ids.append(record_id)
+                self._values.append(value)
+                self._index = None
+            else:
+                self._values[position] = value
+
+    # -- Salesforce fetches --------------------------------------------------
+
+    def _fields(self):
+        return ['Id', self.value_field, 'SystemModstamp']
+
+    def _query(self, conditions):
+        where = ' AND '.join(condition for condition in conditions if condition)
+        return f"SELECT {', '.join(self._fields())} FROM {self.object_name}" + (f" WHERE {where}" if where else '')
+
+    def _fetched_rows(self, rows):
+        rows = rows[rows['Id'].notna()]
+        values = [value if isinstance(value, str) else None for value in rows[self.value_field]]
+        return rows['Id'].tolist(), values
+
+    def _watermark_from(self, rows, fallback):
+        stamps = rows['SystemModstamp'].dropna()
+        return format_soql_datetime(stamps.max()) if not stamps.empty else fallback
+
+    def _changed_since(self, watermark):
+        """Condition for rows whose own stamp, or their value's related record's stamp, passed ``watermark``."""
+        condition = f"SystemModstamp >= {watermark}"
+        if '.' in self.value_field:
+            relationship = self.value_field.rsplit('.', 1)[0]
+            condition = f"({condition} OR {relationship}.SystemModstamp >= {watermark})"
+        return condition
+
+    def _local_watermark(self):
+        return (datetime.now(timezone.utc) - _WATERMARK_SKEW).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def _full_load(self, sf):
+        now = datetime.now(timezone.utc).isoformat()
+        if self.preload:
+            rows = query_frame(sf, self._query([self.where_clause]), self._fields())
+            self._set_rows(*self._fetched_rows(rows))
+            watermark = self._watermark_from(rows, self._local_watermark())
+            fetched = len(rows)
+        else:
+            # On-demand tables start empty and fill as IDs are asked for
+            self._set_rows([], [])
+            watermark = self._local_watermark()
+            fetched = 0
+        self._meta = {'watermark': watermark, 'last_full_load': now, 'last_refresh': now}
+        self.last_refresh_info = {'mode': 'full', 'rows_fetched': fetched}
+        self.rows_fetched += fetched
+
+    def _delta_load(self, sf):
+        conditions = [self._changed_since(self._meta['watermark'])]
+        refreshed_at = self._local_watermark()
+        if self.preload:
+            conditions.append(self.where_clause)
+            rows = query_frame(sf, self._query(conditions), self._fields())
+            misses = [record_id for record_id, value in zip(self._ids, self._values) if value is None]
+            if misses:
+                # A miss can enter the scope without its own stamp moving
+                found = query_by_ids(sf, self._query([self.where_clause, 'Id IN ({ids})']), misses, self._fields())
+                rows = pd.concat([rows, found], ignore_index=True)
+        else:
+            # Changed rows matter only for IDs already cached, so only those are queried
+            conditions.append('Id IN ({ids})')
+            rows = query_by_ids(sf, self._query(conditions), self._ids, self._fields())
+        self._merge(*self._fetched_rows(rows))
+        self._meta.update({
+            'watermark': self._watermark_from(rows, self._meta['watermark']) if self.preload else refreshed_at,
+            'last_refresh': datetime.now(timezone.utc).isoformat(),
+        })
+        self.last_refresh_info = {'mode': 'delta', 'rows_fetched': len(rows)}
+        self.rows_fetched += len(rows)
+
+    def _fill_missing(self, sf, ids):
+        missing = [record_id for record_id in dict.fromkeys(ids) if record_id and record_id not in self._positions]
+        if not missing:
+            return
+        template = self._query([self.where_clause, 'Id IN ({ids})'])
+        rows = query_by_ids(sf, template, missing, self._fields())
+        found = dict(zip(*self._fetched_rows(rows)))
+        # IDs outside the table's scope are cached as misses so they are not re-queried
+        self._merge(missing, [found.get(record_id) for record_id in missing])
+        self.rows_fetched += len(rows)
+        self._write_disk()
+
+    def _age(self, key):
+        stamp = self._meta.get(key)
+        if not stamp:
+            return None
+        return (datetime.now(timezone.utc) - datetime.fromisoformat(stamp)).total_seconds()
+
+    # -- public API ----------------------------------------------------------
+
+    def refresh(self, sf, force=False):
+        """Run a full or incremental refresh when one is due (or ``force`` is set)."""
+        with self._lock:
+            if not self._loaded:
+                self._read_disk()
+                self._loaded = True
+
+            full_age = self._age('last_full_load')
+            refresh_age = self._age('last_refresh')
+            if force or full_age is None or full_age > self.full_reload_interval:
+                self._full_load(sf)
+            elif refresh_age is None or refresh_age > self.refresh_interval:
+                self._delta_load(sf)
+            else:
+                return
+            self._write_disk()
+
+    def invalidate(self):
+        """Make the next lookup run a full reload."""
+        with self._lock:
+            self._meta = {}
+            self._loaded = True
+
+    def encode(self, sf, ids):
+        """Return int32 codes into ``values`` for a sequence of IDs (-1 where there is no name)."""
+        ids = list(ids)
+        with self._lock:
+            self.refresh(sf)
+            self._fill_missing(sf, ids)
+            if self._index is None:
+                self._index = pd.Index(self._ids)
+            codes = self._index.get_indexer(pd.Index(ids, dtype=object)).astype('int32')
+            values = np.asarray(self._values, dtype=object)
+        if len(values):
+            codes[(codes >= 0) & pd.isna(values[np.maximum(codes, 0)])] = -1
+        return codes
+
+    @property
+    def values(self):
+        """The name dictionary that ``encode`` codes index into."""
+        with self._lock:
+            return np.asarray(self._values, dtype=object)
+
+    def decode(self, codes, default=None):
+        """Map codes from ``encode`` back to names, using ``default`` for -1."""
+        codes = np.asarray(codes)
+        values = self.values
+        if not len(values):
+            return np.full(len(codes), default, dtype=object)
+        return np.where(codes >= 0, values[np.maximum(codes, 0)], default)
+
+    def lookup(self, sf, ids):
+        """Return ``{id: name}`` for the IDs that have a name."""
+        ids = [record_id for record_id in dict.fromkeys(ids) if record_id]
+        names = self.decode(self.encode(sf, ids))
+        return {record_id: name for record_id, name in zip(ids, names) if name is not None}
+
+    def names(self, sf):
+        """Return every distinct name in the table, sorted case-insensitively."""
+        with self._lock:
+            self.refresh(sf)
+            return sorted({value for value in self._values if value is not None}, key=str.casefold)
+
+    def ids_for_names(self, sf, names):
+        """Return the IDs of every row whose name is in ``names`` (case-insensitive, like SOQL)."""
+        with self._lock:
+            self.refresh(sf)
+            if self._name_index is None:
+                self._name_index = {}
+                for record_id, value in zip(self._ids, self._values):
+                    if value is not None:
+                        self._name_index.setdefault(value.casefold(), []).append(record_id)
+            ids = []
+            for name in names or []:
+                ids.extend(self._name_index.get(name.casefold(), []))
+            return list(dict.fromkeys(ids))
+
+    def stats(self):
+        """Return size and refresh counters for display."""
+        with self._lock:
+            return {
+                'rows': len(self._ids),
+                'misses': sum(value is None for value in self._values),
+                'rows_fetched': self.rows_fetched,
+                'last_refresh': self._meta.get('last_refresh'),
+                'last_refresh_mode': self.last_refresh_info.get('mode'),
+            }
+
+
+# Dimension tables shared by both dashboards
+DIMENSION_SPECS = {
+    'producer': {
+        'object_name': 'Producer',
+        'value_field': 'Name',
+        'preload': True,
+    },
+    'carrier': {
+        'object_name': 'Account',
+        'value_field': 'Name',
+        'where_clause': 'Id IN (SELECT Renewing_Carrier__c FROM Opportunity WHERE Renewing_Carrier__c != null)',
+        'preload': True,
+    },
+    'account_manager': {
+        'object_name': 'Account',
+        'value_field': 'Account_Manager__r.Name',
+        'where_clause': 'Account_Manager__c != null',
+        'preload': False,
+    },
+}
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_dimension_directory():
+    """Return where dimension tables persist (SF_DIMENSION_DIR), or None for memory only."""
+    return os.getenv('SF_DIMENSION_DIR', '.sf_snapshot') or None
+
+
+def get_dimension_table(name):
+    """Return the process-wide dimension table ``name`` (a key of DIMENSION_SPECS).
+
+    Refreshes run every SF_DIMENSION_REFRESH_INTERVAL seconds (default 900) and full
+    reloads every SF_DIMENSION_FULL_RELOAD seconds (default one day).
+    """
+    with _tables_lock:
+        if name not in _tables:
+            _tables[name] = DimensionTable(
+                name,
+                directory=get_dimension_directory(),
+                refresh_interval=int(os.getenv('SF_DIMENSION_REFRESH_INTERVAL', '900')),
+                full_reload_interval=int(os.getenv('SF_DIMENSION_FULL_RELOAD', str(24 * 3600))),
+                **DIMENSION_SPECS[name],
+            )
+        return _tables[name]
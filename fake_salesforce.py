@@ -0,0 +1,447 @@
+"""Offline Salesforce backends for local runs, demos and benchmarks.
+
+Three stand-ins for the live org, selected with ``SF_BACKEND`` (see
+``sf_session.get_backend_name``):
+
+* ``synthetic`` -- ``SyntheticSalesforce`` answers SOQL from a generated org
+  (``SyntheticOrg``) of configurable size through ``soql_engine``.
+* ``replay`` -- ``ReplaySalesforce`` serves responses captured earlier.
+* ``record`` -- the live client, with every ``query`` / ``query_more`` response
+  written to a JSON-lines file by a ``QueryRecorder``. Bulk API 2.0 jobs go
+  through ``_call_salesforce`` and are not recorded, so a recording client
+  disables them and runs every extract over REST; the recording then covers
+  everything a replay will ask for.
+
+Offline clients page results 2,000 records at a time like the REST API, report
+each call to the session manager, and can sleep a configurable latency per call
+(``SF_FAKE_LATENCY_MS``, a fixed value like ``120`` or a range like ``80-200``).
+They expose no ``_call_salesforce``, so extracts always take the REST path.
+Statements the offline engine rejects raise ``SalesforceMalformedRequest``, as
+a live org answers them with HTTP 400 MALFORMED_QUERY.
+"""
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from simple_salesforce.exceptions import SalesforceMalformedRequest
+
+from query_metrics import timed_query_page
+from soql_cache import soql_fingerprint
+from soql_engine import SObjectTable, SOQLEngine, SOQLError
+
+PAGE_SIZE = 2000
+
+POLICY_TYPES = ['Personal Auto', 'Commercial Auto', 'Flood', 'Flood - CL', 'Flood - PL', 'Homeowners', 'Umbrella',
+                'Boat', 'Commercial Package', 'Workers Compensation', 'General Liability', 'Dwelling Fire']
+POLICY_STATUSES = ['Active', 'Renewing', 'Pending Cancellation', 'Non-Renewal', 'Reinstating', 'Reinstated',
+                   'Cancelled', 'Expired']
+POLICY_STATUS_WEIGHTS = [0.62, 0.12, 0.03, 0.03, 0.01, 0.02, 0.09, 0.08]
+OPPORTUNITY_STAGES = ['Prospecting', 'Qualification', 'Needs Analysis', 'Proposal/Price Quote',
+                      'Negotiation/Review', 'Closed Won', 'Closed Lost']
+ACCOUNT_SOURCES = ['Referral', 'Partner Referral', 'Client Referral', 'Web', 'Phone Inquiry', 'Other']
+
+
+def parse_latency(value):
+    """Parse a latency spec in milliseconds (``"120"`` or ``"80-200"``) into a (min, max) range in seconds."""
+    value = (value or '0').strip()
+    low, _, high = value.partition('-')
+    low = float(low or 0) / 1000
+    return low, (float(high) / 1000 if high else low)
+
+
+class OfflineSalesforce(ABC):
+    """Minimal client with the query surface of ``simple_salesforce.Salesforce``.
+
+    Subclasses implement ``_first_page`` and ``_next_page``.
+    """
+
+    sf_version = '59.0'
+
+    def __init__(self, instance='offline.salesforce.local', latency=(0.0, 0.0), manager=None):
+        self.sf_instance = instance
+        self.latency = latency
+        self._manager = manager
+
+    def _simulate_call(self, name):
+        if self._manager is not None:
+            self._manager._record_call(name)
+        low, high = self.latency
+        if high > 0:
+            time.sleep(random.uniform(low, high))
+
+    def query(self, query, include_deleted=False, **kwargs):
+        def call():
+            self._simulate_call('queryAll' if include_deleted else 'query')
+            try:
+                return self._first_page(query, include_deleted)
+            except SOQLError as e:
+                raise SalesforceMalformedRequest(
+                    f"https://{self.sf_instance}/services/data/v{self.sf_version}/query/", 400, 'query',
+                    [{'message': str(e), 'errorCode': 'MALFORMED_QUERY'}],
+                ) from e
+        return timed_query_page(call, soql=query)
+
+    def query_more(self, next_records_identifier, identifier_is_url=False, include_deleted=False, **kwargs):
+        def call():
+            self._simulate_call('queryMore')
+            return self._next_page(next_records_identifier)
+        return timed_query_page(call, next_records_url=next_records_identifier)
+
+    def query_all_iter(self, query, include_deleted=False, **kwargs):
+        result = self.query(query, include_deleted=include_deleted, **kwargs)
+        while True:
+            yield from result['records']
+            if result['done']:
+                return
+            result = self.query_more(result['nextRecordsUrl'], identifier_is_url=True, **kwargs)
+
+    def query_all(self, query, include_deleted=False, **kwargs):
+        records = list(self.query_all_iter(query, include_deleted=include_deleted, **kwargs))
+        return {'totalSize': len(records), 'done': True, 'records': records}
+
+    @abstractmethod
+    def _first_page(self, query, include_deleted):
+        """Return the first REST result page of ``query``."""
+
+    @abstractmethod
+    def _next_page(self, next_records_identifier):
+        """Return the result page behind a ``nextRecordsUrl``."""
+
+
+class SyntheticOrg:
+    """A generated org with the objects and relationships the dashboards query.
+
+    Record counts scale from ``policies``; the other sizes default to typical
+    ratios for an agency book. Dates are spread around ``today`` so every
+    predefined dashboard window has data. The same ``seed`` gives the same org.
+    """
+
+    def __init__(self, policies=10000, accounts=None, managers=40, producers=120, carriers=60,
+                 opportunities=None, referrers=300, seed=7, today=None):
+        self.sizes = {
+            'policies': policies,
+            'accounts': accounts if accounts is not None else max(policies // 3, 1),
+            'managers': managers,
+            'producers': producers,
+            'carriers': carriers,
+            'opportunities': opportunities if opportunities is not None else max(policies // 2, 1),
+            'referrers': referrers,
+        }
+        self.seed = seed
+        self.today = pd.Timestamp(today or date.today()).normalize()
+        self.rng = np.random.default_rng(seed)
+        self.tables = self._build()
+        self.engine = SOQLEngine(self.tables)
+
+    @staticmethod
+    def _ids(prefix, count, start=0):
+        return [f"{prefix}{i:015d}" for i in range(start, start + count)]
+
+    def _pick(self, values, count, null_rate=0.0, weights=None):
+        values = np.asarray(values, dtype=object)
+        if not len(values):
+            return np.full(count, None, dtype=object)
+        picked = values[self.rng.choice(len(values), size=count, p=weights)]
+        if null_rate:
+            picked[self.rng.random(count) < null_rate] = None
+        return picked
+
+    def _days(self, low, high, count):
+        return self.today + pd.to_timedelta(self.rng.integers(low, high, count), unit='D')
+
+    def _modstamps(self, count):
+        seconds = self.rng.integers(0, 400 * 86400, count)
+        return self.today - pd.to_timedelta(seconds, unit='s')
+
+    def _build(self):
+        sizes = self.sizes
+        manager_ids = self._ids('005', sizes['managers'])
+        producer_ids = self._ids('0PR', sizes['producers'])
+        referrer_ids = self._ids('003', sizes['referrers'])
+        insured_ids = self._ids('001', sizes['accounts'])
+        carrier_ids = self._ids('001', sizes['carriers'], start=sizes['accounts'])
+
+        users = pd.DataFrame({
+            'Id': manager_ids,
+            'Name': [f"Manager {i:02d}" for i in range(sizes['managers'])],
+        })
+        producers = pd.DataFrame({
+            'Id': producer_ids,
+            'Name': [f"Producer {i:03d}" for i in range(sizes['producers'])],
+            'SystemModstamp': self._modstamps(sizes['producers']),
+        })
+        contacts = pd.DataFrame({
+            'Id': referrer_ids,
+            'Name': [f"Referrer {i:03d}" for i in range(sizes['referrers'])],
+        })
+
+        insured = pd.DataFrame({
+            'Id': insured_ids,
+            'Name': [f"Account {i:07d}" for i in range(sizes['accounts'])],
+            'Account_Manager__c': self._pick(manager_ids, sizes['accounts'], null_rate=0.05),
+            'AccountSource': self._pick(ACCOUNT_SOURCES, sizes['accounts']),
+            'FinServ__ReferredByContact__c': self._pick(referrer_ids, sizes['accounts'], null_rate=0.7),
+            'SystemModstamp': self._modstamps(sizes['accounts']),
+        })
+        carrier_accounts = pd.DataFrame({
+            'Id': carrier_ids,
+            'Name': [f"Carrier {i:02d}" for i in range(sizes['carriers'])],
+            'Account_Manager__c': None,
+            'AccountSource': None,
+            'FinServ__ReferredByContact__c': None,
+            'SystemModstamp': self._modstamps(sizes['carriers']),
+        })
+        accounts = pd.concat([insured, carrier_accounts], ignore_index=True)
+
+        count = sizes['policies']
+        effective = self._days(-545, 180, count)
+        premium = np.round(self.rng.gamma(2.0, 1400.0, count), 2)
+        taxes = np.round(premium * self.rng.uniform(0.02, 0.08, count), 2)
+        policy_types = self._pick(POLICY_TYPES, count)
+        policies = pd.DataFrame({
+            'Id': self._ids('0YT', count),
+            'Name': [f"POL-{i:08d}" for i in range(count)],
+            'PolicyName': policy_types,
+            'PolicyType': policy_types,
+            'Status': self._pick(POLICY_STATUSES, count, weights=POLICY_STATUS_WEIGHTS),
+            'EffectiveDate': effective,
+            'ExpirationDate': effective + pd.DateOffset(years=1),
+            'Business_Type_Reporting__c': self._pick(['New Business', 'Renewal'], count, weights=[0.35, 0.65]),
+            'NameInsuredId': self._pick(insured_ids, count),
+            'ProducerId': self._pick(producer_ids, count, null_rate=0.15),
+            'Producer_2__c': self._pick(producer_ids, count, null_rate=0.75),
+            'WritingCarrierAccountId': self._pick(carrier_ids, count, null_rate=0.1),
+            'Total_Policy_Premium__c': np.round(premium + taxes, 2),
+            'PremiumAmount': premium,
+            'TaxesSurcharges': taxes,
+            'SystemModstamp': self._modstamps(count),
+            'IsDeleted': False,
+        })
+
+        count = sizes['opportunities']
+        created = self.today - pd.to_timedelta(self.rng.integers(0, 400 * 86400, count), unit='s')
+        opportunities = pd.DataFrame({
+            'Id': self._ids('006', count),
+            'Name': [f"Opportunity {i:07d}" for i in range(count)],
+            'CreatedDate': created,
+            'CloseDate': created.normalize() + pd.to_timedelta(self.rng.integers(0, 120, count), unit='D'),
+            'StageName': self._pick(OPPORTUNITY_STAGES, count),
+            'New_Business_or_Renewal__c': self._pick(['New Business', 'Renewal'], count),
+            'Renewing_Carrier__c': self._pick(carrier_ids, count, null_rate=0.4),
+            'AccountId': self._pick(insured_ids, count),
+        })
+
+        # Drawn last so the values generated above do not depend on it
+        users['SystemModstamp'] = self._modstamps(sizes['managers'])
+
+        return {
+            'InsurancePolicy': SObjectTable(
+                'InsurancePolicy', policies,
+                relationships={
+                    'NameInsured': ('NameInsuredId', 'Account'),
+                    'Producer': ('ProducerId', 'Producer'),
+                    'Producer_2__r': ('Producer_2__c', 'Producer'),
+                    'WritingCarrierAccount': ('WritingCarrierAccountId', 'Account'),
+                },
+                date_fields=frozenset({'EffectiveDate', 'ExpirationDate'}),
+                datetime_fields=frozenset({'SystemModstamp'}),
+            ),
+            'Account': SObjectTable(
+                'Account', accounts,
+                relationships={
+                    'Account_Manager__r': ('Account_Manager__c', 'User'),
+                    'FinServ__ReferredByContact__r': ('FinServ__ReferredByContact__c', 'Contact'),
+                },
+                datetime_fields=frozenset({'SystemModstamp'}),
+            ),
+            'User': SObjectTable('User', users, datetime_fields=frozenset({'SystemModstamp'})),
+            'Producer': SObjectTable('Producer', producers, datetime_fields=frozenset({'SystemModstamp'})),
+            'Contact': SObjectTable('Contact', contacts),
+            'Opportunity': SObjectTable(
+                'Opportunity', opportunities,
+                relationships={'Renewing_Carrier__r': ('Renewing_Carrier__c', 'Account'),
+                               'Account': ('AccountId', 'Account')},
+                date_fields=frozenset({'CloseDate'}),
+                datetime_fields=frozenset({'CreatedDate'}),
+            ),
+        }
+
+    def record_counts(self):
+        """Return the number of rows per object."""
+        return {name: len(table.frame) for name, table in self.tables.items()}
+
+
+def _nest(flat, object_name, paths):
+    """Turn one row of dotted-path values into a REST-style nested record."""
+    record = {'attributes': {'type': object_name}}
+    for path in paths:
+        *relationships, leaf = path.split('.')
+        target = record
+        for relationship in relationships:
+            target = target.setdefault(relationship, {'attributes': {'type': relationship}})
+        target[leaf] = flat[path]
+    return _drop_empty_relationships(record)
+
+
+def _drop_empty_relationships(record):
+    """Replace relationships whose fields are all null with None, as the API returns them."""
+    empty = True
+    for key, value in record.items():
+        if key == 'attributes':
+            continue
+        if isinstance(value, dict):
+            record[key] = value = _drop_empty_relationships(value)
+        if value is not None:
+            empty = False
+    return None if empty and len(record) > 1 else record
+
+
+class SyntheticSalesforce(OfflineSalesforce):
+    """Offline client answering SOQL from a ``SyntheticOrg``."""
+
+    def __init__(self, org, page_size=PAGE_SIZE, **kwargs):
+        super().__init__(instance='synthetic.salesforce.local', **kwargs)
+        self.org = org
+        self.page_size = page_size
+        self._cursors = {}
+        self._cursors_lock = threading.Lock()
+
+    def _page(self, cursor, offset):
+        frame, query = self._cursors[cursor]
+        chunk = frame.iloc[offset:offset + self.page_size]
+        if query.is_aggregate:
+            records = [dict({'attributes': {'type': 'AggregateResult'}}, **row) for row in chunk.to_dict('records')]
+        else:
+            paths = list(frame.columns)
+            records = [_nest(row, query.object_name, paths) for row in chunk.to_dict('records')]
+        done = offset + self.page_size >= len(frame)
+        result = {'totalSize': len(frame), 'done': done, 'records': records}
+        if done:
+            with self._cursors_lock:
+                self._cursors.pop(cursor, None)
+        else:
+            result['nextRecordsUrl'] = (
+                f"/services/data/v{self.sf_version}/query/{cursor}-{offset + self.page_size}"
+            )
+        return result
+
+    def _first_page(self, query, include_deleted):
+        frame, parsed = self.org.engine.execute(query, include_deleted=include_deleted)
+        if parsed.is_count_only:
+            return {'totalSize': int(frame['count'].iloc[0]), 'done': True, 'records': []}
+        cursor = uuid.uuid4().hex[:15]
+        with self._cursors_lock:
+            self._cursors[cursor] = (frame, parsed)
+        return self._page(cursor, 0)
+
+    def _next_page(self, next_records_identifier):
+        cursor, _, offset = next_records_identifier.rstrip('/').rsplit('/', 1)[-1].rpartition('-')
+        if cursor not in self._cursors:
+            raise KeyError(f"Query cursor {cursor} expired or does not exist")
+        return self._page(cursor, int(offset))
+
+
+class QueryRecorder:
+    """Append ``query`` and ``query_more`` responses to a JSON-lines file for later replay."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _append(self, entry):
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as fh:
+                fh.write(json.dumps(entry, default=str) + '\n')
+
+    def record_query(self, query, include_deleted, response):
+        self._append({
+            'kind': 'query',
+            'key': soql_fingerprint(query, include_deleted),
+            'soql': query.strip(),
+            'response': response,
+        })
+
+    def record_query_more(self, next_records_identifier, response):
+        self._append({'kind': 'query_more', 'key': next_records_identifier, 'response': response})
+
+
+class ReplaySalesforce(OfflineSalesforce):
+    """Offline client serving responses captured by a ``QueryRecorder``.
+
+    Queries match on their normalized SOQL fingerprint, so whitespace and keyword
+    case may differ from the recording; a query never recorded raises ``KeyError``.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(instance='replay.salesforce.local', **kwargs)
+        self.path = path
+        self._responses = {}
+        with open(path, 'r', encoding='utf-8') as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    # The latest recording of a query wins
+                    self._responses[(entry['kind'], entry['key'])] = entry['response']
+
+    def _lookup(self, kind, key, description):
+        try:
+            return self._responses[(kind, key)]
+        except KeyError:
+            raise KeyError(f"No recorded response for {description} in {self.path}") from None
+
+    def _first_page(self, query, include_deleted):
+        return self._lookup('query', soql_fingerprint(query, include_deleted), f"query: {query.strip()[:200]}")
+
+    def _next_page(self, next_records_identifier):
+        return self._lookup('query_more', next_records_identifier, f"page {next_records_identifier}")
+
+
+_org = None
+_org_lock = threading.Lock()
+
+
+def get_synthetic_org():
+    """Return the process-wide synthetic org, generated once per process.
+
+    Sized by SF_SYNTHETIC_POLICIES (default 10000) with SF_SYNTHETIC_SEED (default 7).
+    """
+    global _org
+    with _org_lock:
+        if _org is None:
+            _org = SyntheticOrg(
+                policies=int(os.getenv("SF_SYNTHETIC_POLICIES", "10000")),
+                seed=int(os.getenv("SF_SYNTHETIC_SEED", "7")),
+            )
+        return _org
+
+
+def use_synthetic_org(org):
+    """Install ``org`` as the process-wide synthetic org, e.g. to switch sizes in a benchmark."""
+    global _org
+    with _org_lock:
+        _org = org
+
+
+def get_recording_path():
+    """Return the JSON-lines file used to record and replay responses (SF_RECORDING_PATH)."""
+    return os.getenv("SF_RECORDING_PATH", os.path.join('.sf_snapshot', 'recorded_queries.jsonl'))
+
+
+def create_offline_client(backend, manager=None):
+    """Build the offline client for ``backend`` (``synthetic`` or ``replay``)."""
+    latency = parse_latency(os.getenv("SF_FAKE_LATENCY_MS", "0"))
+    if backend == 'synthetic':
+        return SyntheticSalesforce(get_synthetic_org(), latency=latency, manager=manager)
+    if backend == 'replay':
+        return ReplaySalesforce(get_recording_path(), latency=latency, manager=manager)
+    raise ValueError(f"Unknown offline Salesforce backend: {backend}")
@@ -0,0 +1,136 @@
+"""Compact in-memory representation for long-lived policy frames.
+
+Frames held process-wide (the policy snapshot, cached query results) repeat
+the same few strings on every row and keep dates as text. ``compact_frame``
+stores:
+
+* low-cardinality text columns as categoricals (one copy of each string plus
+  small integer codes),
+* dates as nullable int32 day offsets from 1970-01-01,
+* money as nullable integer cents (int32 when every value fits).
+
+``expand_frame`` restores the usual dtypes on the (usually much smaller) slice
+a view actually works with. ``memory_report`` compares the two representations.
+"""
+import pandas as pd
+from pandas.api.types import is_integer_dtype, is_object_dtype
+
+EPOCH = pd.Timestamp('1970-01-01')
+
+# Text columns whose distinct values cover at most this share of rows become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+_INT32_MAX = 2 ** 31 - 1
+
+
+def day_offset(value):
+    """Return the day offset of a single date-like value."""
+    return (pd.Timestamp(value).normalize() - EPOCH).days
+
+
+def to_day_offsets(values):
+    """Convert date strings or datetimes to nullable int32 days since 1970-01-01."""
+    if is_integer_dtype(values.dtype):
+        return values.astype('Int32')
+    dates = pd.to_datetime(values, errors='coerce')
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_convert(None)
+    return (dates.dt.normalize() - EPOCH).dt.days.astype('Int32')
+
+
+def from_day_offsets(days):
+    """Convert day offsets back to datetime64 values (missing offsets become NaT)."""
+    return EPOCH + pd.to_timedelta(days.astype('float64'), unit='D')
+
+
+def to_cents(values):
+    """Convert amounts to nullable integer cents (int32 when they fit, else int64)."""
+    if is_integer_dtype(values.dtype):
+        return values
+    cents = (pd.to_numeric(values, errors='coerce') * 100).round()
+    largest = cents.abs().max()
+    return cents.astype('Int32' if pd.isna(largest) or largest <= _INT32_MAX else 'Int64')
+
+
+def from_cents(cents):
+    """Convert integer cents back to float amounts (missing values become NaN)."""
+    return cents.astype('float64') / 100
+
+
+def _is_text(series):
+    return is_object_dtype(series.dtype) or isinstance(series.dtype, pd.StringDtype)
+
+
+def low_cardinality_columns(frame, max_ratio=CATEGORY_MAX_RATIO):
+    """Return the text columns of ``frame`` worth storing as categoricals."""
+    if frame.empty:
+        return []
+    return [
+        column for column in frame.columns
+        if _is_text(frame[column]) and frame[column].nunique(dropna=True) <= max_ratio * len(frame)
+    ]
+
+
+def compact_frame(frame, categorical=(), dates=(), money=()):
+    """Return a compact copy of ``frame``.
+
+    ``categorical`` lists columns to store as categoricals, or is ``'auto'`` to pick
+    every low-cardinality text column. Conversions are idempotent, so re-compacting
+    an already compact (or partly compact, e.g. freshly concatenated) frame is safe.
+    """
+    compact = frame.copy(deep=False)
+    if isinstance(categorical, str) and categorical == 'auto':
+        categorical = low_cardinality_columns(frame)
+    for column in categorical:
+        if column in compact:
+            compact[column] = compact[column].astype('category')
+    for column in dates:
+        if column in compact:
+            compact[column] = to_day_offsets(compact[column])
+    for column in money:
+        if column in compact:
+            compact[column] = to_cents(compact[column])
+    return compact
+
+
+def expand_frame(frame, dates=(), money=()):
+    """Undo ``compact_frame``: categoricals back to text, day offsets to datetimes, cents to amounts."""
+    expanded = frame.copy(deep=False)
+    for column in expanded.columns:
+        dtype = expanded[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Rows share the category string objects, so this only allocates pointers
+            expanded[column] = expanded[column].astype(dtype.categories.dtype)
+    for column in dates:
+        if column in expanded:
+            expanded[column] = from_day_offsets(expanded[column])
+    for column in money:
+        if column in expanded:
+            expanded[column] = from_cents(expanded[column])
+    return expanded
+
+
+def frame_memory(frame):
+    """Return the deep memory usage of each column in bytes."""
+    return frame.memory_usage(deep=True, index=False)
+
+
+def memory_report(before, after):
+    """Compare per-column memory of two representations of the same frame.
+
+    Returns a DataFrame with bytes before/after, the saving in percent and a
+    final ``TOTAL`` row.
+    """
+    before_bytes = frame_memory(before)
+    after_bytes = frame_memory(after).reindex(before_bytes.index, fill_value=0)
+    report = pd.DataFrame({
+        'Column': list(before_bytes.index) + ['TOTAL'],
+        'Before (bytes)': list(before_bytes.values) + [int(before_bytes.sum())],
+        'After (bytes)': list(after_bytes.values) + [int(after_bytes.sum())],
+        'Before dtype': [str(before[column].dtype) for column in before_bytes.index] + [''],
+        'After dtype': [str(after[column].dtype) for column in before_bytes.index] + [''],
+    })
+    report['Saved %'] = (
+        (1 - report['After (bytes)'] / report['Before (bytes)'].where(report['Before (bytes)'] > 0)) * 100
+    ).round(1)
+    return report
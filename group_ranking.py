@@ -0,0 +1,48 @@
+"""Top-N-per-group ranking shared by the workload and producer dashboards.
+
+``rank_within_groups`` builds one (group, key) count table -- or sums a value
+column such as premium -- and ranks the keys inside each group with a single
+grouped rank, instead of running ``value_counts`` once per manager or producer.
+The workload overview takes each manager's top 3 policy types from it and the
+producer dashboard ranks every producer's policy types by count and premium.
+"""
+import pandas as pd
+
+
+def rank_within_groups(df, group, key, value=None, n=None):
+    """Rank the ``key`` values within each ``group``, largest first.
+
+    Counts rows per (group, key), or sums ``value`` when given, and returns the
+    group, key, measure ('Count' or ``value``) and 'Rank' columns (1 is the
+    largest), sorted by group and rank. Like ``value_counts``, tied keys keep the
+    order they first appear in within ``df``. With ``n``, only the top ``n`` keys
+    of each group are kept.
+    """
+    measure = 'Count' if value is None else value
+    if df.empty:
+        return pd.DataFrame(columns=[group, key, measure, 'Rank'])
+
+    grouped = df.groupby([group, key], observed=True, sort=False)
+    table = (grouped.size().rename(measure) if value is None else grouped[value].sum()).reset_index()
+
+    # The table is in first-appearance order, so method='first' breaks ties by appearance
+    table['Rank'] = (
+        table.groupby(group, observed=True, sort=False)[measure]
+        .rank(method='first', ascending=False)
+        .astype(int)
+    )
+    if n is not None:
+        table = table[table['Rank'] <= n]
+    return table.sort_values([group, 'Rank'], ignore_index=True)
+
+
+def top_keys(ranked, group, key, separator=', '):
+    """Join each group's ranked keys into one label, e.g. 'Auto, Homeowners, Flood'."""
+    return ranked.groupby(group, observed=True, sort=False)[key].agg(separator.join)
+
+
+def group_ranking(ranked, group, name, key):
+    """Return one group's ranking from ``rank_within_groups`` as a Series of measures indexed by key."""
+    measure = ranked.columns[2]
+    rows = ranked[ranked[group] == name]
+    return pd.Series(rows[measure].to_numpy(), index=pd.Index(rows[key].to_numpy(), name=key), name=measure)
@@ -1,5 +1,4 @@
 import streamlit as st
-from simple_salesforce import Salesforce
 import os
 from dotenv import load_dotenv
 import plotly.express as px
@@ -7,6 +6,19 @@ import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 import datetime
+from sf_session import get_session_manager
+from snapshot_store import get_policy_snapshot_store
+from soql_cache import cached_query_all
+from policy_loader import POLICY_STATUS_FILTER, PolicyLoadError, build_expiration_filter, fetch_policy_window
+from window_cache import get_window_cache
+from window_prefetch import get_prefetcher
+from query_metrics import render_query_panel, start_query_run
+from workload import (
+    DEFAULT_WEIGHTING_SCHEME, PREDEFINED_WINDOWS, WorkloadCube, build_workload_cube, core_lines_workload,
+    expiration_timeline, filter_policy_types, get_core_policy_types, get_weighting_schemes,
+    get_workload_thresholds, manager_details, manager_options, policy_type_analysis, portfolio_summary,
+    resolve_window, workload_overview, workload_statistics,
+)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -18,35 +30,6 @@ st.set_page_config(
     layout="wide",
 )
 
-# Define workload thresholds
-def get_workload_thresholds():
-    """Return workload threshold configuration."""
-    return {
-        "extreme": {"min": 400, "color": "#e74c3c", "icon": "🔴", "label": "Extreme"},
-        "very_high": {"min": 350, "color": "#ff6b35", "icon": "🟠", "label": "Very High"},
-        "high": {"min": 200, "color": "#f39c12", "icon": "🟡", "label": "High"},
-        "optimal": {"min": 100, "color": "#2ecc71", "icon": "🟢", "label": "Optimal"},
-        "low": {"min": 0, "color": "#3498db", "icon": "🔵", "label": "Low"}
-    }
-
-def get_workload_category(count, thresholds):
-    """Determine workload category based on policy count."""
-    if count >= thresholds["extreme"]["min"]:
-        return "extreme"
-    elif count >= thresholds["very_high"]["min"]:
-        return "very_high"
-    elif count >= thresholds["high"]["min"]:
-        return "high"
-    elif count >= thresholds["optimal"]["min"]:
-        return "optimal"
-    else:
-        return "low"
-
-# Define core policy types
-def get_core_policy_types():
-    """Return a list of core policy types for analysis."""
-    return ["Personal Auto", "Commercial Auto", "Flood", "Flood - CL", "Flood - PL", "Homeowners", "Umbrella"]
-
 # Function to get current ISO week
 def get_current_iso_week():
     """Calculate the ISO week number for the current date."""
@@ -54,199 +37,123 @@ def get_current_iso_week():
     year, week_num, _ = today.isocalendar()
     return year, week_num
 
-# Function to connect to Salesforce and query Insurance Policy data
-# Function to connect to Salesforce and query Insurance Policy data
-def connect_to_salesforce(start_date=None, end_date=None):
-    """Connect to Salesforce and execute SOQL queries for Insurance Policy data."""
+def notify(level, message):
+    """Show a policy loader message as the matching Streamlit status element."""
+    getattr(st, level)(message)
+
+def get_salesforce_client():
+    """Return the shared Salesforce client, or None when credentials are missing."""
+    manager = get_session_manager()
+
+    # Debug: Check if environment variables are loaded
+    username = os.getenv("SF_USERNAME_PRO")
+    password = os.getenv("SF_PASSWORD_PRO")
+    security_token = os.getenv("SF_SECURITY_TOKEN_PRO")
+
+    # Add debug information
+    if manager.requires_credentials and (not username or not password or not security_token):
+        st.error("❌ Missing Salesforce credentials in environment variables")
+        st.info(f"Username exists: {bool(username)}, Password exists: {bool(password)}, Token exists: {bool(security_token)}")
+        return None
+
+    # Shared Salesforce session (logs in once per process, no describe round trip)
+    sf = manager.get_client()
+    st.success("✅ Successfully connected to Salesforce")
+    return sf
+
+def fetch_workload_aggregates(start_date=None, end_date=None, core_types=None, refresh=False):
+    """Push the Workload Overview aggregation down to Salesforce.
+
+    Runs one ``GROUP BY`` query for policy counts per account manager, policy type
+    and status, plus a ``COUNT_DISTINCT`` for unique accounts over all types and over
+    ``core_types``, so the transfer is O(managers x types) rather than one row per
+    policy and the core-lines focus needs no further query. Returns a dict with
+    ``counts`` (the columns of ``summarize_policy_counts`` plus each group's
+    LastExpiration, in row-query order) and ``unique_accounts``
+    (keyed by None and ``frozenset(core_types)``), or None on failure.
+    """
     try:
-        # Debug: Check if environment variables are loaded
-        username = os.getenv("SF_USERNAME_PRO")
-        password = os.getenv("SF_PASSWORD_PRO")
-        security_token = os.getenv("SF_SECURITY_TOKEN_PRO")
-        
-        # Add debug information
-        if not username or not password or not security_token:
-            st.error("❌ Missing Salesforce credentials in environment variables")
-            st.info(f"Username exists: {bool(username)}, Password exists: {bool(password)}, Token exists: {bool(security_token)}")
-            return pd.DataFrame()
-        
-        # Salesforce connection using environment variables
-        sf = Salesforce(
-            username=username,
-            password=password,  
-            security_token=security_token,
-        )
-        
-        # Test connection
-        sf.describe()
-        st.success("✅ Successfully connected to Salesforce")
-
-        # Prepare date filter for ExpirationDate
-        date_filter = ""
-        if start_date and end_date:
-            start_date_str = start_date.strftime('%Y-%m-%dT00:00:00Z')
-            end_date_str = end_date.strftime('%Y-%m-%dT23:59:59Z')
-            date_filter = f"AND ExpirationDate >= {start_date_str} AND ExpirationDate <= {end_date_str}"
-
-        # Query Account Manager information with error handling
-        account_query = """
-            SELECT 
-                Id, 
-                Name,
-                Account_Manager__c,
-                Account_Manager__r.Name
-            FROM Account
-            WHERE Account_Manager__c != null
-        """
-
-        account_manager_map = {}
-        try:
-            # Execute account query
-            account_results = sf.query_all(account_query)
-            
-            # Check if results exist
-            if account_results and 'records' in account_results:
-                # Create a dictionary to map Account IDs to their Account Managers
-                for record in account_results['records']:
-                    if record:  # Check if record is not None
-                        account_id = record.get('Id')
-                        # Safely get the Account Manager name
-                        account_manager_relation = record.get('Account_Manager__r')
-                        if account_manager_relation and isinstance(account_manager_relation, dict):
-                            producer_name = account_manager_relation.get('Name', 'Not Assigned')
-                        else:
-                            producer_name = 'Not Assigned'
-                        
-                        if account_id:
-                            account_manager_map[account_id] = producer_name
-                            
-                st.info(f"📊 Found {len(account_manager_map)} accounts with account managers")
-            else:
-                st.warning("⚠️ No account records found or empty result set")
-
-        except Exception as e:
-            st.warning(f"⚠️ Error querying accounts: {str(e)}")
-            account_manager_map = {}
-
-        # Query Insurance Policy records with Account relationship
-        policy_query = f"""
-            SELECT 
-                Id,
-                Name,
-                PolicyType,
-                EffectiveDate,
-                ExpirationDate,
-                Status,
-                NameInsuredId,
-                NameInsured.Name,
-                NameInsured.Account_Manager__c,
-                NameInsured.Account_Manager__r.Name
+        sf = get_salesforce_client()
+        if sf is None:
+            return None
+
+        where_clause = f"ExpirationDate != null AND {POLICY_STATUS_FILTER} {build_expiration_filter(start_date, end_date)}"
+
+        # Aggregate results cannot page with queryMore, but managers x types x statuses stays
+        # far below the 2,000 group limit
+        count_query = f"""
+            SELECT
+                NameInsured.Account_Manager__c managerId,
+                NameInsured.Account_Manager__r.Name managerName,
+                PolicyType policyType,
+                Status status,
+                COUNT(Id) policyCount,
+                MAX(ExpirationDate) lastExpiration
             FROM InsurancePolicy
-            WHERE ExpirationDate != null
-            AND Status IN ('Active', 'Renewing', 'Pending Cancellation', 'Non-Renewal', 'Reinstating', 'Reinstated')
-            {date_filter}
-            ORDER BY ExpirationDate DESC
-           
+            WHERE {where_clause}
+            GROUP BY NameInsured.Account_Manager__c, NameInsured.Account_Manager__r.Name, PolicyType, Status
         """
+        account_scopes = {None: where_clause}
+        if core_types:
+            type_list = ', '.join(f"'{policy_type}'" for policy_type in core_types)
+            account_scopes[frozenset(core_types)] = f"{where_clause} AND PolicyType IN ({type_list})"
+
+        groups = cached_query_all(sf, count_query, refresh=refresh)['records']
+        unique_accounts = {}
+        for scope, scope_where in account_scopes.items():
+            account_query = f"""
+                SELECT COUNT_DISTINCT(NameInsuredId) accountCount
+                FROM InsurancePolicy
+                WHERE {scope_where}
+            """
+            account_records = cached_query_all(sf, account_query, refresh=refresh)['records']
+            unique_accounts[scope] = int(account_records[0].get('accountCount') or 0) if account_records else 0
+    except Exception as e:
+        st.error(f"❌ Error querying workload aggregates: {str(e)}")
+        return None
+
+    counts = pd.DataFrame({
+        'AccountManager': [group.get('managerName') or 'Not Assigned' for group in groups],
+        'PolicyType': [group.get('policyType') for group in groups],
+        'Status': [group.get('status') for group in groups],
+        'PolicyCount': [int(group.get('policyCount') or 0) for group in groups],
+        'LastExpiration': pd.to_datetime([group.get('lastExpiration') for group in groups]),
+    })
+    # List groups in the order their first policy appears in the row query (ORDER BY
+    # ExpirationDate DESC), so top policy type ties break as they do on the rows
+    counts = counts.sort_values('LastExpiration', ascending=False, kind='stable')
+    # Managers sharing a name were grouped separately by ID; the dashboard reports by name
+    counts = (
+        counts.groupby(['AccountManager', 'PolicyType', 'Status'], dropna=False, sort=False)
+        .agg(PolicyCount=('PolicyCount', 'sum'), LastExpiration=('LastExpiration', 'max'))
+        .reset_index()
+    )
 
-        try:
-            policy_results = sf.query_all(policy_query)
-            
-            # Check if policy results exist
-            if not policy_results or 'records' not in policy_results:
-                st.warning("⚠️ No insurance policy records found")
-                return pd.DataFrame()
-                
-            if not policy_results['records']:
-                st.warning("⚠️ Empty insurance policy record set")
-                return pd.DataFrame()
-                
-            st.info(f"📊 Found {len(policy_results['records'])} insurance policies")
+    st.info(f"📊 Aggregated {counts['PolicyCount'].sum():,} insurance policies into {len(counts):,} groups")
+    return {'counts': counts, 'unique_accounts': unique_accounts}
 
-        except Exception as e:
-            st.error(f"❌ Error querying insurance policies: {str(e)}")
-            return pd.DataFrame()
+# Function to connect to Salesforce and query Insurance Policy data
+def connect_to_salesforce(start_date=None, end_date=None):
+    """Connect to Salesforce and execute SOQL queries for Insurance Policy data.
 
-        # Process results into a DataFrame with better error handling
-        data = []
-        for record in policy_results['records']:
-            if not record:  # Skip None records
-                continue
-                
-            try:
-                policy_name = record.get('Name', 'Unknown Policy')
-                policy_type = record.get('PolicyType', 'Not Specified')
-                status = record.get('Status', 'Unknown')
-                effective_date = record.get('EffectiveDate')
-                expiration_date = record.get('ExpirationDate')
-                
-                # Get account information safely
-                account_id = record.get('NameInsuredId')
-                
-                # Safe account name extraction
-                name_insured = record.get('NameInsured')
-                account_name = 'Unknown Account'
-                if name_insured and isinstance(name_insured, dict):
-                    account_name = name_insured.get('Name', 'Unknown Account')
-                
-                # Get account manager - try multiple sources
-                account_manager = "Not Assigned"
-                
-                # Try from the policy relationship first
-                if (name_insured and isinstance(name_insured, dict) and 
-                    name_insured.get('Account_Manager__r') and 
-                    isinstance(name_insured.get('Account_Manager__r'), dict)):
-                    account_manager = name_insured['Account_Manager__r'].get('Name', 'Not Assigned')
-                # Fallback to account_manager_map
-                elif account_id and account_id in account_manager_map:
-                    account_manager = account_manager_map[account_id]
-
-                data.append({
-                    'PolicyId': record.get('Id'),
-                    'PolicyName': policy_name,
-                    'PolicyType': policy_type,
-                    'Status': status,
-                    'EffectiveDate': effective_date,
-                    'ExpirationDate': expiration_date,
-                    'AccountId': account_id,
-                    'AccountName': account_name,
-                    'AccountManager': account_manager
-                })
-                
-            except Exception as e:
-                st.warning(f"⚠️ Error processing record {record.get('Id', 'Unknown')}: {str(e)}")
-                continue
+    Returns an empty frame only when no policies expire in the range; failures are shown
+    and raised as PolicyLoadError, so they are never cached as an empty range.
+    """
+    try:
+        sf = get_salesforce_client()
+        if sf is None:
+            raise PolicyLoadError("Could not connect to Salesforce")
 
-        # Create DataFrame
-        df = pd.DataFrame(data)
-        
-        if df.empty:
-            st.warning("⚠️ No valid policy data could be processed")
-            return df
-            
-        # Convert dates to datetime with error handling
-        try:
-            df['EffectiveDate'] = pd.to_datetime(df['EffectiveDate'], errors='coerce')
-            df['ExpirationDate'] = pd.to_datetime(df['ExpirationDate'], errors='coerce')
-            
-            # Add month columns for analysis
-            df['EffectiveMonth'] = df['EffectiveDate'].dt.strftime('%Y-%m')
-            df['ExpirationMonth'] = df['ExpirationDate'].dt.strftime('%Y-%m')
-            
-            st.success(f"✅ Successfully processed {len(df)} insurance policies")
-            
-        except Exception as e:
-            st.error(f"❌ Error converting dates: {str(e)}")
-            return pd.DataFrame()
-
-        return df
+        return fetch_policy_window(sf, start_date, end_date, notify=notify)
 
+    except PolicyLoadError:
+        raise
     except Exception as e:
         st.error(f"❌ Error connecting to Salesforce: {str(e)}")
         # Add more detailed error information
         import traceback
         st.error(f"Detailed error: {traceback.format_exc()}")
-        return pd.DataFrame()
+        raise PolicyLoadError(str(e)) from e
 
 # Streamlit UI
 st.title("⚖️ Account Manager Workload Dashboard")
@@ -285,39 +192,12 @@ date_range_type = st.sidebar.radio(
 if date_range_type == "Predefined":
     time_period = st.sidebar.selectbox(
         "Select Time Period",
-        options=["Next 30 Days", "Next 60 Days", "Next 90 Days", "Current Quarter", "Next Quarter", "Current Year"],
+        options=PREDEFINED_WINDOWS,
         index=0
     )
-    
+
     # Determine dates based on selection
-    if time_period == "Next 30 Days":
-        start_date = today.date()
-        end_date = today.date() + datetime.timedelta(days=30)
-    elif time_period == "Next 60 Days":
-        start_date = today.date()
-        end_date = today.date() + datetime.timedelta(days=60)
-    elif time_period == "Next 90 Days":
-        start_date = today.date()
-        end_date = today.date() + datetime.timedelta(days=90)
-    elif time_period == "Current Quarter":
-        current_quarter = (today.month - 1) // 3 + 1
-        start_date = datetime.date(today.year, (current_quarter - 1) * 3 + 1, 1)
-        if current_quarter == 4:
-            end_date = datetime.date(today.year, 12, 31)
-        else:
-            end_date = datetime.date(today.year, current_quarter * 3 + 1, 1) - datetime.timedelta(days=1)
-    elif time_period == "Next Quarter":
-        current_quarter = (today.month - 1) // 3 + 1
-        next_quarter = current_quarter + 1 if current_quarter < 4 else 1
-        next_year = today.year if current_quarter < 4 else today.year + 1
-        start_date = datetime.date(next_year, (next_quarter - 1) * 3 + 1, 1)
-        if next_quarter == 4:
-            end_date = datetime.date(next_year, 12, 31)
-        else:
-            end_date = datetime.date(next_year, next_quarter * 3 + 1, 1) - datetime.timedelta(days=1)
-    else:  # Current Year
-        start_date = datetime.date(today.year, 1, 1)
-        end_date = datetime.date(today.year, 12, 31)
+    start_date, end_date = resolve_window(time_period, today.date())
 else:
     # Custom date range
     start_date = st.sidebar.date_input(
@@ -344,19 +224,126 @@ view_by = st.sidebar.radio(
     ["Workload Overview", "Policy Type Analysis", "Account Manager Details", "Expiration Timeline"]
 )
 
+# Tag this rerun's SOQL statements with the selected view for the performance panel
+start_query_run('load_balance', view=view_by)
+
 # Additional options
 show_data_table = st.sidebar.checkbox("📋 Show Data Tables", value=True)
 show_core_lines_only = st.sidebar.checkbox("🎯 Focus on Core Lines Only", value=False)
 
-# Fetch data
-with st.spinner('🔄 Fetching policy data from Salesforce...'):
-    df = connect_to_salesforce(start_date, end_date)
-
-if not df.empty:
+# The Workload Overview (and the core-lines section) only need counts, so they are aggregated in
+# Salesforce with GROUP BY. Only an opted-in local snapshot (SF_SNAPSHOT_DIR) serves rows instead,
+# since it answers from local disk after a small delta sync.
+use_aggregates = view_by == "Workload Overview" and get_policy_snapshot_store() is None
+core_types = get_core_policy_types()
+window = (start_date, end_date)
+window_cache = get_window_cache()
+# Keeps the predefined windows warm in the background when SF_PREFETCH_INTERVAL is set (off by default)
+prefetcher = get_prefetcher()
+_policy_rows = {}
+_cache_status = {}
+
+# Only the date range decides what is fetched; every other widget is applied to the loaded window
+refresh_requested = st.sidebar.button("🔄 Refresh data", help="Reload the selected date range from Salesforce")
+if refresh_requested:
+    window_cache.invalidate(window)
+
+def cached_window(complete=True):
+    """Return the window's cache entry, waiting for the background prefetch if it is loading this window."""
+    entry = window_cache.get(window, complete=complete)
+    if entry is None and prefetcher is not None and prefetcher.wait_for(window):
+        entry = window_cache.get(window, complete=complete)
+    return entry
+
+def window_rows():
+    """Return the window's policy rows of every type, from the window cache when they were loaded before.
+
+    Otherwise the rows are assembled from cached windows covering parts of the range, and
+    only the uncovered date ranges are fetched (everything, after a refresh).
+    """
+    if 'df' not in _policy_rows:
+        entry = cached_window()
+        if entry is not None:
+            _policy_rows['df'] = entry.policy_rows()
+        else:
+            try:
+                with st.spinner('🔄 Fetching policy data from Salesforce...'):
+                    assembly = window_cache.assemble(
+                        window, connect_to_salesforce, max_age=0 if refresh_requested else None
+                    )
+            except PolicyLoadError:
+                # The error is already shown; nothing is cached, so the next rerun retries
+                _policy_rows['df'] = pd.DataFrame()
+                return _policy_rows['df']
+            for source, count in assembly.reused:
+                st.info(f"♻️ Reused {count:,} policies from the cached "
+                        f"{source[0].strftime('%B %d, %Y')} to {source[1].strftime('%B %d, %Y')} window")
+            _policy_rows['df'] = assembly.rows
+            _policy_rows['assembly'] = assembly
+    return _policy_rows['df']
+
+def load_policy_rows():
+    """Return the policy rows for the raw data table."""
+    rows = window_rows()
     # Filter for core lines if requested
     if show_core_lines_only:
-        core_types = get_core_policy_types()
-        df = df[df['PolicyType'].isin(core_types)]
+        rows = filter_policy_types(rows, core_types)
+    return rows
+
+def load_workload_cube(complete=True):
+    """Return the cube every view is sliced from, fetching only when the window is not cached.
+
+    ``complete=False`` accepts an overview-only cube aggregated in Salesforce. Cubes
+    cover every policy type, so the core-lines focus is a slice of the cached cube.
+    """
+    entry = cached_window(complete)
+    if entry is None and not complete and not refresh_requested and window_cache.covers(window):
+        # Cached windows hold every row of this range, which beats an aggregate query
+        complete = True
+    if entry is not None:
+        _cache_status.setdefault('age', entry.age)
+    else:
+        if complete:
+            cube = build_workload_cube(window_rows())
+        else:
+            with st.spinner('🔄 Aggregating policy counts in Salesforce...'):
+                aggregates = fetch_workload_aggregates(start_date, end_date, core_types, refresh=refresh_requested)
+            if aggregates is None:
+                cube = build_workload_cube(pd.DataFrame())
+            else:
+                cube = WorkloadCube.from_counts(aggregates['counts'], aggregates['unique_accounts'])
+        if cube.empty:
+            return cube
+        assembly = _policy_rows.get('assembly')
+        entry = window_cache.put(
+            window, cube, rows=_policy_rows.get('df'), fetched_at=assembly.fetched_at if assembly else None
+        )
+    return entry.cube.restrict_types(core_types) if show_core_lines_only else entry.cube
+
+# Fetch data (or reuse the window an earlier rerun or another session loaded)
+cube = load_workload_cube(complete=not use_aggregates)
+policy_counts = cube.policy_counts()
+unique_accounts = cube.unique_accounts()
+
+if 'age' in _cache_status:
+    st.sidebar.caption(f"⚡ Served from cache (age {_cache_status['age']:.0f}s)")
+if prefetcher is not None:
+    warm_windows = [status for status in prefetcher.status() if not status.error]
+    oldest = f", oldest {max(status.age for status in warm_windows):.0f}s" if warm_windows else ""
+    st.sidebar.caption(
+        f"🔁 Background prefetch: {len(warm_windows)}/{len(PREDEFINED_WINDOWS)} predefined windows warm{oldest}, "
+        f"refreshed every {prefetcher.interval}s"
+    )
+
+# Salesforce session reuse
+session_stats = get_session_manager().stats()
+st.sidebar.caption(
+    f"🔌 Salesforce session: {session_stats['logins']} login(s), "
+    f"{session_stats['logins_saved']} reused, {session_stats['api_calls']} API calls"
+)
+
+if not policy_counts.empty:
+    if show_core_lines_only:
         st.info(f"🎯 Showing core policy types only: {', '.join(core_types)}")
 
     # Display reporting period
@@ -367,44 +354,23 @@ if not df.empty:
     st.subheader("📈 Policy Portfolio Summary")
     col1, col2, col3, col4 = st.columns(4)
 
-    total_policies = len(df)
-    active_policies = len(df[df['Status'] == 'Active'])
-    unique_accounts = df['AccountId'].nunique()
-    unique_managers = df['AccountManager'].nunique()
+    summary = portfolio_summary(policy_counts, unique_accounts)
 
     with col1:
-        st.metric("Total Policies", f"{total_policies:,}")
+        st.metric("Total Policies", f"{summary['total_policies']:,}")
     with col2:
-        st.metric("Active Policies", f"{active_policies:,}")
+        st.metric("Active Policies", f"{summary['active_policies']:,}")
     with col3:
-        st.metric("Unique Accounts", f"{unique_accounts:,}")
+        st.metric("Unique Accounts", f"{summary['unique_accounts']:,}")
     with col4:
-        st.metric("Account Managers", f"{unique_managers:,}")
+        st.metric("Account Managers", f"{summary['unique_managers']:,}")
 
     # Workload Overview
     if view_by == "Workload Overview":
         st.header("⚖️ Account Manager Workload Distribution")
 
-        # Calculate workload by account manager
-        workload_df = df.groupby('AccountManager').agg({
-            'PolicyId': 'count',
-            'PolicyType': lambda x: ', '.join(x.value_counts().head(3).index.tolist())
-        }).reset_index()
-        workload_df.columns = ['AccountManager', 'PolicyCount', 'TopPolicyTypes']
-
-        # Add workload categories
-        workload_df['WorkloadCategory'] = workload_df['PolicyCount'].apply(
-            lambda x: get_workload_category(x, thresholds)
-        )
-        workload_df['CategoryColor'] = workload_df['WorkloadCategory'].apply(
-            lambda x: thresholds[x]['color']
-        )
-        workload_df['CategoryIcon'] = workload_df['WorkloadCategory'].apply(
-            lambda x: thresholds[x]['icon']
-        )
-
-        # Sort by policy count
-        workload_df = workload_df.sort_values('PolicyCount', ascending=False)
+        # Calculate workload by account manager from the (manager, type, status) counts
+        workload_df = workload_overview(policy_counts, thresholds)
 
         # Workload distribution chart
         fig = px.bar(
@@ -433,6 +399,7 @@ if not df.empty:
         # Workload category distribution
         st.subheader("📊 Workload Category Distribution")
         category_counts = workload_df['WorkloadCategory'].value_counts()
+        category_counts = category_counts[category_counts > 0]
         
         col1, col2 = st.columns(2)
         
@@ -452,21 +419,18 @@ if not df.empty:
         with col2:
             # Summary statistics
             st.markdown("### 📊 Workload Statistics")
-            avg_workload = workload_df['PolicyCount'].mean()
-            median_workload = workload_df['PolicyCount'].median()
-            max_workload = workload_df['PolicyCount'].max()
-            min_workload = workload_df['PolicyCount'].min()
+            stats = workload_statistics(workload_df)
 
-            st.metric("Average Workload", f"{avg_workload:.1f} policies")
-            st.metric("Median Workload", f"{median_workload:.0f} policies")
-            st.metric("Highest Workload", f"{max_workload:,} policies")
-            st.metric("Lowest Workload", f"{min_workload:,} policies")
+            st.metric("Average Workload", f"{stats['average']:.1f} policies")
+            st.metric("Median Workload", f"{stats['median']:.0f} policies")
+            st.metric("Highest Workload", f"{stats['max']:,} policies")
+            st.metric("Lowest Workload", f"{stats['min']:,} policies")
 
         # Show workload table
         if show_data_table:
             st.subheader("📋 Detailed Workload Breakdown")
             display_df = workload_df.copy()
-            display_df['Category'] = display_df['CategoryIcon'] + ' ' + display_df['WorkloadCategory'].apply(lambda x: thresholds[x]['label'])
+            display_df['Category'] = display_df['CategoryIcon'] + ' ' + display_df['CategoryLabel']
             display_df = display_df[['AccountManager', 'PolicyCount', 'Category', 'TopPolicyTypes']]
             display_df.columns = ['Account Manager', 'Policy Count', 'Workload Level', 'Top Policy Types']
             st.dataframe(display_df, use_container_width=True)
@@ -476,8 +440,8 @@ if not df.empty:
         st.header("📊 Policy Type Distribution")
 
         # Policy type breakdown
-        type_counts = df['PolicyType'].value_counts().reset_index()
-        type_counts.columns = ['PolicyType', 'Count']
+        type_analysis = policy_type_analysis(cube)
+        type_counts = type_analysis['type_counts']
 
         # Bar chart
         fig = px.bar(
@@ -494,17 +458,8 @@ if not df.empty:
         # Policy type by account manager heatmap
         st.subheader("🔥 Policy Type Distribution by Account Manager")
         
-        # Create cross-tabulation
-        cross_tab = pd.crosstab(df['AccountManager'], df['PolicyType'])
-        
-        # Get top managers and types for visualization
-        top_managers = cross_tab.sum(axis=1).nlargest(10).index
-        top_types = cross_tab.sum(axis=0).nlargest(8).index
-        
-        filtered_cross_tab = cross_tab.loc[top_managers, top_types]
-
         fig = px.imshow(
-            filtered_cross_tab,
+            type_analysis['heatmap'],
             text_auto=True,
             aspect="auto",
             title="Policy Count Heatmap: Top Account Managers vs Top Policy Types",
@@ -525,7 +480,7 @@ if not df.empty:
         st.header("👥 Account Manager Performance Details")
 
         # Account manager selection
-        manager_list = sorted(df['AccountManager'].unique())
+        manager_list = manager_options(cube)
         selected_managers = st.multiselect(
             "Select Account Managers to Compare",
             options=manager_list,
@@ -533,20 +488,8 @@ if not df.empty:
         )
 
         if selected_managers:
-            filtered_df = df[df['AccountManager'].isin(selected_managers)]
-
             # Manager comparison metrics
-            manager_stats = filtered_df.groupby('AccountManager').agg({
-                'PolicyId': 'count',
-                'PolicyType': 'nunique',
-                'AccountId': 'nunique',
-                'ExpirationDate': ['min', 'max']
-            }).round(2)
-
-            manager_stats.columns = [
-                'Total Policies', 'Policy Types', 'Unique Accounts', 
-                'Earliest Expiration', 'Latest Expiration'
-            ]
+            manager_stats = manager_details(cube, selected_managers)
 
             # Comparison chart
             fig = px.bar(
@@ -569,11 +512,8 @@ if not df.empty:
         st.header("📅 Policy Expiration Timeline")
 
         # Monthly expiration analysis
-        monthly_exp = df.groupby('ExpirationMonth').agg({
-            'PolicyId': 'count',
-            'AccountManager': 'nunique'
-        }).reset_index()
-        monthly_exp.columns = ['Month', 'Policies Expiring', 'Account Managers Affected']
+        timeline = expiration_timeline(cube)
+        monthly_exp = timeline['monthly']
 
         # Line chart for expiration timeline
         fig = px.line(
@@ -588,11 +528,9 @@ if not df.empty:
         st.plotly_chart(fig, use_container_width=True)
 
         # Stacked bar chart by manager and month
-        if len(df['AccountManager'].unique()) <= 15:  # Only show if manageable number
-            monthly_by_manager = df.groupby(['ExpirationMonth', 'AccountManager']).size().reset_index(name='Count')
-            
+        if timeline['by_manager'] is not None:  # Only show if manageable number
             fig = px.bar(
-                monthly_by_manager,
+                timeline['by_manager'],
                 x="ExpirationMonth",
                 y="Count",
                 color="AccountManager",
@@ -611,40 +549,30 @@ if not df.empty:
         st.header("🎯 Core Lines Workload Analysis")
         st.info("Core Lines: Auto, Flood, Homeowners, Umbrella")
 
-        core_lines = get_core_policy_types()
-        df_core = df[df['PolicyType'].isin(core_lines)]
-
-        if not df_core.empty:
-            # Apply weighting: Flood-CL and Flood-PL = 0.5, others = 1.0
-            df_core_workload = df_core.copy()
-            df_core_workload['WeightedCount'] = df_core_workload['PolicyType'].apply(
-            lambda x: 0.5 if x in ['Flood', 'Flood - CL', 'Flood - PL'] else 1.0
+        # Every scheme is computed in the same pass; the selection only decides which one is charted
+        scheme_names = list(get_weighting_schemes()['Scheme'].unique())
+        weighting_scheme = st.selectbox(
+            "⚖️ Weighting Scheme",
+            options=scheme_names,
+            index=scheme_names.index(DEFAULT_WEIGHTING_SCHEME)
         )
+        # Core lines are weighted from (AccountManager, PolicyType, Status) counts, which every cube has
+        core_workload = core_lines_workload(cube, core_types, scheme=weighting_scheme)
 
+        if core_workload is not None:
+            manager_totals = core_workload['manager_totals']
 
-            # Group by Account Manager and Policy Type
-            workload_summary = df_core_workload.groupby(['AccountManager', 'PolicyType']).agg({
-                'PolicyId': 'count',
-                'WeightedCount': 'first'
-            }).rename(columns={'PolicyId': 'Count'})
-
-            # Apply the weighting
-            workload_summary['WeightedCount'] = workload_summary['Count'] * workload_summary['WeightedCount']
-            workload_summary = workload_summary.reset_index()
-
-            # Calculate totals per account manager
-            manager_totals = workload_summary.groupby('AccountManager').agg({
-                'Count': 'sum',
-                'WeightedCount': 'sum'
-            }).reset_index()
-            manager_totals = manager_totals.sort_values('WeightedCount', ascending=False)
+            if weighting_scheme == DEFAULT_WEIGHTING_SCHEME:
+                chart_title = "Core Lines Weighted Workload by Account Manager (Flood - CL/Flood - PL = 0.5 weight)"
+            else:
+                chart_title = f"Core Lines Weighted Workload by Account Manager ({weighting_scheme} weighting)"
 
             # Visualization
             fig = px.bar(
                 manager_totals.head(15),
                 x="AccountManager",
                 y="WeightedCount",
-                title="Core Lines Weighted Workload by Account Manager (Flood - CL/Flood - PL = 0.5 weight)",
+                title=chart_title,
                 color="WeightedCount",
                 color_continuous_scale="Viridis"
             )
@@ -660,27 +588,21 @@ if not df.empty:
                 manager_display['Workload Reduction'] = manager_display['Count'] - manager_display['WeightedCount']
                 manager_display.columns = ['Account Manager', 'Total Policies', 'Weighted Total', 'Workload Reduction']
                 st.dataframe(manager_display, use_container_width=True)
+
+                # Compare the load models side by side
+                st.subheader("⚖️ Weighting Scheme Comparison")
+                st.dataframe(core_workload['scheme_totals'], use_container_width=True)
                 
                 # Show detailed breakdown by policy type
                 st.subheader("📋 Detailed Policy Type Breakdown")
-                policy_breakdown = workload_summary.pivot_table(
-                    index='AccountManager', 
-                    columns='PolicyType', 
-                    values='Count', 
-                    fill_value=0
-                ).reset_index()
-                
-                # Add total column
-                policy_breakdown['Total'] = policy_breakdown.iloc[:, 1:].sum(axis=1)
-                policy_breakdown = policy_breakdown.sort_values('Total', ascending=False)
-                
-                st.dataframe(policy_breakdown, use_container_width=True)
+                st.dataframe(core_workload['policy_breakdown'], use_container_width=True)
     
     st.info("📊 **Example:** If a manager has 200 Flood - CL + 200 Auto policies → Weighted Total = 350 (200×0.5 + 200×1.0)")
 
     # Show full raw data option
     with st.expander("🔍 View Raw Policy Data", expanded=False):
-        st.dataframe(df, use_container_width=True)
+        if _policy_rows or window_cache.get(window) is not None or st.checkbox("Load raw policy rows from Salesforce"):
+            st.dataframe(load_policy_rows(), use_container_width=True)
 
 else:
     st.warning("⚠️ No policy data available for the selected date range. Please adjust your filters or check your Salesforce connection.")
@@ -691,3 +613,6 @@ else:
     - Ensure the InsurancePolicy object is accessible in your Salesforce org
     - Verify the Account_Manager__c field exists on the Account object
     """)
+
+# Per-query timings for this rerun
+render_query_panel()
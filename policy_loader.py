@@ -0,0 +1,201 @@
+"""Headless loading of InsurancePolicy rows for one expiration window.
+
+Used by ``load_balance.py`` and by the background / command-line window
+prefetch, so nothing here touches Streamlit. Progress and problems are reported
+through a ``notify(level, message)`` callback (level is ``'info'``,
+``'success'``, ``'warning'`` or ``'error'``); on failure the loaders report an
+error and return an empty DataFrame.
+"""
+import pandas as pd
+
+from bulk_extract import bulk_extract_frame, query_or_bulk
+from dimension_cache import get_dimension_table
+from frame_compaction import day_offset
+from snapshot_store import expand_snapshot, get_policy_snapshot_store
+from workload import prepare_policy_frame
+
+POLICY_FIELDS = [
+    'Id', 'Name', 'PolicyType', 'EffectiveDate', 'ExpirationDate', 'Status',
+    'NameInsuredId', 'NameInsured.Name', 'NameInsured.Account_Manager__c', 'NameInsured.Account_Manager__r.Name',
+]
+POLICY_STATUS_FILTER = "Status IN ('Active', 'Renewing', 'Pending Cancellation', 'Non-Renewal', 'Reinstating', 'Reinstated')"
+
+
+class PolicyLoadError(RuntimeError):
+    """Raised by ``fetch_policy_window`` when a window's policies could not be loaded."""
+
+
+def _silent(level, message):
+    pass
+
+
+def build_expiration_filter(start_date=None, end_date=None):
+    """Return the SOQL ``AND ExpirationDate ...`` clause for a date window, or an empty string."""
+    if start_date and end_date:
+        start_date_str = start_date.strftime('%Y-%m-%dT00:00:00Z')
+        end_date_str = end_date.strftime('%Y-%m-%dT23:59:59Z')
+        return f"AND ExpirationDate >= {start_date_str} AND ExpirationDate <= {end_date_str}"
+    return ""
+
+
+def get_policies_from_snapshot(store, sf, start_date, end_date, notify=_silent):
+    """Sync the local policy snapshot and build the policy DataFrame for the expiration window."""
+    try:
+        snapshot = store.sync(sf)
+    except Exception as e:
+        notify('error', f"❌ Error syncing policy snapshot: {str(e)}")
+        return pd.DataFrame()
+
+    sync_info = store.last_sync_info
+    notify('info', f"💾 Policy snapshot: {len(snapshot):,} policies ({sync_info.get('mode')} sync, {sync_info.get('rows_fetched', 0):,} rows fetched)")
+
+    # Dates are stored as day offsets, so the window filter is an integer comparison
+    expiration = snapshot['ExpirationDate']
+    mask = expiration.notna()
+    if start_date and end_date:
+        mask &= expiration.between(day_offset(start_date), day_offset(end_date)).fillna(False)
+    policies = expand_snapshot(snapshot[mask].sort_values('ExpirationDate', ascending=False))
+
+    if policies.empty:
+        notify('warning', "⚠️ Empty insurance policy record set")
+        return pd.DataFrame()
+
+    notify('info', f"📊 Found {len(policies)} insurance policies")
+    return build_policy_frame(policies, sf, notify)
+
+
+def resolve_missing_account_managers(sf, policies, notify=_silent):
+    """Look up managers for policies whose NameInsured relationship came back without one.
+
+    Only the affected Account IDs are fetched, in batched ``IN (...)`` queries, and the
+    answers are kept in the persistent account manager dimension table for later reruns.
+    """
+    unresolved = policies.loc[policies['NameInsured.Account_Manager__r.Name'].isna(), 'NameInsuredId'].dropna().unique()
+    if len(unresolved) == 0:
+        return {}
+    try:
+        return get_dimension_table('account_manager').lookup(sf, unresolved)
+    except Exception as e:
+        notify('warning', f"⚠️ Error querying accounts: {str(e)}")
+        return {}
+
+
+def build_policy_frame(policies, sf, notify=_silent):
+    """Build the policy DataFrame from flat policy columns named by their SOQL field paths."""
+    # Account manager from the policy relationship, falling back to a lookup of the account itself
+    account_manager_map = resolve_missing_account_managers(sf, policies, notify)
+    account_manager = policies['NameInsured.Account_Manager__r.Name'].fillna(
+        policies['NameInsuredId'].map(account_manager_map)
+    ).fillna('Not Assigned')
+
+    return pd.DataFrame({
+        'PolicyId': policies['Id'],
+        'PolicyName': policies['Name'],
+        'PolicyType': policies['PolicyType'],
+        'Status': policies['Status'],
+        'EffectiveDate': policies['EffectiveDate'],
+        'ExpirationDate': policies['ExpirationDate'],
+        'AccountId': policies['NameInsuredId'],
+        'AccountName': policies['NameInsured.Name'].fillna('Unknown Account'),
+        'AccountManager': account_manager,
+    }).reset_index(drop=True)
+
+
+def bulk_query_policies(sf, date_filter):
+    """Extract InsurancePolicy rows through Bulk API 2.0, newest expirations first."""
+    policies = bulk_extract_frame(
+        sf, 'InsurancePolicy', POLICY_FIELDS,
+        f"ExpirationDate != null AND {POLICY_STATUS_FILTER} {date_filter}"
+    )
+    # Bulk API 2.0 jobs are unordered, so sort locally like the REST query's ORDER BY
+    return policies.sort_values('ExpirationDate', ascending=False)
+
+
+def query_policies(sf, date_filter, notify=_silent):
+    """Query InsurancePolicy records from Salesforce and build the policy DataFrame."""
+    # Query Insurance Policy records with Account relationship
+    policy_query = f"""
+        SELECT 
+            Id,
+            Name,
+            PolicyType,
+            EffectiveDate,
+            ExpirationDate,
+            Status,
+            NameInsuredId,
+            NameInsured.Name,
+            NameInsured.Account_Manager__c,
+            NameInsured.Account_Manager__r.Name
+        FROM InsurancePolicy
+        WHERE ExpirationDate != null
+        AND Status IN ('Active', 'Renewing', 'Pending Cancellation', 'Non-Renewal', 'Reinstating', 'Reinstated')
+        {date_filter}
+        ORDER BY ExpirationDate DESC
+       
+    """
+
+    try:
+        # Stream result pages straight into columns instead of building a dict per policy;
+        # large windows (e.g. "Current Year") switch to Bulk API 2.0 once the first page shows their size
+        policies, mode = query_or_bulk(
+            sf, policy_query, POLICY_FIELDS, lambda: bulk_query_policies(sf, date_filter)
+        )
+
+        if policies.empty:
+            notify('warning', "⚠️ Empty insurance policy record set")
+            return pd.DataFrame()
+
+        notify('info', f"📊 Found {len(policies)} insurance policies" + (" (Bulk API)" if mode == 'bulk' else ''))
+
+    except Exception as e:
+        notify('error', f"❌ Error querying insurance policies: {str(e)}")
+        return pd.DataFrame()
+
+    return build_policy_frame(policies, sf, notify)
+
+
+def load_policy_window(sf, start_date=None, end_date=None, notify=_silent):
+    """Load and prepare the policy rows expiring in the window, from the snapshot when one is configured."""
+    # Prepare date filter for ExpirationDate
+    date_filter = build_expiration_filter(start_date, end_date)
+
+    # Load Insurance Policy records from the local snapshot when available
+    store = get_policy_snapshot_store()
+    if store is not None:
+        df = get_policies_from_snapshot(store, sf, start_date, end_date, notify)
+    else:
+        df = query_policies(sf, date_filter, notify)
+
+    if df.empty:
+        notify('warning', "⚠️ No valid policy data could be processed")
+        return df
+
+    # Convert dates to datetime and add month columns for analysis
+    try:
+        prepare_policy_frame(df)
+        notify('success', f"✅ Successfully processed {len(df)} insurance policies")
+    except Exception as e:
+        notify('error', f"❌ Error converting dates: {str(e)}")
+        return pd.DataFrame()
+
+    return df
+
+
+def fetch_policy_window(sf, start_date=None, end_date=None, notify=_silent):
+    """Load the window like ``load_policy_window``, but raise PolicyLoadError when loading failed.
+
+    ``load_policy_window`` reports failures through ``notify`` and returns an empty
+    frame, just as it does for a window with no expiring policies. Callers that cache
+    the result need to tell the two apart: here an empty frame always means no policies.
+    """
+    errors = []
+
+    def tracking(level, message):
+        if level == 'error':
+            errors.append(message)
+        notify(level, message)
+
+    df = load_policy_window(sf, start_date, end_date, notify=tracking)
+    if errors:
+        raise PolicyLoadError(errors[-1])
+    return df
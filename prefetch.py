@@ -0,0 +1,70 @@
+"""Pre-warm the workload dashboard's predefined expiration windows.
+
+Loads each predefined window (Next 30/60/90 Days, Current/Next Quarter, Current
+Year) and writes it to the window cache directory (SF_WINDOW_CACHE_DIR, default
+``.sf_snapshot``), where ``load_balance.py`` picks it up instead of querying
+Salesforce. Run it from cron slightly more often than SF_WINDOW_CACHE_TTL, or
+with ``--loop`` as a long-running worker. (Setting SF_PREFETCH_INTERVAL instead
+runs the same refresh on a background thread inside the dashboard; it is off
+by default.)
+
+Usage:
+    python prefetch.py                              # every predefined window, once
+    python prefetch.py --periods "Next 30 Days,Current Year"
+    python prefetch.py --max-age 600                # skip windows refreshed in the last 10 minutes
+    python prefetch.py --loop --interval 600
+"""
+import argparse
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from window_cache import get_window_cache
+from window_prefetch import prefetch_windows
+from workload import PREDEFINED_WINDOWS
+
+
+def print_statuses(statuses):
+    for status in statuses:
+        window = f"{status.window[0]:%Y-%m-%d} .. {status.window[1]:%Y-%m-%d}"
+        if status.error:
+            outcome = f"FAILED: {status.error}"
+        elif status.skipped:
+            outcome = f"fresh ({status.age:.0f}s old), skipped"
+        else:
+            outcome = f"loaded in {status.seconds:.1f}s"
+        print(f"{status.period:<16} {window}  {status.rows:>9,} policies  {outcome}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--periods', default=','.join(PREDEFINED_WINDOWS),
+                        help='comma-separated predefined windows to load (default: all)')
+    parser.add_argument('--max-age', type=int, default=0,
+                        help='skip windows cached less than this many seconds ago (default: always reload)')
+    parser.add_argument('--loop', action='store_true', help='keep refreshing every --interval seconds')
+    parser.add_argument('--interval', type=int, default=600, help='seconds between refreshes with --loop')
+    args = parser.parse_args()
+
+    load_dotenv()
+    periods = [period.strip() for period in args.periods.split(',') if period.strip()]
+    unknown = [period for period in periods if period not in PREDEFINED_WINDOWS]
+    if unknown:
+        parser.error(f"unknown period(s): {', '.join(unknown)}; choose from {', '.join(PREDEFINED_WINDOWS)}")
+    if get_window_cache().directory is None:
+        print("warning: SF_WINDOW_CACHE_DIR is disabled (or pyarrow is missing); windows stay in this process only")
+
+    while True:
+        statuses = prefetch_windows(periods, max_age=args.max_age)
+        print_statuses(statuses)
+        if not args.loop:
+            break
+        time.sleep(args.interval)
+
+    if any(status.error for status in statuses):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,10 +5,20 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 import os
-from simple_salesforce import Salesforce
 import requests
 from typing import Dict, List, Tuple
 from dotenv import load_dotenv
+from simple_salesforce.exceptions import SalesforceMalformedRequest
+from sf_session import get_session_manager
+from snapshot_store import expand_snapshot, get_policy_snapshot_store
+from frame_compaction import day_offset
+from soql_cache import cached_query_all, cached_query_frame, get_soql_cache
+from concurrent_fetch import run_concurrently
+from record_builder import flatten_relationship_fields
+from dimension_cache import get_dimension_table
+from chunked_lookup import query_by_ids
+from group_ranking import group_ranking, rank_within_groups
+from query_metrics import query_scope, render_query_panel, start_query_run
 
 
 # Load environment variables
@@ -489,13 +499,9 @@ def format_end_date_as_datetime_for_salesforce(dt):
 
 # Salesforce connection functions
 def get_salesforce_connection():
-    """Get Salesforce connection, create if doesn't exist."""
+    """Get the shared Salesforce connection, logging in only if the process has no session yet."""
     try:
-        sf = Salesforce(
-            username=os.getenv("SF_USERNAME_PRO"),
-            password=os.getenv("SF_PASSWORD_PRO"),
-            security_token=os.getenv("SF_SECURITY_TOKEN_PRO"),
-        )
+        sf = get_session_manager().get_client()
         st.session_state.sf = sf
         st.success("✅ Connected to Salesforce successfully!")
         return sf
@@ -506,17 +512,9 @@ def get_salesforce_connection():
 
 
 def get_available_producers(sf):
-    """Get all available producers from Salesforce."""
+    """Get all available producers from the cached Producer dimension table."""
     try:
-        producer_query = """
-            SELECT Name
-            FROM Producer
-            ORDER BY Name
-        """
-        
-        producer_results = sf.query_all(producer_query)
-        producer_names = [record['Name'] for record in producer_results['records']]
-        return producer_names
+        return get_dimension_table('producer').names(sf)
         
     except Exception as e:
         st.error(f"Error fetching producers: {str(e)}")
@@ -528,33 +526,103 @@ def get_producer_ids_from_names(sf, producer_names):
     try:
         if not producer_names:
             return []
-       
-        # Create a safe query string for producer names
-        name_conditions = []
-        for name in producer_names:
-            # Escape single quotes in names
-            safe_name = name.replace("'", "\\'")
-            name_conditions.append(f"Name = '{safe_name}'")
-       
-        producer_query = f"""
-            SELECT Id, Name
-            FROM Producer
-            WHERE {' OR '.join(name_conditions)}
-        """
-       
-        producer_results = sf.query_all(producer_query)
-        producer_ids = [record['Id'] for record in producer_results['records']]
-       
-        return producer_ids
+
+        # Resolved in memory against the cached Producer dimension table
+        return get_dimension_table('producer').ids_for_names(sf, producer_names)
        
     except Exception as e:
         st.error(f"Error fetching producer IDs: {str(e)}")
         return []
 
 
+def build_producer_where_clause(sf, producer_filter):
+    """Build the ``AND (...)`` SOQL clause restricting policies to the selected producers."""
+    if not producer_filter:
+        return ""
+
+    producer_ids = get_producer_ids_from_names(sf, producer_filter)
+    if producer_ids:
+        # Check both ProducerId and Producer_2__c custom lookup fields using IDs
+        id_list = ', '.join(f"'{producer_id}'" for producer_id in producer_ids)
+        return f"AND (ProducerId IN ({id_list}) OR Producer_2__c IN ({id_list}))"
+
+    # If no producer IDs found, also try name-based filtering as fallback
+    name_list = ', '.join("'" + name.replace("'", "\\'") + "'" for name in producer_filter)
+    return f"AND (Producer.Name IN ({name_list}) OR Producer_2__r.Name IN ({name_list}))"
+
+
+def get_snapshot_policies(sf, start_date, end_date, producer_filter=None):
+    """Get new-business policies from the local policy snapshot, or None if the store is disabled."""
+    store = get_policy_snapshot_store()
+    if store is None:
+        return None
+
+    snapshot = store.sync(sf)
+    # Dates are stored as day offsets, so the window filter is an integer comparison
+    mask = (
+        snapshot['EffectiveDate'].between(day_offset(start_date), day_offset(end_date)).fillna(False)
+        & (snapshot['Status'] == 'Active')
+        & (snapshot['Business_Type_Reporting__c'] == 'New Business')
+    )
+    if producer_filter and len(producer_filter) > 0:
+        # Same match as the ProducerId / Producer_2__c lookup on the names' record IDs
+        mask &= snapshot['Producer.Name'].isin(producer_filter) | snapshot['Producer_2__r.Name'].isin(producer_filter)
+
+    policies = snapshot[mask].sort_values('EffectiveDate', ascending=False).reset_index(drop=True)
+    return expand_snapshot(policies)
+
+
+POLICY_QUERY_FIELDS = [
+    'Id', 'Name', 'PolicyName', 'ProducerId', 'Producer.Name', 'Producer_2__c', 'Producer_2__r.Name',
+    'PolicyType', 'WritingCarrierAccount.Name', 'Total_Policy_Premium__c', 'PremiumAmount',
+    'TaxesSurcharges', 'EffectiveDate', 'NameInsuredId', 'NameInsured.Name',
+]
+POLICY_NUMERIC_FIELDS = ['Total_Policy_Premium__c', 'PremiumAmount', 'TaxesSurcharges']
+
+
+# Relationship name columns: output -> (fallback field paths, default when all are empty)
+POLICY_RELATIONSHIP_NAMES = {
+    'ProducerIdentifier': (['Producer.Name', 'Producer_2__r.Name'], 'Unknown Producer'),
+    'WritingCarrierName': (['WritingCarrierAccount.Name'], ''),
+    'AccountName': (['NameInsured.Name'], ''),
+}
+
+
+def build_policy_df(policy_rows):
+    """Map flat policy columns (named by SOQL field path) to the policy DataFrame used by the tabs."""
+    if policy_rows.empty:
+        return pd.DataFrame()
+
+    # One vectorized pass over the relationship name columns
+    names = flatten_relationship_fields(policy_rows, POLICY_RELATIONSHIP_NAMES)
+
+    policy_df = pd.DataFrame({
+        'PolicyNumber': policy_rows['Name'],
+        'PolicyName': policy_rows['PolicyName'],
+        'ProducerIdentifier': names['ProducerIdentifier'],
+        'PolicyType': policy_rows['PolicyType'],
+        'WritingCarrierName': names['WritingCarrierName'],
+        'TotalPolicyPremium': pd.to_numeric(policy_rows['Total_Policy_Premium__c'], errors='coerce'),
+        'PremiumAmount': pd.to_numeric(policy_rows['PremiumAmount'], errors='coerce').fillna(0),
+        'TaxesSurcharges': pd.to_numeric(policy_rows['TaxesSurcharges'], errors='coerce').fillna(0),
+        'EffectiveDate': pd.to_datetime(policy_rows['EffectiveDate']),
+        'AccountName': names['AccountName'],
+        'NameInsuredId': policy_rows['NameInsuredId'],
+    })
+    policy_df['TotalPolicyPremium'] = policy_df['TotalPolicyPremium'].fillna(
+        policy_df['PremiumAmount'] + policy_df['TaxesSurcharges']
+    )
+    return policy_df
+
+
 def get_insurance_policy_data(sf, start_date, end_date, producer_filter=None):
     """Get Insurance Policy data with optional producer filtering."""
     try:
+        # Serve from the local policy snapshot when it is enabled
+        snapshot_df = get_snapshot_policies(sf, start_date, end_date, producer_filter)
+        if snapshot_df is not None:
+            return build_policy_df(snapshot_df)
+
         start_date_str = format_date_as_datetime_for_salesforce(start_date)
         end_date_str = format_end_date_as_datetime_for_salesforce(end_date)
        
@@ -567,25 +635,7 @@ def get_insurance_policy_data(sf, start_date, end_date, producer_filter=None):
         ]
        
         # Producer filter - handle both Producer and Producer_2__c fields
-        producer_where_clause = ""
-        if producer_filter and len(producer_filter) > 0:
-            # First, get Producer IDs from Producer names
-            producer_ids = get_producer_ids_from_names(sf, producer_filter)
-           
-            if producer_ids:
-                producer_conditions = []
-                for producer_id in producer_ids:
-                    # Check both ProducerId and Producer_2__c custom lookup fields using IDs
-                    producer_conditions.append(f"(ProducerId = '{producer_id}' OR Producer_2__c = '{producer_id}')")
-                producer_where_clause = f"AND ({' OR '.join(producer_conditions)})"
-            else:
-                # If no producer IDs found, also try name-based filtering as fallback
-                name_conditions = []
-                for name in producer_filter:
-                    safe_name = name.replace("'", "\\'")
-                    name_conditions.append(f"(Producer.Name = '{safe_name}' OR Producer_2__r.Name = '{safe_name}')")
-                if name_conditions:
-                    producer_where_clause = f"AND ({' OR '.join(name_conditions)})"
+        producer_where_clause = build_producer_where_clause(sf, producer_filter)
         
         # Get Insurance Policy data
         policy_query = f"""
@@ -611,143 +661,27 @@ def get_insurance_policy_data(sf, start_date, end_date, producer_filter=None):
             ORDER BY EffectiveDate DESC
         """
        
-        policy_results = sf.query_all(policy_query)
-        policy_df = pd.DataFrame(policy_results['records'])
-       
-        if policy_df.empty:
-            return pd.DataFrame()
-       
-        # Clean up the policy data
-        policy_df = policy_df.drop('attributes', axis=1, errors='ignore')
-       
-        # Handle nested fields safely - improved version
-        def safe_get_nested_field(row, field_path):
-            try:
-                if '.' in field_path:
-                    parts = field_path.split('.')
-                    current = row
-                    for part in parts:
-                        if isinstance(current, dict) and part in current:
-                            current = current[part]
-                        else:
-                            return ''
-                    return current if current is not None else ''
-                else:
-                    return row.get(field_path, '') if row.get(field_path) is not None else ''
-            except:
-                return ''
-       
-        # Create column mappings
-        policy_df['PolicyNumber'] = policy_df['Name']
-        policy_df['PolicyName'] = policy_df['PolicyName']
-       
-        # Producer Identifier - improved logic to handle different data structures
-        def get_producer_name(row):
-            # Try Producer.Name first
-            producer_name = safe_get_nested_field(row, 'Producer.Name')
-            if producer_name:
-                return producer_name
-                
-            # Try Producer_2__r.Name
-            producer2_name = safe_get_nested_field(row, 'Producer_2__r.Name')
-            if producer2_name:
-                return producer2_name
-                
-            # Try direct access to nested structures
-            if isinstance(row.get('Producer'), dict) and row.get('Producer', {}).get('Name'):
-                return row['Producer']['Name']
-                
-            if isinstance(row.get('Producer_2__r'), dict) and row.get('Producer_2__r', {}).get('Name'):
-                return row['Producer_2__r']['Name']
-                
-            return 'Unknown Producer'
-        
-        policy_df['ProducerIdentifier'] = policy_df.apply(get_producer_name, axis=1)
-       
-        policy_df['PolicyType'] = policy_df['PolicyType']
-       
-        # Writing Carrier Account Name
-        policy_df['WritingCarrierName'] = policy_df.apply(lambda row:
-            safe_get_nested_field(row, 'WritingCarrierAccount.Name'), axis=1)
-       
-        policy_df['TotalPolicyPremium'] = policy_df['Total_Policy_Premium__c']
-       
-        # Account Name
-        policy_df['AccountName'] = policy_df.apply(lambda row:
-            safe_get_nested_field(row, 'NameInsured.Name'), axis=1)
-       
-        # Convert dates
-        policy_df['EffectiveDate'] = pd.to_datetime(policy_df['EffectiveDate'])
-       
-        # Convert premiums to numeric
-        policy_df['PremiumAmount'] = pd.to_numeric(policy_df['PremiumAmount'], errors='coerce').fillna(0)
-        policy_df['TaxesSurcharges'] = pd.to_numeric(policy_df['TaxesSurcharges'], errors='coerce').fillna(0)
-        policy_df['TotalPolicyPremium'] = pd.to_numeric(policy_df['TotalPolicyPremium'], errors='coerce')
-       
-        # If TotalPolicyPremium is null, calculate it
-        policy_df['TotalPolicyPremium'] = policy_df['TotalPolicyPremium'].fillna(
-            policy_df['PremiumAmount'] + policy_df['TaxesSurcharges']
-        )
-       
-        # Select final columns to return
-        final_columns = [
-            'PolicyNumber', 'PolicyName', 'ProducerIdentifier', 'PolicyType',
-            'WritingCarrierName', 'TotalPolicyPremium', 'PremiumAmount',
-            'TaxesSurcharges', 'EffectiveDate', 'AccountName', 'NameInsuredId'
-        ]
-       
-        return policy_df[final_columns]
+        # Stream result pages into flat columns, relationship fields flattened on the fly
+        policy_rows = cached_query_frame(sf, policy_query, POLICY_QUERY_FIELDS, numeric_fields=POLICY_NUMERIC_FIELDS)
+        return build_policy_df(policy_rows)
        
     except Exception as e:
         st.error(f"Error fetching insurance policy data: {str(e)}")
         return pd.DataFrame()
 
 
-def get_external_referrer_data(sf, start_date, end_date, producer_filter=None):
-    """Get external referrer data with optional producer filtering."""
+def get_external_referrer_data(sf, start_date, end_date, producer_filter=None, account_ids=None):
+    """Get external referrer data with optional producer filtering.
+
+    Pass ``account_ids`` to reuse the NameInsured IDs of policies already loaded for this render.
+    Without them, accounts are matched to policies with a semi-join so no IDs travel at all.
+    """
     try:
-        start_date_str = format_date_as_datetime_for_salesforce(start_date)
-        end_date_str = format_end_date_as_datetime_for_salesforce(end_date)
-       
-        # Base filters
-        base_filters = [
-            f"EffectiveDate >= {start_date_str}",
-            f"EffectiveDate <= {end_date_str}",
-            "Status = 'Active'",
-            "Business_Type_Reporting__c = 'New Business'",
-            "NameInsuredId != null"
-        ]
-        
-        # Producer filter
-        producer_where_clause = ""
-        if producer_filter and len(producer_filter) > 0:
-            producer_ids = get_producer_ids_from_names(sf, producer_filter)
-            if producer_ids:
-                producer_conditions = []
-                for producer_id in producer_ids:
-                    producer_conditions.append(f"(ProducerId = '{producer_id}' OR Producer_2__c = '{producer_id}')")
-                producer_where_clause = f"AND ({' OR '.join(producer_conditions)})"
-       
-        # Get policies with optional producer filtering
-        policy_query = f"""
-            SELECT
-                Id,
-                NameInsuredId
-            FROM InsurancePolicy
-            WHERE {' AND '.join(base_filters)}
-            {producer_where_clause}
-        """
-       
-        policy_results = sf.query_all(policy_query)
-        if not policy_results['records']:
-            return pd.DataFrame()
-       
-        policy_df = pd.DataFrame(policy_results['records'])
-        account_ids = policy_df['NameInsuredId'].dropna().unique().tolist()
-       
-        if not account_ids:
-            return pd.DataFrame()
-       
+        if account_ids is None:
+            snapshot_df = get_snapshot_policies(sf, start_date, end_date, producer_filter)
+            if snapshot_df is not None:
+                account_ids = snapshot_df['NameInsuredId'].dropna().unique().tolist()
+
         # Get Account data with external referrers
         account_sources = [
             'Boat Dealer', 'Employee Referral', 'Existing Client',
@@ -756,45 +690,73 @@ def get_external_referrer_data(sf, start_date, end_date, producer_filter=None):
             'Organically Prospected', 'Other', 'Other Insurance Agent', 'Realtor'
         ]
         account_source_list = ','.join([f"'{source}'" for source in account_sources])
+        referrer_filter = f"FinServ__ReferredByContact__c != null AND AccountSource IN ({account_source_list})"
+        referrer_fields = ['Id', 'FinServ__ReferredByContact__r.Name']
+
+        account_rows = None
+        if account_ids is None:
+            start_date_str = format_date_as_datetime_for_salesforce(start_date)
+            end_date_str = format_end_date_as_datetime_for_salesforce(end_date)
        
-        # Split account IDs into chunks
-        account_chunks = [account_ids[i:i+200] for i in range(0, len(account_ids), 200)]
-        account_data = []
-       
-        for chunk in account_chunks:
-            account_ids_str = ','.join([f"'{acc_id}'" for acc_id in chunk])
-           
-            account_query = f"""
-                SELECT
-                    Id,
-                    FinServ__ReferredByContact__r.Name
-                FROM Account
-                WHERE Id IN ({account_ids_str})
-                AND FinServ__ReferredByContact__c != null
-                AND AccountSource IN ({account_source_list})
-            """
-           
-            account_results = sf.query_all(account_query)
-            if account_results['records']:
-                account_data.extend(account_results['records'])
-       
-        if not account_data:
+            # Base filters
+            base_filters = [
+                f"EffectiveDate >= {start_date_str}",
+                f"EffectiveDate <= {end_date_str}",
+                "Status = 'Active'",
+                "Business_Type_Reporting__c = 'New Business'",
+                "NameInsuredId != null"
+            ]
+        
+            # Producer filter
+            producer_where_clause = build_producer_where_clause(sf, producer_filter)
+            policy_where = f"{' AND '.join(base_filters)} {producer_where_clause}"
+
+            try:
+                # Semi-join: Salesforce resolves the policy accounts server side
+                account_query = f"""
+                    SELECT
+                        Id,
+                        FinServ__ReferredByContact__r.Name
+                    FROM Account
+                    WHERE Id IN (SELECT NameInsuredId FROM InsurancePolicy WHERE {policy_where})
+                    AND {referrer_filter}
+                """
+                account_rows = cached_query_frame(sf, account_query, referrer_fields)
+            except SalesforceMalformedRequest:
+                # Filters the semi-join rejects fall back to fetching the policies' account IDs
+                policy_query = f"""
+                    SELECT
+                        Id,
+                        NameInsuredId
+                    FROM InsurancePolicy
+                    WHERE {policy_where}
+                """
+                policy_rows = cached_query_frame(sf, policy_query, ['Id', 'NameInsuredId'])
+                account_ids = policy_rows['NameInsuredId'].dropna().unique().tolist()
+
+        if account_rows is None:
+            if not account_ids:
+                return pd.DataFrame()
+
+            # Packed ID batches, run concurrently
+            account_rows = query_by_ids(
+                sf,
+                f"SELECT Id, FinServ__ReferredByContact__r.Name FROM Account WHERE Id IN ({{ids}}) AND {referrer_filter}",
+                account_ids,
+                referrer_fields,
+                cached=True,
+            )
+
+        referrer_names = account_rows['FinServ__ReferredByContact__r.Name']
+        account_rows = account_rows[referrer_names.notna() & (referrer_names != '')]
+        if account_rows.empty:
             return pd.DataFrame()
        
         # Create referrer DataFrame
-        referrer_data = []
-        for record in account_data:
-            if record.get('FinServ__ReferredByContact__r') and record['FinServ__ReferredByContact__r'].get('Name'):
-                referrer_name = record['FinServ__ReferredByContact__r']['Name']
-                referrer_data.append({
-                    'AccountId': record['Id'],
-                    'ReferredByContactName': referrer_name
-                })
-       
-        if not referrer_data:
-            return pd.DataFrame()
-       
-        referrer_df = pd.DataFrame(referrer_data)
+        referrer_df = pd.DataFrame({
+            'AccountId': account_rows['Id'],
+            'ReferredByContactName': account_rows['FinServ__ReferredByContact__r.Name'],
+        }).reset_index(drop=True)
         return referrer_df
        
     except Exception as e:
@@ -815,7 +777,7 @@ def get_new_quote_requests(sf, start_date, end_date):
             AND New_Business_or_Renewal__c IN ('Personal Lines - New Business', 'Commercial Lines - New Business')
         """
 
-        results = sf.query_all(soql_query)
+        results = cached_query_all(sf, soql_query)
         return pd.DataFrame(results['records'])
     except Exception as e:
         st.error(f"Error fetching new quote requests: {str(e)}")
@@ -838,7 +800,7 @@ def get_prior_month_opportunity_status_enhanced(sf):
             GROUP BY StageName
         """
 
-        results = sf.query_all(query)
+        results = cached_query_all(sf, query)
         stage_metadata = get_stage_metadata()
 
         data = []
@@ -939,15 +901,8 @@ def get_top_external_referrers(referrer_df):
 def get_carrier_performance_enhanced(sf, start_date, end_date):
     """Get carrier performance with enhanced metrics and color coding."""
     try:
-        # Query Carriers
-        carrier_query = """
-            SELECT Id, Name
-            FROM Account
-            WHERE Id IN (SELECT Renewing_Carrier__c FROM Opportunity WHERE Renewing_Carrier__c != null)
-        """
-
-        carrier_results = sf.query_all(carrier_query)
-        carriers = {record['Id']: record['Name'] for record in carrier_results['records']}
+        # Carrier names come from the persistent carrier dimension table
+        carriers = get_dimension_table('carrier')
 
         # Query opportunities with carrier data
         date_filter = ""
@@ -967,13 +922,13 @@ def get_carrier_performance_enhanced(sf, start_date, end_date):
             GROUP BY Renewing_Carrier__c, StageName
         """
 
-        results = sf.query_all(query)
+        results = cached_query_all(sf, query)
 
-        # Process results
+        # Process results, joining carrier names by dictionary code
+        carrier_codes = carriers.encode(sf, [record['Renewing_Carrier__c'] for record in results['records']])
+        carrier_names = carriers.decode(carrier_codes, 'Unknown Carrier')
         carrier_data = {}
-        for record in results['records']:
-            carrier_id = record['Renewing_Carrier__c']
-            carrier_name = carriers.get(carrier_id, 'Unknown Carrier')
+        for record, carrier_name in zip(results['records'], carrier_names):
             stage = record['StageName']
             count = record['oppCount']
 
@@ -1020,11 +975,18 @@ def get_carrier_performance_enhanced(sf, start_date, end_date):
         return pd.DataFrame()
 
 
-def get_producer_performance_data(sf, producer_name, start_date, end_date):
-    """Get comprehensive performance data for a specific producer."""
+def get_producer_performance_data(sf, producer_name, start_date, end_date, policy_df=None,
+                                  type_ranks=None, premium_ranks=None):
+    """Get comprehensive performance data for a specific producer.
+
+    ``policy_df`` may be a slice of the render's shared policy data; it is only queried when omitted.
+    ``type_ranks`` and ``premium_ranks`` are the render's policy type rankings of every producer
+    (see ``build_render_data_plan``); they are ranked from this producer's rows when omitted.
+    """
     try:
         # Get policy data for this specific producer
-        policy_df = get_insurance_policy_data(sf, start_date, end_date, [producer_name])
+        if policy_df is None:
+            policy_df = get_insurance_policy_data(sf, start_date, end_date, [producer_name])
         
         if policy_df.empty:
             return None
@@ -1041,10 +1003,16 @@ def get_producer_performance_data(sf, producer_name, start_date, end_date):
         avg_premium = producer_policy_df['TotalPolicyPremium'].mean()
         
         # Policy type analysis
-        policy_types = producer_policy_df['PolicyType'].value_counts()
+        if type_ranks is None:
+            type_ranks = rank_within_groups(producer_policy_df, 'ProducerIdentifier', 'PolicyType')
+        policy_types = group_ranking(type_ranks, 'ProducerIdentifier', producer_name, 'PolicyType')
         
         # Premium by policy type (for specialty analysis)
-        premium_by_type = producer_policy_df.groupby('PolicyType')['TotalPolicyPremium'].sum().sort_values(ascending=False)
+        if premium_ranks is None:
+            premium_ranks = rank_within_groups(
+                producer_policy_df, 'ProducerIdentifier', 'PolicyType', value='TotalPolicyPremium'
+            )
+        premium_by_type = group_ranking(premium_ranks, 'ProducerIdentifier', producer_name, 'PolicyType')
         
         # Recent policies (last 10)
         recent_policies = producer_policy_df.nlargest(10, 'EffectiveDate')[
@@ -1058,16 +1026,19 @@ def get_producer_performance_data(sf, producer_name, start_date, end_date):
         
         # Business performance trends (top policy types)
         top_policy_types = policy_types.head(5).index.tolist()
-        trend_data = []
-        
-        for policy_type in top_policy_types:
-            type_data = producer_policy_df[producer_policy_df['PolicyType'] == policy_type]
-            if not type_data.empty:
-                type_weekly = type_data.groupby('week_start')['TotalPolicyPremium'].sum().reset_index()
-                type_weekly['PolicyType'] = policy_type
-                trend_data.append(type_weekly)
-        
-        trend_df = pd.concat(trend_data, ignore_index=True) if trend_data else pd.DataFrame()
+        top_type_df = producer_policy_df[producer_policy_df['PolicyType'].isin(top_policy_types)]
+        trend_df = pd.DataFrame()
+        if not top_type_df.empty:
+            # One groupby for every top type, ordered by rank like the per-type loop it replaces
+            trend_df = (
+                top_type_df.groupby(['PolicyType', 'week_start'], observed=True)['TotalPolicyPremium'].sum()
+                .reset_index()
+            )
+            trend_df['TypeRank'] = trend_df['PolicyType'].map({t: i for i, t in enumerate(top_policy_types)})
+            trend_df = (
+                trend_df.sort_values(['TypeRank', 'week_start'], ignore_index=True)
+                [['week_start', 'TotalPolicyPremium', 'PolicyType']]
+            )
         
         # Least active business types (bottom 5 with at least 1 policy)
         least_active_types = policy_types.tail(5)
@@ -1090,6 +1061,47 @@ def get_producer_performance_data(sf, producer_name, start_date, end_date):
         return None
 
 
+def build_render_data_plan(sf, filters):
+    """Fetch the policy rows needed by every tab once for this render.
+
+    The overview, performance and producer performance tabs all use the rows for the
+    selected producers, and each individual producer tab uses a subset of them, so a
+    single query covers every tab. Per-producer slices come from one groupby, and every
+    producer's policy type rankings from one grouped rank.
+    """
+    policy_df = get_insurance_policy_data(
+        sf, filters['start_date'], filters['end_date'], filters['selected_producers']
+    )
+
+    producer_slices = {}
+    account_ids = []
+    # Every producer's policy types ranked by count and by premium in one pass each
+    type_ranks = rank_within_groups(policy_df, 'ProducerIdentifier', 'PolicyType')
+    premium_ranks = rank_within_groups(policy_df, 'ProducerIdentifier', 'PolicyType', value='TotalPolicyPremium')
+    if not policy_df.empty:
+        producer_slices = dict(tuple(policy_df.groupby('ProducerIdentifier', sort=False)))
+        account_ids = policy_df['NameInsuredId'].dropna().unique().tolist()
+        # Without a local snapshot the referrer lookup semi-joins on the same filters instead
+        if get_policy_snapshot_store() is None:
+            account_ids = None
+
+    return {
+        'policy_df': policy_df,
+        'producer_slices': producer_slices,
+        'type_ranks': type_ranks,
+        'premium_ranks': premium_ranks,
+        'account_ids': account_ids,
+    }
+
+
+def get_producer_slice(data_plan, producer_name):
+    """Return one producer's rows from the render data plan (empty if they have none)."""
+    producer_df = data_plan['producer_slices'].get(producer_name)
+    if producer_df is None:
+        return data_plan['policy_df'].iloc[0:0]
+    return producer_df
+
+
 def create_producer_overview_card(producer_name, producer_data):
     """Create modern gradient overview card for producer."""
     if not producer_data:
@@ -1293,12 +1305,16 @@ def create_least_active_chart(least_active_types):
     return fig
 
 
-def create_individual_producer_tab(sf, producer_name, filters):
+def create_individual_producer_tab(sf, producer_name, filters, data_plan):
     """Create comprehensive individual producer tab."""
     st.markdown(f'<div class="section-header">📊 {producer_name} Performance Dashboard</div>', unsafe_allow_html=True)
     
-    # Get producer performance data
-    producer_data = get_producer_performance_data(sf, producer_name, filters['start_date'], filters['end_date'])
+    # Get producer performance data from this producer's slice of the render data plan
+    producer_data = get_producer_performance_data(
+        sf, producer_name, filters['start_date'], filters['end_date'],
+        policy_df=get_producer_slice(data_plan, producer_name),
+        type_ranks=data_plan['type_ranks'], premium_ranks=data_plan['premium_ranks'],
+    )
     
     if not producer_data:
         st.warning(f"No data available for {producer_name} in the selected date range.")
@@ -1406,6 +1422,11 @@ def create_enhanced_sidebar(sf):
                 st.sidebar.write(f"  • {prod}")
             if len(selected_producers) > 5:
                 st.sidebar.write(f"  • ... and {len(selected_producers) - 5} more")
+        session_stats = get_session_manager().stats()
+        st.sidebar.write(f"Salesforce logins: {session_stats['logins']} (reused {session_stats['logins_saved']}x)")
+        st.sidebar.write(f"Salesforce API calls: {session_stats['api_calls']}")
+        cache_stats = get_soql_cache().stats()
+        st.sidebar.write(f"SOQL cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, {cache_stats['bytes'] / 1e6:.1f} MB")
         st.sidebar.markdown('</div>', unsafe_allow_html=True)
    
     # Business type filter
@@ -1489,22 +1510,41 @@ def display_modern_text_metrics(df):
         """, unsafe_allow_html=True)
 
 
-def create_overview_tab(sf, filters):
+def create_overview_tab(sf, filters, data_plan):
     """Create enhanced overview tab with modern styling."""
     st.markdown('<div class="section-header">Business Overview</div>', unsafe_allow_html=True)
 
-    # Get insurance policy data with optional producer filtering
+    # Insurance policy data with optional producer filtering, shared by all tabs
     selected_producers = filters['selected_producers']
-    policy_df = get_insurance_policy_data(sf, filters['start_date'], filters['end_date'], selected_producers)
+    policy_df = data_plan['policy_df']
     
-    # Get external referrer data with same filtering
-    referrer_df = get_external_referrer_data(sf, filters['start_date'], filters['end_date'], selected_producers)
+    # Fetch the independent overview queries concurrently
+    overview_queries = {
+        'external referrer data': lambda: get_external_referrer_data(
+            sf, filters['start_date'], filters['end_date'], selected_producers,
+            account_ids=data_plan['account_ids']
+        ),
+        'new quote requests': lambda: get_new_quote_requests(sf, filters['start_date'], filters['end_date']),
+        'carrier performance': lambda: get_carrier_performance_enhanced(sf, filters['start_date'], filters['end_date']),
+    }
+    if not policy_df.empty:
+        overview_queries['prior month opportunity status'] = lambda: get_prior_month_opportunity_status_enhanced(sf)
+
+    overview_results, overview_errors = run_concurrently(overview_queries)
+    for query_name, error in overview_errors.items():
+        st.error(f"Error fetching {query_name}: {str(error)}")
+
+    def overview_frame(query_name):
+        result = overview_results.get(query_name)
+        return result if result is not None else pd.DataFrame()
+
+    referrer_df = overview_frame('external referrer data')
 
     # Key metrics row with modern cards
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        new_quotes_df = get_new_quote_requests(sf, filters['start_date'], filters['end_date'])
+        new_quotes_df = overview_frame('new quote requests')
         total_quotes = len(new_quotes_df)
         st.markdown(f"""
         <div class="metric-card">
@@ -1530,7 +1570,7 @@ def create_overview_tab(sf, filters):
         """, unsafe_allow_html=True)
 
     with col3:
-        carrier_df = get_carrier_performance_enhanced(sf, filters['start_date'], filters['end_date'])
+        carrier_df = overview_frame('carrier performance')
         if not carrier_df.empty:
             top_carrier = carrier_df.iloc[0]['Carrier']
             top_close_rate = carrier_df.iloc[0]['Close_Rate']
@@ -1555,7 +1595,7 @@ def create_overview_tab(sf, filters):
 
         with col1:
             st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-            prior_month_df = get_prior_month_opportunity_status_enhanced(sf)
+            prior_month_df = overview_frame('prior month opportunity status')
             if not prior_month_df.empty:
                 fig = create_modern_doughnut_chart(prior_month_df)
                 if fig:
@@ -1599,22 +1639,22 @@ def create_overview_tab(sf, filters):
             st.info("No policy data available for the selected period. Please select producers from the sidebar.")
 
 
-def create_performance_tab(sf, filters):
+def create_performance_tab(sf, filters, data_plan):
     """Create enhanced performance tab with modern styling."""
     st.markdown('<div class="section-header">Performance Metrics</div>', unsafe_allow_html=True)
 
-    # Get insurance policy data with optional producer filtering
+    # Insurance policy data with optional producer filtering, shared by all tabs
     selected_producers = filters['selected_producers']
-    policy_df = get_insurance_policy_data(sf, filters['start_date'], filters['end_date'], selected_producers)
+    policy_df = data_plan['policy_df']
 
     if not policy_df.empty:
         col1, col2 = st.columns(2)
 
         with col1:
             st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-            # Weekly premium trend
-            policy_df['week_start'] = policy_df['EffectiveDate'].dt.to_period('W').dt.start_time
-            weekly_premium = policy_df.groupby('week_start')['TotalPolicyPremium'].sum().reset_index()
+            # Weekly premium trend (week buckets computed aside so the shared frame is not modified)
+            week_start = policy_df['EffectiveDate'].dt.to_period('W').dt.start_time.rename('week_start')
+            weekly_premium = policy_df.groupby(week_start)['TotalPolicyPremium'].sum().reset_index()
             weekly_premium['week_label'] = weekly_premium['week_start'].dt.strftime('Week of %b %d')
 
             fig = px.line(weekly_premium,
@@ -1746,13 +1786,13 @@ def create_performance_tab(sf, filters):
             st.info("No policy data available for the selected period. Please select producers from the sidebar.")
 
 
-def create_producer_performance_tab(sf, filters):
+def create_producer_performance_tab(sf, filters, data_plan):
     """Create producer performance tab with optional producer filtering."""
     st.markdown('<div class="section-header">Producer Performance</div>', unsafe_allow_html=True)
 
-    # Get insurance policy data with optional producer filtering
+    # Insurance policy data with optional producer filtering, shared by all tabs
     selected_producers = filters['selected_producers']
-    policy_df = get_insurance_policy_data(sf, filters['start_date'], filters['end_date'], selected_producers)
+    policy_df = data_plan['policy_df']
 
     if not policy_df.empty:
         # Producer Performance Summary
@@ -1849,6 +1889,9 @@ def create_producer_performance_tab(sf, filters):
 def main():
     st.markdown('<h1 class="main-header">Insurance Analytics Dashboard</h1>', unsafe_allow_html=True)
 
+    # Tag this rerun's SOQL statements with the section that ran them
+    start_query_run('prodsc', view='Sidebar')
+
     # Auto-connect to Salesforce first
     sf = get_salesforce_connection()
 
@@ -1858,6 +1901,12 @@ def main():
     # Enhanced sidebar with modern styling (pass sf for producer list)
     filters = create_enhanced_sidebar(sf)
 
+    # Refresh Data drops cached SOQL results so every query goes back to Salesforce
+    if filters['refresh_data']:
+        get_soql_cache().clear()
+        for dimension in ('producer', 'carrier'):
+            get_dimension_table(dimension).invalidate()
+
     # Create dynamic tabs based on selected producers
     tab_names = ["📊 Overview", "🎯 Performance", "👥 Producer Performance"]
     
@@ -1870,23 +1919,30 @@ def main():
     # Create tabs dynamically
     tabs = st.tabs(tab_names)
 
+    # Fetch the policy data for every tab once, then hand out slices
+    with query_scope('Data plan'):
+        data_plan = build_render_data_plan(sf, filters)
+
     # Overview Tab
-    with tabs[0]:
-        create_overview_tab(sf, filters)
+    with tabs[0], query_scope('Overview'):
+        create_overview_tab(sf, filters, data_plan)
 
     # Performance Tab
-    with tabs[1]:
-        create_performance_tab(sf, filters)
+    with tabs[1], query_scope('Performance'):
+        create_performance_tab(sf, filters, data_plan)
 
     # Producer Performance Tab
-    with tabs[2]:
-        create_producer_performance_tab(sf, filters)
+    with tabs[2], query_scope('Producer Performance'):
+        create_producer_performance_tab(sf, filters, data_plan)
 
     # Individual Producer Tabs
     if selected_producers:
         for i, producer in enumerate(selected_producers, start=3):
-            with tabs[i]:
-                create_individual_producer_tab(sf, producer, filters)
+            with tabs[i], query_scope(producer):
+                create_individual_producer_tab(sf, producer, filters, data_plan)
+
+    # Per-query timings for this rerun
+    render_query_panel()
 
 
 if __name__ == "__main__":
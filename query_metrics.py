@@ -0,0 +1,325 @@
+"""Per-statement SOQL instrumentation shared by both dashboards.
+
+Every SOQL statement the Salesforce clients run -- REST ``query`` plus its
+``queryMore`` pages, Bulk API 2.0 jobs, and SOQL cache hits -- becomes a
+``QueryRecord`` with its wall time, pages, rows, approximate payload bytes and
+the dashboard view that triggered it. Records are kept in a bounded,
+process-wide ``QueryLog`` and can be exported as JSON lines. The log also keeps
+monotonic per-label totals since process start, which are exported as
+Prometheus counters -- sums over the retained records would drop as old
+records fall out of the log.
+
+The app and view are tracked with context variables: a dashboard calls
+``start_query_run`` at the top of each rerun and wraps sections in
+``query_scope``; ``concurrent_fetch`` carries the context into worker threads.
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+import pandas as pd
+
+_FROM_RE = re.compile(r"\bFROM\s+(\w+)", re.IGNORECASE)
+_SIZE_SAMPLE = 50
+# queryMore cursors tracked at once; abandoned iterations are forgotten oldest first
+_MAX_OPEN_CURSORS = 256
+
+_app = ContextVar('soql_app', default='')
+_view = ContextVar('soql_view', default='')
+_run_id = ContextVar('soql_run_id', default='')
+
+
+@dataclass
+class QueryRecord:
+    """One SOQL statement as executed (or served from cache)."""
+
+    soql: str
+    source: str
+    app: str = ''
+    view: str = ''
+    run_id: str = ''
+    object: str = ''
+    started_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat(timespec='milliseconds'))
+    seconds: float = 0.0
+    pages: int = 0
+    rows: int = 0
+    bytes: int = 0
+    status: str = 'ok'
+    error: str = ''
+
+
+def normalize_statement(soql):
+    """Collapse whitespace so the statement reads on one line."""
+    return ' '.join(soql.split())
+
+
+def estimate_payload_bytes(records):
+    """Approximate the JSON payload size of a page of records from a sample."""
+    if not records:
+        return 0
+    sample = records[:_SIZE_SAMPLE]
+    return int(len(json.dumps(sample, default=str)) / len(sample) * len(records))
+
+
+def _label_key(record):
+    return (record.app, record.view, record.object, record.source)
+
+
+class QueryLog:
+    """Bounded, thread-safe log of recent QueryRecords, plus process-wide totals."""
+
+    def __init__(self, max_records=1000):
+        self.max_records = max_records
+        self._records = deque(maxlen=max_records)
+        self._open = OrderedDict()
+        self._totals = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _add_totals(self, record, statements=0, seconds=0.0, pages=0, rows=0, nbytes=0, errors=0):
+        """Add to the totals of the record's labels; call with the lock held."""
+        entry = self._totals.setdefault(_label_key(record), {name: 0 for name, _ in _PROMETHEUS_METRICS})
+        entry['soql_statements_total'] += statements
+        entry['soql_statement_seconds_total'] += seconds
+        entry['soql_pages_total'] += pages
+        entry['soql_rows_total'] += rows
+        entry['soql_bytes_total'] += nbytes
+        entry['soql_errors_total'] += errors
+
+    def new_record(self, soql, source):
+        """Start a record for ``soql`` tagged with the current app, view and run."""
+        statement = normalize_statement(soql)
+        match = _FROM_RE.search(statement)
+        record = QueryRecord(
+            soql=statement,
+            source=source,
+            app=_app.get(),
+            view=_view.get(),
+            run_id=_run_id.get(),
+            object=match.group(1) if match else '',
+        )
+        with self._lock:
+            self._records.append(record)
+            self._add_totals(record, statements=1)
+        return record
+
+    def record_page(self, result, seconds, soql=None, next_records_url=None, error=None):
+        """Add one REST page to its statement: a new one for ``soql``, else the one ``next_records_url`` continues."""
+        if soql is not None:
+            record = self.new_record(soql, 'rest')
+        else:
+            with self._lock:
+                record = self._open.pop(next_records_url, None)
+            if record is None:
+                record = self.new_record(f"queryMore {next_records_url}", 'rest')
+
+        record.seconds += seconds
+        record.pages += 1
+        if error is not None:
+            record.status = 'error'
+            record.error = str(error)[:300]
+            with self._lock:
+                self._add_totals(record, seconds=seconds, pages=1, errors=1)
+            return
+        page = result.get('records') or []
+        nbytes = estimate_payload_bytes(page)
+        record.rows += len(page)
+        record.bytes += nbytes
+        with self._lock:
+            self._add_totals(record, seconds=seconds, pages=1, rows=len(page), nbytes=nbytes)
+            if not result.get('done', True) and result.get('nextRecordsUrl'):
+                self._open[result['nextRecordsUrl']] = record
+                while len(self._open) > _MAX_OPEN_CURSORS:
+                    self._open.popitem(last=False)
+
+    def record_cache_hit(self, soql, rows, nbytes=0, seconds=0.0):
+        """Log a statement answered by the SOQL result cache."""
+        record = self.new_record(soql, 'cache')
+        record.rows = rows
+        record.bytes = nbytes
+        record.seconds = seconds
+        with self._lock:
+            self._add_totals(record, seconds=seconds, rows=rows, nbytes=nbytes)
+
+    def finish_statement(self, record):
+        """Add a statement timed as a whole (see ``track_statement``) to the totals."""
+        with self._lock:
+            self._add_totals(record, seconds=record.seconds, pages=record.pages, rows=record.rows,
+                             nbytes=record.bytes, errors=int(record.status == 'error'))
+
+    def records(self, run_id=None):
+        """Return a copy of the retained records, optionally only those of one rerun."""
+        with self._lock:
+            records = list(self._records)
+        return [record for record in records if run_id is None or record.run_id == run_id]
+
+    def totals(self):
+        """Return the totals per (app, view, object, source) since the process started."""
+        with self._lock:
+            return OrderedDict((key, dict(entry)) for key, entry in self._totals.items())
+
+    def clear(self):
+        """Forget the retained records; the totals keep counting, as Prometheus counters must."""
+        with self._lock:
+            self._records.clear()
+            self._open.clear()
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_query_log():
+    """Return the process-wide query log (keeps the last SF_QUERY_LOG_SIZE records, default 1000)."""
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = QueryLog(max_records=int(os.getenv("SF_QUERY_LOG_SIZE", "1000")))
+        return _log
+
+
+def timed_query_page(call, soql=None, next_records_url=None):
+    """Run one REST ``query`` / ``queryMore`` call and log it against its statement."""
+    started = time.perf_counter()
+    try:
+        result = call()
+    except Exception as e:
+        get_query_log().record_page(None, time.perf_counter() - started, soql, next_records_url, error=e)
+        raise
+    get_query_log().record_page(result, time.perf_counter() - started, soql, next_records_url)
+    return result
+
+
+@contextmanager
+def track_statement(soql, source):
+    """Time a whole statement (e.g. a Bulk API job); the caller adds pages, rows and bytes to the record."""
+    log = get_query_log()
+    record = log.new_record(soql, source)
+    started = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record.status = 'error'
+        record.error = str(e)[:300]
+        raise
+    finally:
+        record.seconds += time.perf_counter() - started
+        log.finish_statement(record)
+
+
+def start_query_run(app, view=''):
+    """Tag the statements of this rerun with ``app`` and ``view``; returns the new run ID."""
+    run_id = uuid.uuid4().hex[:12]
+    _app.set(app)
+    _view.set(view)
+    _run_id.set(run_id)
+    return run_id
+
+
+def current_run_id():
+    return _run_id.get()
+
+
+@contextmanager
+def query_scope(view):
+    """Attribute statements run inside the block to ``view`` (a view, tab or section name)."""
+    token = _view.set(view)
+    try:
+        yield
+    finally:
+        _view.reset(token)
+
+
+# -- exports ---------------------------------------------------------------------
+
+def records_frame(records):
+    """Return records as a DataFrame, slowest statement first."""
+    frame = pd.DataFrame([asdict(record) for record in records], columns=list(QueryRecord.__dataclass_fields__))
+    return frame.sort_values('seconds', ascending=False, ignore_index=True)
+
+
+def to_json_lines(records):
+    """Serialize records as JSON lines, one statement per line."""
+    return ''.join(json.dumps(asdict(record)) + '\n' for record in records)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_PROMETHEUS_METRICS = [
+    ('soql_statements_total', 'SOQL statements executed or served from cache.'),
+    ('soql_statement_seconds_total', 'Wall time spent in SOQL statements.'),
+    ('soql_pages_total', 'Result pages (REST pages or Bulk API result chunks) fetched.'),
+    ('soql_rows_total', 'Rows returned by SOQL statements.'),
+    ('soql_bytes_total', 'Approximate payload bytes returned by SOQL statements.'),
+    ('soql_errors_total', 'SOQL statements that failed.'),
+]
+
+
+def to_prometheus(totals=None):
+    """Render the process-wide totals per app, view, object and source as Prometheus counters.
+
+    ``totals`` defaults to ``get_query_log().totals()``.
+    """
+    if totals is None:
+        totals = get_query_log().totals()
+
+    lines = []
+    for name, help_text in _PROMETHEUS_METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for (app, view, object_name, source), entry in totals.items():
+            labels = (f'app="{_label(app)}",view="{_label(view)}",'
+                      f'object="{_label(object_name)}",source="{_label(source)}"')
+            value = entry[name]
+            lines.append(f"{name}{{{labels}}} {round(value, 6) if isinstance(value, float) else int(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+def render_query_panel(title="⏱️ Query Performance"):
+    """Show this rerun's SOQL statements in a collapsible panel with JSON lines / Prometheus exports."""
+    # Imported here so headless users of this module (loaders, prefetch CLI) never load Streamlit
+    import streamlit as st
+
+    log = get_query_log()
+    run_records = log.records(run_id=current_run_id())
+    with st.expander(title, expanded=False):
+        if not run_records:
+            st.caption("No SOQL statements ran in this rerun.")
+        else:
+            frame = records_frame(run_records)
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Statements", len(frame))
+            col2.metric("Salesforce Time", f"{frame['seconds'].sum():.2f}s")
+            col3.metric("Pages", int(frame['pages'].sum()))
+            col4.metric("Rows", f"{int(frame['rows'].sum()):,}")
+            st.dataframe(
+                frame[['view', 'object', 'source', 'seconds', 'pages', 'rows', 'bytes', 'status', 'soql']],
+                use_container_width=True,
+                hide_index=True,
+            )
+
+        all_records = log.records()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "📥 Export JSON lines",
+                data=to_json_lines(all_records),
+                file_name="soql_metrics.jsonl",
+                mime="application/x-ndjson",
+            )
+        with col2:
+            st.download_button(
+                "📥 Export Prometheus metrics",
+                data=to_prometheus(log.totals()),
+                file_name="soql_metrics.prom",
+                mime="text/plain",
+            )
@@ -0,0 +1,138 @@
+"""Streaming ingestion of SOQL query pages into flat pandas columns.
+
+``ColumnarRecordBuilder`` consumes records one page at a time (via
+``query_all_iter``) and appends each field straight into a per-column buffer,
+flattening relationship fields such as ``NameInsured.Account_Manager__r.Name``
+on the fly. Only the current page of raw JSON is alive at any moment, instead
+of the full raw result, an intermediate list of dicts and the final frame.
+"""
+import math
+from array import array
+
+import numpy as np
+import pandas as pd
+
+
+def get_nested_value(record, field_path):
+    """Return the value at a dotted relationship path of a SOQL record, or None."""
+    current = record
+    for part in field_path.split('.'):
+        if not isinstance(current, dict):
+            return None
+        current = current.get(part)
+    return current
+
+
+def _to_float(value):
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class ColumnarRecordBuilder:
+    """Append SOQL records field by field into typed column buffers.
+
+    Numeric fields go into ``array('d')`` buffers (missing or unparseable values
+    become NaN); every other field goes into a plain list.
+    """
+
+    def __init__(self, fields, numeric_fields=()):
+        self.fields = list(fields)
+        numeric_fields = set(numeric_fields)
+        self._numeric = [field in numeric_fields for field in self.fields]
+        self._paths = [tuple(field.split('.')) for field in self.fields]
+        self._buffers = [array('d') if numeric else [] for numeric in self._numeric]
+        self.rows = 0
+
+    def append(self, record):
+        """Flatten one record into the column buffers (None records are skipped)."""
+        if not record:
+            return
+        for path, numeric, buffer in zip(self._paths, self._numeric, self._buffers):
+            value = record
+            for part in path:
+                if not isinstance(value, dict):
+                    value = None
+                    break
+                value = value.get(part)
+            buffer.append(_to_float(value) if numeric else value)
+        self.rows += 1
+
+    def extend(self, records):
+        """Append every record from an iterable, consuming it lazily."""
+        for record in records:
+            self.append(record)
+        return self
+
+    def to_frame(self):
+        """Return the buffered rows as a DataFrame and release the buffers."""
+        columns = {}
+        for field, numeric, buffer in zip(self.fields, self._numeric, self._buffers):
+            # frombuffer wraps the array's memory without copying it
+            columns[field] = np.frombuffer(buffer, dtype='float64') if numeric else buffer
+        frame = pd.DataFrame(columns, columns=self.fields)
+        self._buffers = [array('d') if numeric else [] for numeric in self._numeric]
+        self.rows = 0
+        return frame
+
+
+def iter_result_records(sf, result):
+    """Yield the records of a REST result page and of every ``queryMore`` page after it."""
+    while True:
+        yield from result['records']
+        if result['done']:
+            return
+        result = sf.query_more(result['nextRecordsUrl'], identifier_is_url=True)
+
+
+def iter_query_records(sf, soql, include_deleted=False):
+    """Yield query records page by page, falling back to query_all for clients without query_all_iter."""
+    if hasattr(sf, 'query_all_iter'):
+        return sf.query_all_iter(soql, include_deleted=include_deleted)
+    return iter(sf.query_all(soql, include_deleted=include_deleted)['records'])
+
+
+def query_frame(sf, soql, fields, numeric_fields=(), include_deleted=False):
+    """Run a SOQL query and stream its pages into a flat DataFrame with one column per field path."""
+    builder = ColumnarRecordBuilder(fields, numeric_fields)
+    builder.extend(iter_query_records(sf, soql, include_deleted=include_deleted))
+    return builder.to_frame()
+
+
+def flatten_records(records, fields, numeric_fields=()):
+    """Flatten already-fetched SOQL records into a DataFrame with one column per dotted field path."""
+    return ColumnarRecordBuilder(fields, numeric_fields).extend(records).to_frame()
+
+
+def coalesce_columns(frame, field_paths, default=''):
+    """Return, per row, the first non-empty value across ``field_paths``, else ``default``.
+
+    None, NaN and empty strings all count as missing, matching the fallback rules the
+    dashboards used when walking nested relationship dicts row by row. Paths absent
+    from ``frame`` are treated as entirely missing.
+    """
+    result = np.full(len(frame), default, dtype=object)
+    # Walk the fallbacks from last to first so earlier paths take precedence
+    for path in reversed(field_paths):
+        if path not in frame:
+            continue
+        values = frame[path].to_numpy(dtype=object, na_value=None)
+        present = pd.notna(values) & (values != '')
+        result = np.where(present, values, result)
+    return pd.Series(result, index=frame.index, dtype=object)
+
+
+def flatten_relationship_fields(frame, spec):
+    """Derive output columns from flattened relationship paths in one column-wise pass.
+
+    ``spec`` maps each output column to ``(field_paths, default)``, e.g.
+    ``{'ProducerIdentifier': (['Producer.Name', 'Producer_2__r.Name'], 'Unknown Producer')}``.
+    Returns a dict of Series aligned with ``frame``.
+    """
+    return {
+        output: coalesce_columns(frame, field_paths, default)
+        for output, (field_paths, default) in spec.items()
+    }
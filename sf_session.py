@@ -0,0 +1,194 @@
+"""Process-wide Salesforce session shared across Streamlit reruns and users.
+
+Streamlit re-executes the dashboard scripts on every widget interaction, but
+modules they import stay loaded, so a manager held here logs in once per
+process, keeps one pooled HTTP session, and hands the same client to every
+rerun and every browser session.
+"""
+import os
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+from simple_salesforce import Salesforce
+
+from fake_salesforce import QueryRecorder, create_offline_client, get_recording_path
+from query_metrics import timed_query_page
+
+# SF_BACKEND values; "live" and "record" talk to the real org
+BACKENDS = ('live', 'record', 'replay', 'synthetic')
+
+
+class PooledSalesforce(Salesforce):
+    """Salesforce client that reports its logins and API calls to a session manager."""
+
+    def __init__(self, *args, manager=None, recorder=None, **kwargs):
+        self._manager = manager
+        self._recorder = recorder
+        super().__init__(*args, **kwargs)
+
+    @property
+    def bulk_enabled(self):
+        """Bulk API 2.0 jobs are not captured by a recorder, so recording clients extract over REST."""
+        return self._recorder is None
+
+    def query(self, query, include_deleted=False, **kwargs):
+        result = timed_query_page(
+            lambda: super(PooledSalesforce, self).query(query, include_deleted=include_deleted, **kwargs),
+            soql=query,
+        )
+        if self._recorder is not None:
+            self._recorder.record_query(query, include_deleted, result)
+        return result
+
+    def query_more(self, next_records_identifier, identifier_is_url=False, include_deleted=False, **kwargs):
+        result = timed_query_page(
+            lambda: super(PooledSalesforce, self).query_more(
+                next_records_identifier, identifier_is_url=identifier_is_url, include_deleted=include_deleted, **kwargs
+            ),
+            next_records_url=next_records_identifier,
+        )
+        if self._recorder is not None:
+            self._recorder.record_query_more(next_records_identifier, result)
+        return result
+
+    def _call_salesforce(self, method, url, name="", **kwargs):
+        if self._manager is not None:
+            self._manager._record_call(name or method)
+        return super()._call_salesforce(method, url, name=name, **kwargs)
+
+    def _refresh_session(self):
+        # simple_salesforce re-logs in here when a call returns INVALID_SESSION_ID
+        if self._manager is None:
+            return super()._refresh_session()
+        with self._manager._lock:
+            super()._refresh_session()
+            self._manager._record_login(refresh=True)
+
+
+class SalesforceSessionManager:
+    """Thread-safe holder of a single logged-in Salesforce client.
+
+    The client is created lazily on first use and re-created once it is older
+    than ``max_session_age`` seconds; expired tokens returned mid-session are
+    refreshed in place by the client itself.
+    """
+
+    def __init__(self, max_session_age=7200, pool_maxsize=16, backend='live'):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown SF_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+        self.backend = backend
+        self.max_session_age = max_session_age
+        self.pool_maxsize = pool_maxsize
+        self._lock = threading.RLock()
+        self._client = None
+        self._logged_in_at = None
+        self._logins = 0
+        self._refreshes = 0
+        self._client_requests = 0
+        self._calls = Counter()
+
+    def _credentials(self):
+        return {
+            'username': os.getenv("SF_USERNAME_PRO"),
+            'password': os.getenv("SF_PASSWORD_PRO"),
+            'security_token': os.getenv("SF_SECURITY_TOKEN_PRO"),
+        }
+
+    def _build_http_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @property
+    def requires_credentials(self):
+        """Whether this backend logs in to a real org with SF_* credentials."""
+        return self.backend in ('live', 'record')
+
+    def _login(self):
+        if not self.requires_credentials:
+            client = create_offline_client(self.backend, manager=self)
+            self._record_login()
+            return client
+        client = PooledSalesforce(
+            manager=self,
+            session=self._build_http_session(),
+            # Recording clients disable Bulk API jobs (see PooledSalesforce.bulk_enabled)
+            recorder=QueryRecorder(get_recording_path()) if self.backend == 'record' else None,
+            **self._credentials(),
+        )
+        self._record_login()
+        return client
+
+    def _record_login(self, refresh=False):
+        with self._lock:
+            self._logins += 1
+            if refresh:
+                self._refreshes += 1
+            self._logged_in_at = time.monotonic()
+
+    def _record_call(self, name):
+        with self._lock:
+            self._calls[name] += 1
+
+    def _is_expired(self):
+        return (self._logged_in_at is None
+                or time.monotonic() - self._logged_in_at > self.max_session_age)
+
+    def get_client(self):
+        """Return the shared Salesforce client, logging in only when needed."""
+        with self._lock:
+            self._client_requests += 1
+            if self._client is None or self._is_expired():
+                self._client = self._login()
+            return self._client
+
+    def invalidate(self):
+        """Drop the current client so the next request logs in again."""
+        with self._lock:
+            self._client = None
+            self._logged_in_at = None
+
+    def stats(self):
+        """Return login and API call counters for display."""
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'logins': self._logins,
+                'token_refreshes': self._refreshes,
+                'client_requests': self._client_requests,
+                'logins_saved': max(self._client_requests - self._logins, 0),
+                'api_calls': sum(self._calls.values()),
+                'calls_by_type': dict(self._calls),
+                'session_age_seconds': (
+                    time.monotonic() - self._logged_in_at if self._logged_in_at is not None else None
+                ),
+            }
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_backend_name():
+    """Return the configured Salesforce backend (SF_BACKEND, default ``live``).
+
+    ``synthetic`` and ``replay`` run without credentials; see ``fake_salesforce``.
+    """
+    return os.getenv("SF_BACKEND", "live").strip().lower() or 'live'
+
+
+def get_session_manager():
+    """Return the process-wide Salesforce session manager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SalesforceSessionManager(
+                max_session_age=int(os.getenv("SF_SESSION_MAX_AGE", "7200")),
+                backend=get_backend_name(),
+            )
+        return _manager
@@ -0,0 +1,288 @@
+"""Local columnar snapshot of InsurancePolicy records with incremental delta sync.
+
+The first sync pulls every in-scope policy once and writes it to a Parquet file.
+Later syncs only ask Salesforce for rows whose ``SystemModstamp`` moved past the
+stored watermark and merge them into the snapshot, so dashboard reruns read
+policies from local disk/memory instead of re-downloading the whole org. The
+snapshot is opt-in: set ``SF_SNAPSHOT_DIR`` to the directory it should live in.
+
+The snapshot is held in the compact form from ``frame_compaction`` (categoricals,
+int32 day offsets, integer cents); callers filter it and pass the rows they keep
+through ``expand_snapshot``.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from bulk_extract import extract_frame
+from frame_compaction import compact_frame, expand_frame
+from record_builder import query_frame
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+# Union of the InsurancePolicy fields read by load_balance.py and prodsc.py.
+# Relationship fields are stored flattened under their dotted SOQL path.
+SNAPSHOT_FIELDS = [
+    'Id',
+    'Name',
+    'PolicyName',
+    'PolicyType',
+    'Status',
+    'EffectiveDate',
+    'ExpirationDate',
+    'Business_Type_Reporting__c',
+    'NameInsuredId',
+    'NameInsured.Name',
+    'NameInsured.Account_Manager__c',
+    'NameInsured.Account_Manager__r.Name',
+    'ProducerId',
+    'Producer.Name',
+    'Producer_2__c',
+    'Producer_2__r.Name',
+    'WritingCarrierAccount.Name',
+    'Total_Policy_Premium__c',
+    'PremiumAmount',
+    'TaxesSurcharges',
+    'SystemModstamp',
+]
+
+# Statuses kept in the snapshot (superset of both dashboards' filters)
+SNAPSHOT_STATUSES = ['Active', 'Renewing', 'Pending Cancellation', 'Non-Renewal', 'Reinstating', 'Reinstated']
+
+NUMERIC_FIELDS = ['Total_Policy_Premium__c', 'PremiumAmount', 'TaxesSurcharges']
+
+# Stored as int32 day offsets
+DATE_FIELDS = ['EffectiveDate', 'ExpirationDate']
+
+# Low-cardinality text fields stored as categoricals
+CATEGORY_FIELDS = [
+    'PolicyType',
+    'Status',
+    'Business_Type_Reporting__c',
+    'NameInsured.Account_Manager__c',
+    'NameInsured.Account_Manager__r.Name',
+    'ProducerId',
+    'Producer.Name',
+    'Producer_2__c',
+    'Producer_2__r.Name',
+    'WritingCarrierAccount.Name',
+]
+
+
+def format_soql_datetime(value):
+    """Format a Salesforce datetime string (e.g. a SystemModstamp) as a SOQL literal."""
+    parsed = pd.Timestamp(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.tz_localize('UTC')
+    return parsed.tz_convert('UTC').strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def expand_snapshot(frame):
+    """Return snapshot rows with text, datetime and float amount columns restored."""
+    return expand_frame(frame, dates=DATE_FIELDS, money=NUMERIC_FIELDS)
+
+
+def _status_scope_clause():
+    status_list = ', '.join(f"'{status}'" for status in SNAPSHOT_STATUSES)
+    return f"Status IN ({status_list})"
+
+
+class PolicySnapshotStore:
+    """Parquet-backed InsurancePolicy snapshot kept current via a SystemModstamp watermark.
+
+    Changes to related records (for example an Account's manager) do not bump the
+    policy's ``SystemModstamp``, so the store also performs a periodic full reload
+    controlled by ``full_reload_interval``. A full load runs outside the store lock
+    and is swapped in when it completes; meanwhile other sessions keep reading the
+    previous snapshot, or wait for the load when there is none yet.
+    """
+
+    def __init__(self, directory, min_sync_interval=60, full_reload_interval=24 * 3600):
+        self.directory = directory
+        self.min_sync_interval = min_sync_interval
+        self.full_reload_interval = full_reload_interval
+        self.data_path = os.path.join(directory, 'insurance_policy.parquet')
+        self.meta_path = os.path.join(directory, 'insurance_policy.meta.json')
+        self._lock = threading.Lock()
+        self._loaded = threading.Condition(self._lock)
+        self._loading = False
+        self._frame = None
+        self._meta = None
+        self._last_checked = 0.0
+        self.last_sync_info = {}
+
+    def _fields_signature(self):
+        return ','.join(SNAPSHOT_FIELDS)
+
+    def _read_disk(self):
+        """Load the snapshot and its metadata from disk if present and compatible."""
+        if not (os.path.exists(self.data_path) and os.path.exists(self.meta_path)):
+            return None, None
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as fh:
+                meta = json.load(fh)
+            if meta.get('fields') != self._fields_signature():
+                return None, None
+            return self._normalize(pd.read_parquet(self.data_path)), meta
+        except Exception:
+            return None, None
+
+    def _write_disk(self, frame, meta):
+        """Atomically persist the snapshot and its metadata."""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_data = self.data_path + '.tmp'
+        tmp_meta = self.meta_path + '.tmp'
+        frame.to_parquet(tmp_data, index=False)
+        with open(tmp_meta, 'w', encoding='utf-8') as fh:
+            json.dump(meta, fh)
+        os.replace(tmp_data, self.data_path)
+        os.replace(tmp_meta, self.meta_path)
+
+    def _build_query(self, where_clause, extra_fields=()):
+        return f"""
+            SELECT {', '.join(SNAPSHOT_FIELDS + list(extra_fields))}
+            FROM InsurancePolicy
+            WHERE {where_clause}
+        """
+
+    def _normalize(self, frame):
+        """Store the snapshot compactly, which also gives Parquet stable column types."""
+        return compact_frame(frame, categorical=CATEGORY_FIELDS, dates=DATE_FIELDS, money=NUMERIC_FIELDS)
+
+    def _full_load(self, sf):
+        # Full loads are the largest extract, so they may run as a Bulk API 2.0 job
+        frame, mode = extract_frame(
+            sf, 'InsurancePolicy', SNAPSHOT_FIELDS, _status_scope_clause(), numeric_fields=NUMERIC_FIELDS
+        )
+        frame = self._normalize(frame)
+        now = datetime.now(timezone.utc).isoformat()
+        meta = {
+            'fields': self._fields_signature(),
+            'watermark': frame['SystemModstamp'].max() if not frame.empty else None,
+            'last_full_load': now,
+            'last_sync': now,
+            'row_count': len(frame),
+        }
+        self.last_sync_info = {'mode': f'full/{mode}', 'rows_fetched': len(frame)}
+        return frame, meta
+
+    def _delta_load(self, sf, frame, meta):
+        # ">=" re-reads rows stamped in the watermark second; the merge de-duplicates them
+        delta_query = self._build_query(
+            f"SystemModstamp >= {format_soql_datetime(meta['watermark'])}",
+            extra_fields=['IsDeleted'],
+        )
+        delta = query_frame(
+            sf, delta_query, SNAPSHOT_FIELDS + ['IsDeleted'], numeric_fields=NUMERIC_FIELDS, include_deleted=True
+        )
+
+        if not delta.empty:
+            deleted = delta['IsDeleted'].fillna(False).astype(bool)
+            changed_ids = set(delta['Id'])
+            # Rows that left the status scope or were deleted are dropped from the snapshot
+            kept = self._normalize(delta.loc[delta['Status'].isin(SNAPSHOT_STATUSES) & ~deleted, SNAPSHOT_FIELDS])
+            # Categoricals with different categories concatenate as text, so re-compact the merge
+            frame = self._normalize(pd.concat([frame[~frame['Id'].isin(changed_ids)], kept], ignore_index=True))
+            watermark = max(meta['watermark'], delta['SystemModstamp'].max())
+        else:
+            watermark = meta['watermark']
+
+        meta = dict(meta)
+        meta.update({
+            'watermark': watermark,
+            'last_sync': datetime.now(timezone.utc).isoformat(),
+            'row_count': len(frame),
+        })
+        self.last_sync_info = {'mode': 'delta', 'rows_fetched': len(delta)}
+        return frame, meta
+
+    def _needs_full_reload(self, meta):
+        if not meta or not meta.get('watermark'):
+            return True
+        last_full = datetime.fromisoformat(meta['last_full_load'])
+        return datetime.now(timezone.utc) - last_full > timedelta(seconds=self.full_reload_interval)
+
+    def sync(self, sf, force=False):
+        """Bring the snapshot up to date and return it as a DataFrame.
+
+        Syncs are skipped when the last check happened less than
+        ``min_sync_interval`` seconds ago, unless ``force`` is set.
+        """
+        with self._lock:
+            while True:
+                if self._frame is None and not self._loading:
+                    self._frame, self._meta = self._read_disk()
+
+                if self._loading:
+                    # Another session is running a full load; serve the previous snapshot meanwhile
+                    if self._frame is not None:
+                        self.last_sync_info = {'mode': 'memory', 'rows_fetched': 0}
+                        return self._frame
+                    self._loaded.wait()
+                    continue
+
+                if (not force and self._frame is not None
+                        and time.monotonic() - self._last_checked < self.min_sync_interval):
+                    self.last_sync_info = {'mode': 'memory', 'rows_fetched': 0}
+                    return self._frame
+
+                if not (force or self._needs_full_reload(self._meta)):
+                    # Deltas are small, so they run under the lock
+                    frame, meta = self._delta_load(sf, self._frame, self._meta)
+                    self._write_disk(frame, meta)
+                    self._frame, self._meta = frame, meta
+                    self._last_checked = time.monotonic()
+                    return self._frame
+
+                self._loading = True
+                break
+
+        try:
+            frame, meta = self._full_load(sf)
+            self._write_disk(frame, meta)
+        except Exception:
+            with self._lock:
+                self._loading = False
+                self._loaded.notify_all()
+            raise
+        with self._lock:
+            self._frame, self._meta = frame, meta
+            self._last_checked = time.monotonic()
+            self._loading = False
+            self._loaded.notify_all()
+        return frame
+
+    @property
+    def metadata(self):
+        """Return the current snapshot metadata (watermark, load times, row count)."""
+        return dict(self._meta or {})
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_policy_snapshot_store():
+    """Return the process-wide policy snapshot store, or None when disabled.
+
+    The snapshot is opt-in: it lives in ``SF_SNAPSHOT_DIR`` (e.g. ``.sf_snapshot``) and
+    is disabled when the variable is unset or empty, or when pyarrow is missing. Its
+    first sync extracts every in-scope policy in the org.
+    """
+    global _store
+    directory = os.getenv('SF_SNAPSHOT_DIR', '')
+    if not PARQUET_AVAILABLE or not directory:
+        return None
+    with _store_lock:
+        if _store is None or _store.directory != directory:
+            _store = PolicySnapshotStore(directory)
+        return _store
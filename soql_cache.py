@@ -0,0 +1,179 @@
+"""Process-wide cache of SOQL results keyed by a normalized SOQL fingerprint.
+
+Both raw ``sf.query_all`` result dicts and flat DataFrames built by
+``record_builder.query_frame`` can be cached. Cached frames keep their
+low-cardinality text columns as categoricals and are expanded on the way out.
+
+Entries expire after a TTL and the least recently used ones are evicted once
+the estimated size of all cached results exceeds a byte budget. Cached result
+dicts are shared between callers, so they must be treated as read-only.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from frame_compaction import compact_frame, expand_frame
+from query_metrics import get_query_log
+from record_builder import query_frame
+
+_LITERAL_RE = re.compile(r"'(?:\\.|[^'\\])*'")
+_WHITESPACE_RE = re.compile(r"\s+")
+_PUNCTUATION_RE = re.compile(r"\s*([(),=<>!])\s*")
+_SIZE_SAMPLE = 50
+
+
+def _normalize_fragment(fragment):
+    fragment = _WHITESPACE_RE.sub(' ', fragment).lower()
+    # Drop padding around punctuation so "IN ( 'a','b' )" and "IN ('a', 'b')" agree
+    return _PUNCTUATION_RE.sub(r"\1", fragment)
+
+
+def normalize_soql(query):
+    """Collapse whitespace and case outside string literals so equivalent queries match."""
+    parts = []
+    position = 0
+    for match in _LITERAL_RE.finditer(query):
+        parts.append(_normalize_fragment(query[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(_normalize_fragment(query[position:]))
+    return ''.join(parts).strip()
+
+
+def soql_fingerprint(query, include_deleted=False, namespace=''):
+    """Return a stable fingerprint for a SOQL query and its execution options."""
+    key = f"{namespace}|{int(bool(include_deleted))}|{normalize_soql(query)}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def estimate_result_size(result):
+    """Estimate the in-memory size of a cached query_all result dict or DataFrame."""
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(deep=True).sum())
+    records = result.get('records') or []
+    if not records:
+        return 256
+    sample = records[:_SIZE_SAMPLE]
+    sample_bytes = len(json.dumps(sample, default=str))
+    # JSON text understates Python object overhead by roughly 3x for dict records
+    return int(sample_bytes / len(sample) * len(records) * 3)
+
+
+class SOQLResultCache:
+    """TTL + size-bounded LRU cache of query_all results."""
+
+    def __init__(self, ttl=300, max_bytes=256 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        """Return a cached result or None, counting the hit or miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, result, ttl=None):
+        """Store a result, evicting least recently used entries to stay under budget."""
+        size = estimate_result_size(result)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (result, size, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove every cached result."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return hit/miss counters and size accounting."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_soql_cache():
+    """Return the process-wide SOQL result cache (SOQL_CACHE_TTL / SOQL_CACHE_MAX_MB)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SOQLResultCache(
+                ttl=int(os.getenv("SOQL_CACHE_TTL", "300")),
+                max_bytes=int(os.getenv("SOQL_CACHE_MAX_MB", "256")) * 1024 * 1024,
+            )
+        return _cache
+
+
+def cached_query_all(sf, query, include_deleted=False, ttl=None, refresh=False):
+    """Run ``sf.query_all`` through the process-wide result cache; ``refresh`` replaces any cached result."""
+    cache = get_soql_cache()
+    key = soql_fingerprint(query, include_deleted, namespace=getattr(sf, 'sf_instance', '') or '')
+    result = None if refresh else cache.get(key)
+    if result is None:
+        result = sf.query_all(query, include_deleted=include_deleted)
+        cache.put(key, result, ttl=ttl)
+    else:
+        get_query_log().record_cache_hit(query, len(result.get('records') or []))
+    return result
+
+
+def cached_query_frame(sf, query, fields, numeric_fields=(), ttl=None):
+    """Stream a query into a flat DataFrame through the process-wide result cache."""
+    cache = get_soql_cache()
+    namespace = f"{getattr(sf, 'sf_instance', '') or ''}|frame|{','.join(fields)}|{','.join(numeric_fields)}"
+    key = soql_fingerprint(query, namespace=namespace)
+    frame = cache.get(key)
+    if frame is None:
+        frame = compact_frame(query_frame(sf, query, fields, numeric_fields), categorical='auto')
+        cache.put(key, frame, ttl=ttl)
+    else:
+        get_query_log().record_cache_hit(query, len(frame))
+    return expand_frame(frame)
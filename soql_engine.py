@@ -0,0 +1,456 @@
+"""A small SOQL evaluator over in-memory pandas tables.
+
+Supports the subset of SOQL the dashboards issue, so offline backends can
+answer their queries:
+
+* ``SELECT`` of fields and dotted relationship paths, with optional aliases
+* ``COUNT()``, ``COUNT(field)``, ``COUNT_DISTINCT``, ``SUM``, ``MIN``, ``MAX``, ``AVG``
+* ``WHERE`` with ``AND`` / ``OR`` / ``NOT``, parentheses, comparisons, ``LIKE``,
+  ``IN`` / ``NOT IN`` lists and ``IN (SELECT ...)`` semi-joins
+* ``GROUP BY``, ``LIMIT`` and, for row queries, ``ORDER BY ... ASC|DESC NULLS FIRST|LAST``
+
+Tables are registered as ``SObjectTable``s holding one column per field plus
+the lookup relationships used to resolve dotted paths.
+"""
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:\\.|[^'\\])*')
+      | (?P<datetime>\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?)
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<op>!=|<>|<=|>=|=|<|>)
+      | (?P<punct>[(),])
+      | (?P<ident>[A-Za-z_][A-Za-z0-9_.]*)
+    )""", re.VERBOSE)
+
+_AGGREGATES = {'COUNT', 'COUNT_DISTINCT', 'SUM', 'MIN', 'MAX', 'AVG'}
+_CLAUSE_KEYWORDS = {'FROM', 'WHERE', 'GROUP', 'ORDER', 'LIMIT', 'OFFSET'}
+
+
+class SOQLError(ValueError):
+    """Raised for queries the evaluator cannot parse or resolve."""
+
+
+@dataclass
+class SObjectTable:
+    """One queryable object: its rows, lookup relationships and typed fields.
+
+    ``relationships`` maps a relationship name (e.g. ``NameInsured``) to
+    ``(foreign_key_field, target_object)``. Date and datetime fields hold
+    datetime64 values and are rendered the way the REST API returns them.
+    """
+
+    name: str
+    frame: pd.DataFrame
+    relationships: dict = field(default_factory=dict)
+    date_fields: frozenset = frozenset()
+    datetime_fields: frozenset = frozenset()
+
+    def __post_init__(self):
+        self.id_index = pd.Index(self.frame['Id'])
+
+
+@dataclass
+class SelectItem:
+    path: str = None
+    aggregate: str = None
+    alias: str = None
+
+
+@dataclass
+class ParsedQuery:
+    object_name: str
+    select: list
+    where: tuple = None
+    group_by: list = field(default_factory=list)
+    order_by: list = field(default_factory=list)
+    limit: int = None
+
+    @property
+    def is_aggregate(self):
+        return bool(self.group_by) or any(item.aggregate for item in self.select)
+
+    @property
+    def is_count_only(self):
+        return len(self.select) == 1 and self.select[0].aggregate == 'COUNT' and self.select[0].path is None
+
+
+def _tokenize(soql):
+    tokens = []
+    position = 0
+    text = soql.strip()
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise SOQLError(f"Unexpected input near: {text[position:position + 30]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+        while position < len(text) and text[position].isspace():
+            position += 1
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def keyword(self, offset=0):
+        kind, value = self.peek(offset)
+        return value.upper() if kind == 'ident' else None
+
+    def expect_keyword(self, word):
+        if self.keyword() != word:
+            raise SOQLError(f"Expected {word}, found {self.peek()[1]!r}")
+        self.next()
+
+    def expect_punct(self, value):
+        kind, token = self.next()
+        if kind != 'punct' or token != value:
+            raise SOQLError(f"Expected {value!r}, found {token!r}")
+
+    def parse_query(self):
+        self.expect_keyword('SELECT')
+        select = [self.parse_select_item()]
+        while self.peek() == ('punct', ','):
+            self.next()
+            select.append(self.parse_select_item())
+        self.expect_keyword('FROM')
+        _, object_name = self.next()
+        query = ParsedQuery(object_name=object_name, select=select)
+
+        if self.keyword() == 'WHERE':
+            self.next()
+            query.where = self.parse_or()
+        if self.keyword() == 'GROUP':
+            self.next()
+            self.expect_keyword('BY')
+            query.group_by.append(self.next()[1])
+            while self.peek() == ('punct', ','):
+                self.next()
+                query.group_by.append(self.next()[1])
+        if self.keyword() == 'ORDER':
+            self.next()
+            self.expect_keyword('BY')
+            query.order_by.append(self.parse_order_item())
+            while self.peek() == ('punct', ','):
+                self.next()
+                query.order_by.append(self.parse_order_item())
+        if self.keyword() == 'LIMIT':
+            self.next()
+            query.limit = int(self.next()[1])
+        return query
+
+    def parse_select_item(self):
+        kind, value = self.next()
+        if kind != 'ident':
+            raise SOQLError(f"Unexpected {value!r} in SELECT")
+        item = SelectItem()
+        if value.upper() in _AGGREGATES and self.peek() == ('punct', '('):
+            self.next()
+            item.aggregate = value.upper()
+            if self.peek() != ('punct', ')'):
+                item.path = self.next()[1]
+            self.expect_punct(')')
+        else:
+            item.path = value
+        # An alias is a bare identifier that is not the next clause keyword
+        if self.peek()[0] == 'ident' and self.keyword() not in _CLAUSE_KEYWORDS:
+            item.alias = self.next()[1]
+        return item
+
+    def parse_order_item(self):
+        path = self.next()[1]
+        ascending = True
+        nulls_first = None
+        if self.keyword() in ('ASC', 'DESC'):
+            ascending = self.next()[1].upper() == 'ASC'
+        if self.keyword() == 'NULLS':
+            self.next()
+            nulls_first = self.next()[1].upper() == 'FIRST'
+        if nulls_first is None:
+            # SOQL puts nulls first for ascending and last for descending sorts
+            nulls_first = ascending
+        return path, ascending, nulls_first
+
+    def parse_or(self):
+        terms = [self.parse_and()]
+        while self.keyword() == 'OR':
+            self.next()
+            terms.append(self.parse_and())
+        return terms[0] if len(terms) == 1 else ('or', terms)
+
+    def parse_and(self):
+        terms = [self.parse_not()]
+        while self.keyword() == 'AND':
+            self.next()
+            terms.append(self.parse_not())
+        return terms[0] if len(terms) == 1 else ('and', terms)
+
+    def parse_not(self):
+        if self.keyword() == 'NOT':
+            self.next()
+            return ('not', self.parse_not())
+        return self.parse_primary()
+
+    def parse_primary(self):
+        if self.peek() == ('punct', '('):
+            self.next()
+            expression = self.parse_or()
+            self.expect_punct(')')
+            return expression
+
+        _, path = self.next()
+        negate = False
+        if self.keyword() == 'NOT':
+            self.next()
+            negate = True
+        if self.keyword() == 'IN':
+            self.next()
+            self.expect_punct('(')
+            if self.keyword() == 'SELECT':
+                values = ('subquery', self.parse_query())
+            else:
+                values = [self.parse_value()]
+                while self.peek() == ('punct', ','):
+                    self.next()
+                    values.append(self.parse_value())
+            self.expect_punct(')')
+            return ('in', path, negate, values)
+        if self.keyword() == 'LIKE':
+            self.next()
+            return ('like', path, self.parse_value())
+
+        kind, operator = self.next()
+        if kind != 'op':
+            raise SOQLError(f"Expected an operator after {path}, found {operator!r}")
+        return ('cmp', path, '!=' if operator == '<>' else operator, self.parse_value())
+
+    def parse_value(self):
+        kind, value = self.next()
+        if kind == 'string':
+            return re.sub(r"\\(.)", r"\1", value[1:-1])
+        if kind == 'number':
+            return float(value) if '.' in value else int(value)
+        if kind == 'datetime':
+            stamp = pd.Timestamp(value)
+            return stamp.tz_convert('UTC').tz_localize(None) if stamp.tzinfo is not None else stamp
+        if kind == 'ident':
+            word = value.upper()
+            if word == 'NULL':
+                return None
+            if word in ('TRUE', 'FALSE'):
+                return word == 'TRUE'
+        raise SOQLError(f"Unsupported literal {value!r}")
+
+
+def parse_soql(soql):
+    """Parse a SOQL statement into a ParsedQuery."""
+    parser = _Parser(_tokenize(soql))
+    query = parser.parse_query()
+    if parser.peek()[0] is not None:
+        raise SOQLError(f"Unexpected trailing input {parser.peek()[1]!r}")
+    return query
+
+
+class SOQLEngine:
+    """Evaluate SOQL against a dict of SObjectTables keyed by object name."""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, name):
+        try:
+            return self.tables[name]
+        except KeyError:
+            raise SOQLError(f"sObject type '{name}' is not supported") from None
+
+    # -- column resolution ---------------------------------------------------
+
+    def _resolve(self, object_name, path, positions):
+        """Return the values of a dotted path for the given row positions of an object.
+
+        Positions of -1 (a null lookup along the path) yield nulls.
+        """
+        table = self.table(object_name)
+        parts = path.split('.')
+        for relationship in parts[:-1]:
+            if relationship not in table.relationships:
+                raise SOQLError(f"No relationship '{relationship}' on {table.name}")
+            foreign_key, target = table.relationships[relationship]
+            keys = table.frame[foreign_key].to_numpy(dtype=object)[np.maximum(positions, 0)]
+            keys = np.where(positions >= 0, keys, None)
+            table = self.table(target)
+            positions = table.id_index.get_indexer(pd.Index(keys, dtype=object))
+
+        leaf = parts[-1]
+        if leaf not in table.frame:
+            raise SOQLError(f"No such column '{leaf}' on entity '{table.name}'")
+        column = table.frame[leaf]
+        values = column.iloc[np.maximum(positions, 0)].reset_index(drop=True) if len(column) else (
+            pd.Series([None] * len(positions), dtype=object))
+        return values.where(pd.Series(positions >= 0)), table, leaf
+
+    def _mask(self, expression, object_name, positions, include_deleted):
+        kind = expression[0]
+        if kind == 'and':
+            mask = np.ones(len(positions), dtype=bool)
+            for term in expression[1]:
+                mask &= self._mask(term, object_name, positions, include_deleted)
+            return mask
+        if kind == 'or':
+            mask = np.zeros(len(positions), dtype=bool)
+            for term in expression[1]:
+                mask |= self._mask(term, object_name, positions, include_deleted)
+            return mask
+        if kind == 'not':
+            return ~self._mask(expression[1], object_name, positions, include_deleted)
+
+        values, _, _ = self._resolve(object_name, expression[1], positions)
+        if kind == 'in':
+            _, _, negate, candidates = expression
+            if isinstance(candidates, tuple) and candidates[0] == 'subquery':
+                candidates = self._subquery_values(candidates[1], include_deleted)
+            matched = values.isin(candidates).to_numpy()
+            return ~matched & values.notna().to_numpy() if negate else matched
+        if kind == 'like':
+            pattern = '^' + re.escape(expression[2]).replace('%', '.*').replace('_', '.') + '$'
+            return values.astype(object).fillna('').astype(str).str.match(pattern, case=False).to_numpy()
+
+        _, _, operator, literal = expression
+        if literal is None:
+            nulls = values.isna().to_numpy()
+            return nulls if operator == '=' else ~nulls
+        present = values.notna().to_numpy()
+        operations = {
+            '=': lambda: values == literal,
+            '!=': lambda: values != literal,
+            '<': lambda: values < literal,
+            '<=': lambda: values <= literal,
+            '>': lambda: values > literal,
+            '>=': lambda: values >= literal,
+        }
+        result = operations[operator]().fillna(False).to_numpy(dtype=bool)
+        return result & present if operator != '!=' else result | ~present
+
+    def _subquery_values(self, query, include_deleted):
+        if len(query.select) != 1 or query.select[0].aggregate:
+            raise SOQLError("Semi-join subqueries must select exactly one field")
+        positions = self._filter(query, include_deleted)
+        values, _, _ = self._resolve(query.object_name, query.select[0].path, positions)
+        return values.dropna().unique()
+
+    def _filter(self, query, include_deleted):
+        table = self.table(query.object_name)
+        positions = np.arange(len(table.frame))
+        if not include_deleted and 'IsDeleted' in table.frame:
+            positions = positions[~table.frame['IsDeleted'].to_numpy(dtype=bool)]
+        if query.where is not None:
+            positions = positions[self._mask(query.where, query.object_name, positions, include_deleted)]
+        return positions
+
+    # -- execution -------------------------------------------------------------
+
+    def execute(self, soql, include_deleted=False):
+        """Run a query and return ``(frame, query)``.
+
+        The frame has one column per selected path (or output name for aggregate
+        queries). ``COUNT()`` queries return a one-row frame with column ``count``.
+        """
+        query = parse_soql(soql)
+        positions = self._filter(query, include_deleted)
+
+        if query.is_count_only:
+            return pd.DataFrame({'count': [len(positions)]}), query
+        if query.is_aggregate:
+            return self._aggregate(query, positions), query
+
+        if query.order_by:
+            positions = self._order(query, positions)
+        if query.limit is not None:
+            positions = positions[:query.limit]
+
+        columns = {}
+        for item in query.select:
+            values, table, leaf = self._resolve(query.object_name, item.path, positions)
+            columns[item.path] = self._render(values, table, leaf)
+        return pd.DataFrame(columns), query
+
+    def _order(self, query, positions):
+        frame = pd.DataFrame({'_position': positions})
+        keys = []
+        for index, (path, ascending, nulls_first) in enumerate(query.order_by):
+            values, _, _ = self._resolve(query.object_name, path, positions)
+            frame[f'_key{index}'] = values.to_numpy()
+            keys.append((f'_key{index}', ascending, nulls_first))
+        # Stable sorts applied from the last key to the first give a multi-key order
+        for key, ascending, nulls_first in reversed(keys):
+            frame = frame.sort_values(key, ascending=ascending, na_position='first' if nulls_first else 'last',
+                                      kind='stable')
+        return frame['_position'].to_numpy()
+
+    def _aggregate(self, query, positions):
+        frame = pd.DataFrame({'_row': np.ones(len(positions), dtype='int64')})
+        group_keys = []
+        for index, path in enumerate(query.group_by):
+            values, table, leaf = self._resolve(query.object_name, path, positions)
+            frame[f'_group{index}'] = self._render(values, table, leaf).to_numpy()
+            group_keys.append(f'_group{index}')
+        for index, item in enumerate(query.select):
+            if item.aggregate and item.path:
+                values, _, _ = self._resolve(query.object_name, item.path, positions)
+                frame[f'_agg{index}'] = values.to_numpy()
+
+        if group_keys:
+            grouped = frame.groupby(group_keys, dropna=False, sort=False)
+        else:
+            grouped = frame.assign(_all=0).groupby('_all')
+
+        output = {}
+        expression_number = 0
+        for index, item in enumerate(query.select):
+            if not item.aggregate:
+                if item.path not in query.group_by:
+                    raise SOQLError(f"Field {item.path} must be grouped or aggregated")
+                key = group_keys[query.group_by.index(item.path)]
+                output[item.alias or item.path.split('.')[-1]] = grouped[key].first()
+                continue
+            # Unaliased aggregates are named expr0, expr1, ... like the REST API does
+            name = item.alias or f'expr{expression_number}'
+            expression_number += 1
+            column = f'_agg{index}'
+            if item.aggregate == 'COUNT':
+                output[name] = grouped[column].count() if item.path else grouped['_row'].sum()
+            elif item.aggregate == 'COUNT_DISTINCT':
+                output[name] = grouped[column].nunique()
+            else:
+                output[name] = grouped[column].agg('mean' if item.aggregate == 'AVG' else item.aggregate.lower())
+
+        result = pd.DataFrame(output).reset_index(drop=True)
+        if query.limit is not None:
+            result = result.head(query.limit)
+        return result.astype(object).where(result.notna(), None)
+
+    @staticmethod
+    def _render(values, table, leaf):
+        """Format values the way the REST API serializes them."""
+        if leaf in table.date_fields:
+            return values.dt.strftime('%Y-%m-%d').astype(object).where(values.notna(), None)
+        if leaf in table.datetime_fields:
+            return values.dt.strftime('%Y-%m-%dT%H:%M:%S.000+0000').astype(object).where(values.notna(), None)
+        return values.astype(object).where(values.notna(), None)
@@ -0,0 +1,46 @@
+"""Shared fixtures: a small synthetic org and an offline client answering SOQL from it."""
+import os
+import sys
+
+# Keep the process-wide caches in memory; the modules read these when first used
+os.environ['SF_DIMENSION_DIR'] = ''
+os.environ['SF_WINDOW_CACHE_DIR'] = ''
+os.environ['SF_SNAPSHOT_DIR'] = ''
+os.environ['SF_PREFETCH_INTERVAL'] = '0'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from dimension_cache import DIMENSION_SPECS, get_dimension_table  # noqa: E402
+from fake_salesforce import SyntheticOrg, SyntheticSalesforce  # noqa: E402
+from query_metrics import get_query_log  # noqa: E402
+from soql_cache import get_soql_cache  # noqa: E402
+
+
+@pytest.fixture
+def org():
+    return SyntheticOrg(policies=2000, managers=12, producers=20, carriers=8, referrers=30, today='2026-01-15')
+
+
+@pytest.fixture
+def sf(org):
+    return SyntheticSalesforce(org)
+
+
+@pytest.fixture(autouse=True)
+def cold_caches():
+    """Start every test without cached results, dimension rows or logged statements."""
+    get_soql_cache().clear()
+    for name in DIMENSION_SPECS:
+        get_dimension_table(name).invalidate()
+    get_query_log().clear()
+    yield
+
+
+def statements(object_name=None, source='rest'):
+    """Return the SOQL statements logged so far, optionally only those over ``object_name``."""
+    return [
+        record.soql for record in get_query_log().records()
+        if record.source == source and (object_name is None or record.object == object_name)
+    ]
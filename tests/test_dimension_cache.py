@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from conftest import statements
+from dimension_cache import DIMENSION_SPECS, DimensionTable
+
+
+def account_manager_table():
+    return DimensionTable('account_manager', **DIMENSION_SPECS['account_manager'])
+
+
+def expire_refresh(table):
+    table._meta['last_refresh'] = '2000-01-01T00:00:00+00:00'
+
+
+def test_encode_returns_stable_codes_and_minus_one_for_misses(org, sf):
+    table = account_manager_table()
+    accounts = org.tables['Account'].frame
+    managed = accounts.loc[accounts['Account_Manager__c'].notna(), 'Id'].tolist()[:5]
+    unmanaged = accounts.loc[accounts['Account_Manager__c'].isna(), 'Id'].tolist()[:2]
+
+    codes = table.encode(sf, managed + unmanaged + [managed[0]])
+    later = table.encode(sf, [managed[0], 'not-an-id'])
+
+    assert codes.dtype == np.int32
+    assert (codes[:5] >= 0).all() and (codes[5:7] == -1).all()
+    assert codes[7] == codes[0] == later[0]
+    assert later[1] == -1
+    managers = org.tables['User'].frame.set_index('Id')['Name']
+    expected = managers.reindex(accounts.set_index('Id').loc[managed, 'Account_Manager__c']).tolist()
+    assert table.decode(codes[:5]).tolist() == expected
+
+
+def test_misses_are_remembered_instead_of_re_queried(org, sf):
+    table = account_manager_table()
+    accounts = org.tables['Account'].frame
+    unmanaged = accounts.loc[accounts['Account_Manager__c'].isna(), 'Id'].tolist()[:3]
+
+    table.lookup(sf, unmanaged)
+    table.lookup(sf, unmanaged)
+
+    assert len(statements('Account')) == 1
+    assert table.stats()['misses'] == 3
+
+
+def test_refresh_picks_up_a_renamed_manager(org, sf):
+    table = account_manager_table()
+    accounts = org.tables['Account'].frame
+    account_id, manager_id = accounts.loc[accounts['Account_Manager__c'].notna(), ['Id', 'Account_Manager__c']].iloc[0]
+    table.lookup(sf, [account_id])
+
+    # Renaming the User leaves the Account's own SystemModstamp untouched
+    users = org.tables['User'].frame
+    renamed = users['Id'] == manager_id
+    users.loc[renamed, 'Name'] = 'Renamed Manager'
+    users.loc[renamed, 'SystemModstamp'] = pd.Timestamp.now() + pd.Timedelta(days=1)
+    expire_refresh(table)
+
+    assert table.lookup(sf, [account_id]) == {account_id: 'Renamed Manager'}
+    assert table.last_refresh_info['mode'] == 'delta'
+
+
+def test_preloaded_misses_are_rechecked_on_refresh(org, sf):
+    carriers = DimensionTable('carrier', **DIMENSION_SPECS['carrier'])
+    insured_id = org.tables['Account'].frame['Id'].iloc[0]
+    assert carriers.lookup(sf, [insured_id]) == {}
+
+    # Becoming a renewing carrier changes an Opportunity, not the Account
+    org.tables['Opportunity'].frame.loc[0, 'Renewing_Carrier__c'] = insured_id
+    expire_refresh(carriers)
+
+    assert carriers.lookup(sf, [insured_id]) == {insured_id: org.tables['Account'].frame['Name'].iloc[0]}
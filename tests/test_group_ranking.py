@@ -0,0 +1,52 @@
+import pandas as pd
+
+from group_ranking import group_ranking, rank_within_groups, top_keys
+
+
+def policies():
+    return pd.DataFrame({
+        'AccountManager': ['Ann', 'Ann', 'Ann', 'Ann', 'Ann', 'Bob', 'Bob', 'Bob'],
+        'PolicyType': ['Flood', 'Auto', 'Auto', 'Flood', 'Boat', 'Umbrella', 'Auto', 'Umbrella'],
+        'Premium': [100.0, 50.0, 25.0, 10.0, 500.0, 5.0, 7.0, 5.0],
+    })
+
+
+def test_counts_rank_largest_first_with_ties_in_first_appearance_order():
+    ranked = rank_within_groups(policies(), 'AccountManager', 'PolicyType')
+
+    ann = ranked[ranked['AccountManager'] == 'Ann']
+    # Flood and Auto both have two policies; Flood appears first, like value_counts
+    assert ann['PolicyType'].tolist() == ['Flood', 'Auto', 'Boat']
+    assert ann['Count'].tolist() == [2, 2, 1]
+    assert ann['Rank'].tolist() == [1, 2, 3]
+
+
+def test_matches_value_counts_per_group():
+    frame = policies()
+    ranked = rank_within_groups(frame, 'AccountManager', 'PolicyType')
+
+    for manager, rows in frame.groupby('AccountManager'):
+        expected = rows['PolicyType'].value_counts()
+        assert group_ranking(ranked, 'AccountManager', manager, 'PolicyType').to_dict() == expected.to_dict()
+        assert group_ranking(ranked, 'AccountManager', manager, 'PolicyType').index.tolist() == expected.index.tolist()
+
+
+def test_top_n_keeps_the_first_n_keys_of_each_group():
+    ranked = rank_within_groups(policies(), 'AccountManager', 'PolicyType', n=1)
+
+    assert top_keys(ranked, 'AccountManager', 'PolicyType').to_dict() == {'Ann': 'Flood', 'Bob': 'Umbrella'}
+
+
+def test_value_column_is_summed_and_ranked():
+    ranked = rank_within_groups(policies(), 'AccountManager', 'PolicyType', value='Premium', n=2)
+
+    ann = group_ranking(ranked, 'AccountManager', 'Ann', 'PolicyType')
+    assert ann.name == 'Premium'
+    assert ann.to_dict() == {'Boat': 500.0, 'Flood': 110.0}
+
+
+def test_empty_frame_returns_the_ranking_columns():
+    ranked = rank_within_groups(policies().iloc[0:0], 'AccountManager', 'PolicyType')
+
+    assert ranked.empty
+    assert list(ranked.columns) == ['AccountManager', 'PolicyType', 'Count', 'Rank']
@@ -0,0 +1,67 @@
+import pandas as pd
+
+from snapshot_store import SNAPSHOT_STATUSES, PolicySnapshotStore, expand_snapshot
+
+
+def touch(org, ids, **changes):
+    """Edit policies in the synthetic org and move their SystemModstamp past every existing stamp."""
+    policies = org.tables['InsurancePolicy'].frame
+    rows = policies['Id'].isin(ids)
+    for field, value in changes.items():
+        policies.loc[rows, field] = value
+    policies.loc[rows, 'SystemModstamp'] = org.today + pd.Timedelta(days=1)
+
+
+def in_scope_ids(org):
+    policies = org.tables['InsurancePolicy'].frame
+    return policies.loc[policies['Status'].isin(SNAPSHOT_STATUSES), 'Id'].tolist()
+
+
+def test_first_sync_loads_every_policy_in_scope(org, sf, tmp_path):
+    store = PolicySnapshotStore(str(tmp_path), min_sync_interval=0)
+
+    frame = store.sync(sf)
+
+    assert store.last_sync_info['mode'] == 'full/rest'
+    assert sorted(frame['Id']) == sorted(in_scope_ids(org))
+    assert store.metadata['row_count'] == len(frame)
+
+
+def test_delta_sync_applies_updates_and_drops_deleted_and_out_of_scope_rows(org, sf, tmp_path):
+    store = PolicySnapshotStore(str(tmp_path), min_sync_interval=0)
+    before = store.sync(sf)
+    updated, cancelled, deleted = in_scope_ids(org)[:3]
+
+    touch(org, [updated], Total_Policy_Premium__c=12345.67)
+    touch(org, [cancelled], Status='Cancelled')
+    touch(org, [deleted], IsDeleted=True)
+    after = store.sync(sf)
+
+    assert store.last_sync_info['mode'] == 'delta'
+    # The changed rows, plus any re-read from the watermark second
+    assert 3 <= store.last_sync_info['rows_fetched'] < 10
+    assert set(before['Id']) - set(after['Id']) == {cancelled, deleted}
+    assert len(after) == len(before) - 2
+    row = expand_snapshot(after[after['Id'] == updated])
+    assert row['Total_Policy_Premium__c'].tolist() == [12345.67]
+    assert store.metadata['watermark'].startswith('2026-01-16T00:00:00')
+
+
+def test_delta_without_changes_keeps_the_snapshot(org, sf, tmp_path):
+    store = PolicySnapshotStore(str(tmp_path), min_sync_interval=0)
+    before = store.sync(sf)
+
+    after = store.sync(sf)
+
+    assert store.last_sync_info['mode'] == 'delta'
+    assert sorted(after['Id']) == sorted(before['Id'])
+
+
+def test_a_new_process_resumes_from_disk_with_a_delta(org, sf, tmp_path):
+    frame = PolicySnapshotStore(str(tmp_path), min_sync_interval=0).sync(sf)
+
+    reopened = PolicySnapshotStore(str(tmp_path))
+    restored = reopened.sync(sf)
+
+    assert reopened.last_sync_info['mode'] == 'delta'
+    assert sorted(restored['Id']) == sorted(frame['Id'])
@@ -0,0 +1,59 @@
+import time
+
+from conftest import statements
+from soql_cache import (
+    SOQLResultCache, cached_query_frame, estimate_result_size, get_soql_cache, normalize_soql, soql_fingerprint,
+)
+
+PRODUCER_QUERY = "SELECT Id, Name FROM Producer WHERE Name LIKE 'Producer 01%'"
+
+
+def test_fingerprint_ignores_whitespace_and_keyword_case_but_not_literals():
+    query = "SELECT Id FROM Account WHERE Name IN ('Acme', 'Beta')"
+
+    assert normalize_soql("select   id\nfrom account where name in ( 'Acme','Beta' )") == normalize_soql(query)
+    assert soql_fingerprint(query) == soql_fingerprint(query.replace(' FROM ', '\n  from '))
+    assert soql_fingerprint(query) != soql_fingerprint(query.replace("'Acme'", "'ACME'"))
+    assert soql_fingerprint(query) != soql_fingerprint(query, include_deleted=True)
+
+
+def test_cached_frame_queries_once_and_logs_the_hit(sf):
+    first = cached_query_frame(sf, PRODUCER_QUERY, ['Id', 'Name'])
+    second = cached_query_frame(sf, PRODUCER_QUERY.replace(' FROM ', '\n    FROM '), ['Id', 'Name'])
+
+    assert len(statements('Producer')) == 1
+    assert len(statements('Producer', source='cache')) == 1
+    assert second.equals(first)
+    assert get_soql_cache().stats()['hits'] == 1
+
+
+def test_cached_frames_are_keyed_by_their_fields(sf):
+    cached_query_frame(sf, PRODUCER_QUERY, ['Id', 'Name'])
+    names_only = cached_query_frame(sf, PRODUCER_QUERY, ['Name'])
+
+    assert list(names_only.columns) == ['Name']
+    assert len(statements('Producer')) == 2
+
+
+def test_entries_expire_after_their_ttl():
+    cache = SOQLResultCache(ttl=60)
+    cache.put('short', {'records': []}, ttl=0.01)
+    cache.put('long', {'records': []})
+    time.sleep(0.02)
+
+    assert cache.get('short') is None
+    assert cache.get('long') == {'records': []}
+    assert cache.stats()['expirations'] == 1
+
+
+def test_least_recently_used_entries_are_evicted_over_budget():
+    result = {'records': [{'Id': 'x' * 40}]}
+    cache = SOQLResultCache(max_bytes=int(estimate_result_size(result) * 2.5))
+    cache.put('a', result)
+    cache.put('b', result)
+    cache.get('a')
+    cache.put('c', result)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats()['evictions'] == 1
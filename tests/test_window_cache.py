@@ -0,0 +1,97 @@
+import datetime
+
+import pytest
+
+from policy_loader import PolicyLoadError, fetch_policy_window
+from window_cache import WindowCache
+from workload import build_workload_cube
+
+FEBRUARY = (datetime.date(2026, 2, 1), datetime.date(2026, 2, 28))
+QUARTER = (datetime.date(2026, 1, 1), datetime.date(2026, 3, 31))
+# Every synthetic policy expires before 2028
+THROUGH_2027 = (datetime.date(2026, 1, 1), datetime.date(2027, 12, 31))
+THROUGH_2030 = (datetime.date(2026, 1, 1), datetime.date(2030, 12, 31))
+
+
+class CountingFetch:
+    """Fetches windows from the synthetic org and remembers which ranges it was asked for."""
+
+    def __init__(self, sf):
+        self.sf = sf
+        self.ranges = []
+
+    def __call__(self, start_date, end_date):
+        self.ranges.append((start_date, end_date))
+        return fetch_policy_window(self.sf, start_date, end_date)
+
+
+def cache_window(cache, window, fetch):
+    assembly = cache.assemble(window, fetch)
+    cache.put(window, build_workload_cube(assembly.rows), rows=assembly.rows, fetched_at=assembly.fetched_at)
+    return assembly
+
+
+def test_cold_window_is_fetched_in_one_piece(sf):
+    fetch = CountingFetch(sf)
+
+    assembly = WindowCache().assemble(QUARTER, fetch)
+
+    assert fetch.ranges == [QUARTER]
+    assert assembly.reused == []
+    assert len(assembly.rows) == len(fetch_policy_window(sf, *QUARTER))
+
+
+def test_only_the_gaps_around_cached_windows_are_fetched(sf):
+    cache = WindowCache()
+    fetch = CountingFetch(sf)
+    cache_window(cache, FEBRUARY, fetch)
+    fetch.ranges.clear()
+
+    assembly = cache.assemble(QUARTER, fetch)
+
+    assert fetch.ranges == [
+        (datetime.date(2026, 1, 1), datetime.date(2026, 1, 31)),
+        (datetime.date(2026, 3, 1), datetime.date(2026, 3, 31)),
+    ]
+    assert [source for source, _ in assembly.reused] == [FEBRUARY]
+    direct = fetch_policy_window(sf, *QUARTER)
+    assert sorted(assembly.rows['PolicyId']) == sorted(direct['PolicyId'])
+    assert assembly.rows['ExpirationDate'].is_monotonic_decreasing
+
+
+def test_windows_with_empty_gaps_are_cached(sf):
+    cache = WindowCache()
+    fetch = CountingFetch(sf)
+    cache_window(cache, THROUGH_2027, fetch)
+
+    assembly = cache_window(cache, THROUGH_2030, fetch)
+    assert assembly.fetched == [(datetime.date(2028, 1, 1), datetime.date(2030, 12, 31), 0)]
+    fetch.ranges.clear()
+    again = cache.assemble(THROUGH_2030, fetch)
+
+    assert fetch.ranges == []
+    assert [source for source, _ in again.reused] == [THROUGH_2030]
+    assert len(again.rows) == len(assembly.rows)
+
+
+def test_failed_fetches_raise_and_cache_nothing(sf):
+    cache = WindowCache()
+
+    def failing(start_date, end_date):
+        raise PolicyLoadError("Salesforce is unavailable")
+
+    with pytest.raises(PolicyLoadError):
+        cache.assemble(QUARTER, failing)
+    assert cache.get(QUARTER) is None
+    assert not cache.covers(QUARTER)
+
+
+def test_max_age_zero_refetches_cached_ranges(sf):
+    cache = WindowCache()
+    fetch = CountingFetch(sf)
+    cache_window(cache, FEBRUARY, fetch)
+    fetch.ranges.clear()
+
+    cache.assemble(QUARTER, fetch, max_age=0)
+
+    assert fetch.ranges == [QUARTER]
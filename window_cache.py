@@ -0,0 +1,339 @@
+"""Process-wide cache of loaded expiration windows for the workload dashboard.
+
+An entry is keyed only by the (start_date, end_date) window that decides which
+policies Salesforce returns. It holds the ``WorkloadCube`` every view is sliced
+from and, when the window was loaded row by row, the policy rows themselves
+(compacted) for the raw data table. View, table and core-lines widgets are
+applied to a cached entry instead of triggering another fetch.
+
+Entries expire after SF_WINDOW_CACHE_TTL seconds (default 900) and the least
+recently used window is evicted beyond SF_WINDOW_CACHE_ENTRIES (default 8).
+Entries are shared between sessions and must be treated as read-only.
+
+Windows loaded row by row are also written as Parquet to SF_WINDOW_CACHE_DIR
+(default ``.sf_snapshot``; empty disables), so a window pre-warmed by another
+process -- e.g. ``prefetch.py`` run from cron -- is picked up on first use.
+
+Expiration windows overlap heavily ("Next 30 Days" lies inside "Next 90 Days",
+which mostly lies inside "Current Year"), so ``assemble`` serves a new window by
+filtering the cached windows that cover it and fetches only the uncovered date
+ranges.
+"""
+import datetime
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from frame_compaction import compact_frame, expand_frame
+from workload import build_workload_cube, prepare_policy_frame
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+@dataclass
+class WindowEntry:
+    """One loaded expiration window."""
+
+    window: tuple
+    cube: object
+    rows: object = None
+    fetched_at: float = field(default_factory=time.time)
+
+    @property
+    def complete(self):
+        """True when the cube was built from policy rows and can answer every view."""
+        return self.cube.complete
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def policy_rows(self):
+        """Return the cached policy rows with their usual dtypes, or None for aggregate-only entries."""
+        return None if self.rows is None else expand_frame(self.rows)
+
+
+@dataclass
+class WindowAssembly:
+    """Policy rows for a window, put together from cached windows and freshly fetched gaps.
+
+    A gap that returned no rows simply has no expiring policies; failed fetches raise
+    out of ``WindowCache.assemble`` instead, so every assembly can be cached.
+    """
+
+    rows: object
+    fetched_at: float
+    reused: list = field(default_factory=list)
+    fetched: list = field(default_factory=list)
+
+
+def _date_rows(rows, start_date, end_date):
+    """Return the rows expiring between the two dates (inclusive)."""
+    expiration = rows['ExpirationDate']
+    mask = (expiration >= pd.Timestamp(start_date)) & (expiration < pd.Timestamp(end_date + datetime.timedelta(days=1)))
+    return rows[mask]
+
+
+class WindowCache:
+    """TTL + LRU bounded cache of WindowEntries keyed by (start_date, end_date)."""
+
+    def __init__(self, ttl=900, max_entries=8, directory=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # -- storage -----------------------------------------------------------
+
+    def _paths(self, window):
+        name = f"window_{window[0]:%Y%m%d}_{window[1]:%Y%m%d}"
+        return os.path.join(self.directory, f"{name}.parquet"), os.path.join(self.directory, f"{name}.meta.json")
+
+    def _read_disk(self, window):
+        """Load a persisted window if present and still fresh, ignoring missing or corrupt files."""
+        if self.directory is None:
+            return None
+        data_path, meta_path = self._paths(window)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as fh:
+                meta = json.load(fh)
+            if time.time() - meta['fetched_at'] > self.ttl:
+                return None
+            rows = pd.read_parquet(data_path)
+        except Exception:
+            return None
+        return WindowEntry(window, build_workload_cube(expand_frame(rows)), rows, meta['fetched_at'])
+
+    def _write_disk(self, entry):
+        """Atomically persist a window's rows and metadata, dropping expired windows.
+
+        Runs without the cache lock, so concurrent writers use their own temporary files.
+        """
+        if self.directory is None or entry.rows is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        data_path, meta_path = self._paths(entry.window)
+        suffix = f".{uuid.uuid4().hex}.tmp"
+        entry.rows.to_parquet(data_path + suffix, index=False)
+        with open(meta_path + suffix, 'w', encoding='utf-8') as fh:
+            json.dump({
+                'window': [entry.window[0].isoformat(), entry.window[1].isoformat()],
+                'fetched_at': entry.fetched_at,
+                'rows': len(entry.rows),
+            }, fh)
+        os.replace(data_path + suffix, data_path)
+        os.replace(meta_path + suffix, meta_path)
+        self._prune_disk()
+
+    def _prune_disk(self, everything=False):
+        for meta_path in glob.glob(os.path.join(self.directory, 'window_*.meta.json')):
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as fh:
+                    expired = everything or time.time() - json.load(fh)['fetched_at'] > self.ttl
+            except Exception:
+                expired = True
+            if expired:
+                for path in (meta_path, meta_path[:-len('.meta.json')] + '.parquet'):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+    # -- cache -------------------------------------------------------------
+
+    def get(self, window, complete=True):
+        """Return the fresh entry for ``window`` or None; ``complete=False`` also accepts aggregate-only entries."""
+        with self._lock:
+            entry = self._entries.get(window)
+            if entry is not None and entry.age > self.ttl:
+                del self._entries[window]
+                entry = None
+            if entry is None or (complete and not entry.complete):
+                entry = self._read_disk(window)
+                if entry is None:
+                    self.misses += 1
+                    return None
+                self._store(entry)
+            self._entries.move_to_end(window)
+            self.hits += 1
+            return entry
+
+    def _store(self, entry):
+        self._entries[entry.window] = entry
+        self._entries.move_to_end(entry.window)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, window, cube, rows=None, fetched_at=None):
+        """Store a freshly loaded window; an aggregate-only cube never replaces a complete one."""
+        entry = WindowEntry(window, cube, None if rows is None else compact_frame(rows, categorical='auto'))
+        if fetched_at is not None:
+            entry.fetched_at = fetched_at
+        with self._lock:
+            current = self._entries.get(window)
+            if current is not None and current.complete and not entry.complete and current.age <= self.ttl:
+                return current
+            self._store(entry)
+        # Persisting can take a while for large windows; readers are not blocked meanwhile
+        self._write_disk(entry)
+        return entry
+
+    def _cached_windows(self, max_age, fresh_since=None):
+        """Return the complete windows held in memory or on disk that are fresh enough to reuse.
+
+        A window qualifies when it is no older than ``max_age`` seconds or, within the TTL,
+        was fetched at or after the ``fresh_since`` timestamp.
+        """
+        def fresh(fetched_at):
+            age = time.time() - fetched_at
+            return age <= max_age or (fresh_since is not None and fetched_at >= fresh_since and age <= self.ttl)
+
+        with self._lock:
+            windows = {window for window, entry in self._entries.items()
+                       if entry.complete and entry.rows is not None and fresh(entry.fetched_at)}
+        if self.directory is not None:
+            for meta_path in glob.glob(os.path.join(self.directory, 'window_*.meta.json')):
+                try:
+                    with open(meta_path, 'r', encoding='utf-8') as fh:
+                        meta = json.load(fh)
+                except Exception:
+                    continue
+                if fresh(meta['fetched_at']):
+                    windows.add(tuple(datetime.date.fromisoformat(day) for day in meta['window']))
+        return windows
+
+    def plan(self, window, max_age=None, fresh_since=None):
+        """Split ``window`` into date ranges served by cached windows and gaps to fetch.
+
+        Returns ``[(source_window or None, start_date, end_date)]`` in date order. Only
+        windows at most ``max_age`` seconds old (default: the TTL), or fetched at or after
+        ``fresh_since``, are used. Each range is
+        taken from the cached window that reaches furthest past its start, so the ranges
+        never overlap and no policy is counted twice.
+        """
+        start_date, end_date = window
+        candidates = self._cached_windows(self.ttl if max_age is None else min(max_age, self.ttl), fresh_since)
+        one_day = datetime.timedelta(days=1)
+        pieces = []
+        cursor = start_date
+        while cursor <= end_date:
+            containing = [candidate for candidate in candidates if candidate[0] <= cursor <= candidate[1]]
+            if containing:
+                source = max(containing, key=lambda candidate: candidate[1])
+                piece_end = min(source[1], end_date)
+            else:
+                source = None
+                next_start = min((candidate[0] for candidate in candidates if candidate[0] > cursor), default=None)
+                piece_end = end_date if next_start is None or next_start > end_date else next_start - one_day
+            pieces.append((source, cursor, piece_end))
+            cursor = piece_end + one_day
+        return pieces
+
+    def covers(self, window):
+        """True when cached windows cover ``window`` entirely, so it can be assembled without a fetch."""
+        return all(source is not None for source, _, _ in self.plan(window))
+
+    def assemble(self, window, fetch, max_age=None, fresh_since=None):
+        """Return a WindowAssembly for ``window``, fetching only what cached windows do not cover.
+
+        ``fetch(start_date, end_date)`` loads the prepared policy rows of one date range
+        (empty when none expire in it) and raises when the range could not be loaded; the
+        error propagates, so a failed fetch is never mistaken for an empty range.
+        ``max_age`` limits which cached windows may be reused (0 fetches everything),
+        except that windows fetched at or after ``fresh_since`` -- e.g. earlier in the
+        same prefetch cycle -- are always reused. The assembly's ``fetched_at`` is that
+        of its oldest part.
+        """
+        pieces = self.plan(window, max_age, fresh_since)
+        if len(pieces) == 1 and pieces[0][0] is None:
+            rows = fetch(*window)
+            return WindowAssembly(rows, time.time(), fetched=[(window[0], window[1], len(rows))])
+
+        assembly = WindowAssembly(None, time.time())
+        frames = []
+        for source, piece_start, piece_end in pieces:
+            entry = self.get(source) if source is not None else None
+            if entry is not None:
+                rows = expand_frame(_date_rows(entry.rows, piece_start, piece_end))
+                assembly.reused.append((source, len(rows)))
+                assembly.fetched_at = min(assembly.fetched_at, entry.fetched_at)
+            else:
+                # The source expired since planning; fetch its range instead
+                rows = fetch(piece_start, piece_end)
+                assembly.fetched.append((piece_start, piece_end, len(rows)))
+            if not rows.empty:
+                frames.append(rows)
+
+        if not frames:
+            assembly.rows = pd.DataFrame()
+            return assembly
+        rows = pd.concat(frames, ignore_index=True)
+        # Match a single fetch: newest expirations first, month labels as categoricals
+        rows = rows.sort_values('ExpirationDate', ascending=False, kind='stable', ignore_index=True)
+        assembly.rows = prepare_policy_frame(rows)
+        return assembly
+
+    def invalidate(self, window=None):
+        """Forget one window, or every window when ``window`` is None, in memory and on disk."""
+        with self._lock:
+            if window is None:
+                self._entries.clear()
+                if self.directory is not None:
+                    self._prune_disk(everything=True)
+                return
+            self._entries.pop(window, None)
+            if self.directory is not None:
+                for path in self._paths(window):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def stats(self):
+        """Return hit/miss counters and the cached windows with their ages."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'windows': [(window, round(entry.age, 1), entry.complete) for window, entry in self._entries.items()],
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_window_directory():
+    """Return where loaded windows persist (SF_WINDOW_CACHE_DIR), or None for memory only."""
+    if not PARQUET_AVAILABLE:
+        return None
+    return os.getenv('SF_WINDOW_CACHE_DIR', '.sf_snapshot') or None
+
+
+def get_window_cache():
+    """Return the process-wide window cache (SF_WINDOW_CACHE_TTL / SF_WINDOW_CACHE_ENTRIES / SF_WINDOW_CACHE_DIR)."""
+    global _cache
+    directory = get_window_directory()
+    with _cache_lock:
+        if _cache is None or _cache.directory != directory:
+            _cache = WindowCache(
+                ttl=int(os.getenv("SF_WINDOW_CACHE_TTL", "900")),
+                max_entries=int(os.getenv("SF_WINDOW_CACHE_ENTRIES", "8")),
+                directory=directory,
+            )
+        return _cache
@@ -0,0 +1,181 @@
+"""Keeps the dashboard's predefined expiration windows warm in the window cache.
+
+``prefetch_windows`` loads each predefined window (Next 30/60/90 Days, Current/
+Next Quarter, Current Year) whose cached entry is missing or older than the
+refresh interval, and stores it in the process-wide ``WindowCache`` -- and so on
+disk, for other processes. ``prefetch.py`` runs it from the command line or cron.
+``WindowPrefetcher`` runs it on a daemon thread inside the dashboard process, but
+only when SF_PREFETCH_INTERVAL is set to a positive number of seconds (e.g. 600).
+It is off by default, since every cycle re-extracts each predefined window,
+including Current Year, from the live org for as long as the process runs.
+
+Windows are resolved against the current date on every cycle, so "Next 30 Days"
+moves with the calendar. The longest windows load first, so the shorter ones are
+mostly assembled from them by the window cache without another fetch. Each
+window's last refresh is kept as ``WindowStatus`` for staleness reporting.
+"""
+import datetime
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from policy_loader import fetch_policy_window
+from query_metrics import query_scope, start_query_run
+from sf_session import get_session_manager
+from window_cache import get_window_cache
+from workload import PREDEFINED_WINDOWS, build_workload_cube, resolve_window
+
+
+@dataclass
+class WindowStatus:
+    """Outcome of the last prefetch of one predefined window."""
+
+    period: str
+    window: tuple
+    refreshed_at: float = 0.0
+    seconds: float = 0.0
+    rows: int = 0
+    skipped: bool = False
+    error: str = ''
+
+    @property
+    def age(self):
+        return time.time() - self.refreshed_at if self.refreshed_at else None
+
+
+def prefetch_window(period, max_age=0, today=None, sf=None, cache=None, fresh_since=None):
+    """Load one predefined window into the window cache unless a fresh enough entry exists.
+
+    ``max_age`` is how old (seconds) a cached entry may be before it is reloaded;
+    0 always reloads. Windows fetched at or after ``fresh_since`` (the start of the
+    current prefetch cycle) count as fresh regardless of ``max_age``.
+    """
+    cache = cache or get_window_cache()
+    window = resolve_window(period, today)
+    status = WindowStatus(period, window)
+
+    entry = cache.get(window)
+    if entry is not None and (entry.age < max_age or (fresh_since is not None and entry.fetched_at >= fresh_since)):
+        status.refreshed_at, status.rows, status.skipped = entry.fetched_at, len(entry.rows), True
+        return status
+
+    def fetch(start_date, end_date):
+        client = sf or get_session_manager().get_client()
+        # Raises PolicyLoadError on failure, so an empty range is never mistaken for one
+        return fetch_policy_window(client, start_date, end_date)
+
+    started = time.perf_counter()
+    try:
+        with query_scope(period):
+            # Windows fresher than max_age, or loaded earlier in this cycle, are reused
+            assembly = cache.assemble(window, fetch, max_age=max_age, fresh_since=fresh_since)
+    except Exception as e:
+        status.seconds = time.perf_counter() - started
+        status.error = str(e)
+        return status
+    status.seconds = time.perf_counter() - started
+
+    rows = assembly.rows
+    if rows.empty:
+        # No policies expire in the window; there is nothing to keep warm
+        return status
+    entry = cache.put(window, build_workload_cube(rows), rows=rows, fetched_at=assembly.fetched_at)
+    status.refreshed_at, status.rows = entry.fetched_at, len(rows)
+    return status
+
+
+def longest_first(periods, today=None):
+    """Order periods by window length, longest first, so shorter windows can reuse them."""
+    def length(period):
+        start_date, end_date = resolve_window(period, today)
+        return (end_date - start_date).days
+    return sorted(periods, key=length, reverse=True)
+
+
+def prefetch_windows(periods=None, max_age=0, today=None):
+    """Prefetch each of ``periods`` (default: every predefined window); returns their WindowStatus.
+
+    Even a forced reload (``max_age=0``) reuses the windows loaded earlier in the same call,
+    so the shorter windows are assembled from the longer ones loaded first.
+    """
+    start_query_run('prefetch')
+    today = today or datetime.date.today()
+    cycle_start = time.time()
+    return [prefetch_window(period, max_age=max_age, today=today, fresh_since=cycle_start)
+            for period in longest_first(periods or PREDEFINED_WINDOWS, today)]
+
+
+class WindowPrefetcher:
+    """Daemon thread refreshing the predefined windows every ``interval`` seconds."""
+
+    def __init__(self, interval=600, periods=None):
+        self.interval = interval
+        self.periods = list(periods or PREDEFINED_WINDOWS)
+        self._status = {}
+        self._lock = threading.Lock()
+        self._loading = None
+        self._idle = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='window-prefetch', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        start_query_run('prefetch')
+        while not self._stop.is_set():
+            today = datetime.date.today()
+            cycle_start = time.time()
+            for period in longest_first(self.periods, today):
+                if self._stop.is_set():
+                    return
+                with self._lock:
+                    self._loading = resolve_window(period, today)
+                try:
+                    # Entries loaded within the last interval (by the dashboard or a previous cycle) are kept
+                    status = prefetch_window(period, max_age=self.interval, today=today, fresh_since=cycle_start)
+                finally:
+                    with self._lock:
+                        self._loading = None
+                        self._idle.notify_all()
+                with self._lock:
+                    self._status[period] = status
+            self._stop.wait(self.interval)
+
+    def wait_for(self, window, timeout=120):
+        """Block while the worker is loading ``window``; returns True if it had to wait."""
+        with self._lock:
+            if self._loading != window:
+                return False
+            self._idle.wait_for(lambda: self._loading != window, timeout=timeout)
+            return True
+
+    def status(self):
+        """Return the latest WindowStatus of each predefined window that has been prefetched."""
+        with self._lock:
+            return [self._status[period] for period in self.periods if period in self._status]
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher():
+    """Return the process-wide prefetcher, started on first use, or None unless SF_PREFETCH_INTERVAL > 0."""
+    global _prefetcher
+    interval = int(os.getenv("SF_PREFETCH_INTERVAL", "0") or 0)
+    if interval <= 0:
+        return None
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = WindowPrefetcher(interval=interval)
+        return _prefetcher.start()
@@ -0,0 +1,439 @@
+"""Workload computations behind the Account Manager Workload Dashboard.
+
+Pure functions over the policy frame built by ``load_balance.py`` (columns
+PolicyId, PolicyType, Status, ExpirationDate, AccountId, AccountManager, ...),
+the (AccountManager, PolicyType, Status) count frame, or the ``WorkloadCube``
+built once per fetch that every dashboard view is sliced from. Nothing here
+touches Streamlit or Salesforce, so results can be memoized, benchmarked,
+computed in background workers or reused from the command line.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from group_ranking import rank_within_groups, top_keys
+
+# Policy types counted at half weight in the core-lines workload
+HALF_WEIGHT_TYPES = ['Flood', 'Flood - CL', 'Flood - PL']
+
+# Weighting scheme the core-lines workload reports as WeightedCount
+DEFAULT_WEIGHTING_SCHEME = 'Standard'
+
+# The manager x month stacked chart is only readable for this many managers
+MAX_TIMELINE_MANAGERS = 15
+
+
+# Expiration windows offered by the dashboard's "Select Time Period" control
+PREDEFINED_WINDOWS = ["Next 30 Days", "Next 60 Days", "Next 90 Days", "Current Quarter", "Next Quarter", "Current Year"]
+
+
+def resolve_window(time_period, today=None):
+    """Return the (start_date, end_date) expiration window for a predefined time period."""
+    today = today or datetime.date.today()
+    if time_period == "Next 30 Days":
+        return today, today + datetime.timedelta(days=30)
+    if time_period == "Next 60 Days":
+        return today, today + datetime.timedelta(days=60)
+    if time_period == "Next 90 Days":
+        return today, today + datetime.timedelta(days=90)
+    if time_period == "Current Quarter":
+        current_quarter = (today.month - 1) // 3 + 1
+        start_date = datetime.date(today.year, (current_quarter - 1) * 3 + 1, 1)
+        if current_quarter == 4:
+            end_date = datetime.date(today.year, 12, 31)
+        else:
+            end_date = datetime.date(today.year, current_quarter * 3 + 1, 1) - datetime.timedelta(days=1)
+        return start_date, end_date
+    if time_period == "Next Quarter":
+        current_quarter = (today.month - 1) // 3 + 1
+        next_quarter = current_quarter + 1 if current_quarter < 4 else 1
+        next_year = today.year if current_quarter < 4 else today.year + 1
+        start_date = datetime.date(next_year, (next_quarter - 1) * 3 + 1, 1)
+        if next_quarter == 4:
+            end_date = datetime.date(next_year, 12, 31)
+        else:
+            end_date = datetime.date(next_year, next_quarter * 3 + 1, 1) - datetime.timedelta(days=1)
+        return start_date, end_date
+    if time_period == "Current Year":
+        return datetime.date(today.year, 1, 1), datetime.date(today.year, 12, 31)
+    raise ValueError(f"Unknown time period: {time_period}")
+
+
+def get_workload_thresholds():
+    """Return workload threshold configuration."""
+    return {
+        "extreme": {"min": 400, "color": "#e74c3c", "icon": "🔴", "label": "Extreme"},
+        "very_high": {"min": 350, "color": "#ff6b35", "icon": "🟠", "label": "Very High"},
+        "high": {"min": 200, "color": "#f39c12", "icon": "🟡", "label": "High"},
+        "optimal": {"min": 100, "color": "#2ecc71", "icon": "🟢", "label": "Optimal"},
+        "low": {"min": 0, "color": "#3498db", "icon": "🔵", "label": "Low"}
+    }
+
+
+def get_workload_category(count, thresholds):
+    """Determine workload category based on policy count."""
+    if count >= thresholds["extreme"]["min"]:
+        return "extreme"
+    elif count >= thresholds["very_high"]["min"]:
+        return "very_high"
+    elif count >= thresholds["high"]["min"]:
+        return "high"
+    elif count >= thresholds["optimal"]["min"]:
+        return "optimal"
+    else:
+        return "low"
+
+
+def band_workloads(counts, thresholds, capacity=None):
+    """Band policy counts into the threshold categories in one vectorized step.
+
+    ``counts`` may be plain or weighted counts of any length (e.g. every manager x
+    week). ``capacity`` optionally gives each count's capacity as a fraction of a
+    full workload (0.5 for a half-time manager); counts are divided by it, which is
+    the same as scaling every threshold by it. Returns a DataFrame aligned to
+    ``counts`` with WorkloadCategory (ordered categorical, lowest band first),
+    CategoryColor, CategoryIcon and CategoryLabel; missing counts get no category.
+    """
+    bands = sorted(thresholds, key=lambda name: thresholds[name]['min'])
+    edges = np.array([thresholds[name]['min'] for name in bands[1:]], dtype=float)
+    values = np.asarray(counts, dtype=float)
+    if capacity is not None:
+        values = values / np.asarray(capacity, dtype=float)
+
+    # A count equal to a band's minimum belongs to that band, hence side='right'
+    codes = np.searchsorted(edges, values, side='right')
+    codes[np.isnan(values)] = -1
+
+    def lookup(key):
+        table = np.array([thresholds[name][key] for name in bands] + [None], dtype=object)
+        return table[codes]
+
+    return pd.DataFrame({
+        'WorkloadCategory': pd.Categorical.from_codes(codes, categories=bands, ordered=True),
+        'CategoryColor': lookup('color'),
+        'CategoryIcon': lookup('icon'),
+        'CategoryLabel': lookup('label'),
+    }, index=counts.index if isinstance(counts, pd.Series) else None)
+
+
+def get_weighting_schemes():
+    """Return the weighting scheme table for the core-lines workload.
+
+    One row per rule (Scheme, Dimension, Value, Weight). A policy's weight under a
+    scheme is the product of the scheme's rules matching its PolicyType and Status;
+    a rule with no Dimension applies to every policy, and a dimension without a
+    matching rule contributes 1.0.
+    """
+    rules = [('Unweighted', None, None, 1.0)]
+    for scheme in (DEFAULT_WEIGHTING_SCHEME, 'Renewal Effort'):
+        rules += [(scheme, 'PolicyType', policy_type, 0.5) for policy_type in HALF_WEIGHT_TYPES]
+    rules += [
+        ('Renewal Effort', 'Status', 'Renewing', 1.5),
+        ('Renewal Effort', 'Status', 'Pending Cancellation', 1.5),
+        ('Renewal Effort', 'Status', 'Reinstating', 1.25),
+    ]
+    return pd.DataFrame(rules, columns=['Scheme', 'Dimension', 'Value', 'Weight'])
+
+
+def policy_weights(frame, schemes=None):
+    """Return one weight column per scheme for the rows of ``frame`` (PolicyType, Status, ...).
+
+    Each rule dimension is applied with a single vectorized map, so the cost does not
+    depend on how many policy types or managers there are.
+    """
+    schemes = get_weighting_schemes() if schemes is None else schemes
+    weights = pd.DataFrame(index=frame.index)
+    for scheme, scheme_rules in schemes.groupby('Scheme', sort=False):
+        weight = np.ones(len(frame))
+        for dimension, rules in scheme_rules.groupby('Dimension', sort=False, dropna=False):
+            if pd.isna(dimension):
+                weight *= rules['Weight'].prod()
+            else:
+                factors = dict(zip(rules['Value'], rules['Weight']))
+                weight *= frame[dimension].astype(object).map(factors).fillna(1.0).to_numpy(dtype=float)
+        weights[scheme] = weight
+    return weights
+
+
+def get_core_policy_types():
+    """Return a list of core policy types for analysis."""
+    return ["Personal Auto", "Commercial Auto", "Flood", "Flood - CL", "Flood - PL", "Homeowners", "Umbrella"]
+
+
+def prepare_policy_frame(df):
+    """Parse the date columns and add the EffectiveMonth / ExpirationMonth labels in place."""
+    df['EffectiveDate'] = pd.to_datetime(df['EffectiveDate'], errors='coerce')
+    df['ExpirationDate'] = pd.to_datetime(df['ExpirationDate'], errors='coerce')
+
+    # Month labels repeat on every row, so store them as categoricals
+    df['EffectiveMonth'] = df['EffectiveDate'].dt.strftime('%Y-%m').astype('category')
+    df['ExpirationMonth'] = df['ExpirationDate'].dt.strftime('%Y-%m').astype('category')
+    return df
+
+
+def filter_policy_types(df, policy_types):
+    """Keep only policies of the given types."""
+    if df.empty:
+        return df
+    return df[df['PolicyType'].isin(policy_types)]
+
+
+def summarize_policy_counts(df):
+    """Count policies per (AccountManager, PolicyType, Status), matching the aggregate query's shape.
+
+    Counts are in the order each combination first appears in ``df``.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=['AccountManager', 'PolicyType', 'Status', 'PolicyCount'])
+    return (
+        df.groupby(['AccountManager', 'PolicyType', 'Status'], dropna=False, sort=False)
+        .size()
+        .reset_index(name='PolicyCount')
+    )
+
+
+def portfolio_summary(policy_counts, unique_accounts):
+    """Return the headline metrics shown above every view."""
+    return {
+        'total_policies': int(policy_counts['PolicyCount'].sum()),
+        'active_policies': int(policy_counts.loc[policy_counts['Status'] == 'Active', 'PolicyCount'].sum()),
+        'unique_accounts': int(unique_accounts),
+        'unique_managers': policy_counts['AccountManager'].nunique(),
+    }
+
+
+def workload_overview(policy_counts, thresholds):
+    """Return one row per account manager with policy count, top 3 policy types and workload category.
+
+    Sorted by policy count, busiest manager first.
+    """
+    top_types = top_keys(
+        rank_within_groups(policy_counts, 'AccountManager', 'PolicyType', value='PolicyCount', n=3),
+        'AccountManager', 'PolicyType',
+    )
+    workload_df = policy_counts.groupby('AccountManager')['PolicyCount'].sum().reset_index()
+    workload_df['TopPolicyTypes'] = workload_df['AccountManager'].map(top_types).fillna('')
+
+    # Add workload categories
+    workload_df = workload_df.join(band_workloads(workload_df['PolicyCount'], thresholds))
+
+    return workload_df.sort_values('PolicyCount', ascending=False)
+
+
+def workload_statistics(workload_df):
+    """Return average, median, highest and lowest policy count per manager."""
+    return {
+        'average': workload_df['PolicyCount'].mean(),
+        'median': workload_df['PolicyCount'].median(),
+        'max': workload_df['PolicyCount'].max(),
+        'min': workload_df['PolicyCount'].min(),
+    }
+
+
+class WorkloadCube:
+    """Policy counts pre-aggregated at the (AccountManager, PolicyType, ExpirationMonth, Status) grain.
+
+    ``cells`` holds PolicyCount plus the first and last expiration date of each
+    cell, in the order the cells first appear in the policy rows (FirstRow), so
+    rankings break ties the way ``value_counts`` on the rows would. Distinct accounts are not additive across cells, so ``accounts`` keeps
+    the distinct (AccountManager, PolicyType, AccountId) combinations that unique
+    account counts are taken from. Cubes built from Salesforce aggregate results
+    carry no months, dates or accounts (``complete`` is False) and only answer the
+    workload overview; their distinct account counts are given per type scope.
+    """
+
+    GRAIN = ['AccountManager', 'PolicyType', 'ExpirationMonth', 'Status']
+
+    def __init__(self, cells, accounts=None, unique_accounts=None):
+        self.cells = cells
+        self.accounts = accounts
+        self._unique_accounts = unique_accounts
+
+    @property
+    def complete(self):
+        return self.accounts is not None
+
+    @property
+    def empty(self):
+        return self.cells.empty
+
+    @classmethod
+    def from_policies(cls, df):
+        """Build a cube from a prepared policy frame (see ``prepare_policy_frame``)."""
+        if df.empty:
+            cells = pd.DataFrame(columns=cls.GRAIN + ['PolicyCount', 'FirstExpiration', 'LastExpiration', 'FirstRow'])
+            return cls(cells, pd.DataFrame(columns=['AccountManager', 'PolicyType', 'AccountId']))
+        keys = df[cls.GRAIN].astype({'ExpirationMonth': object})
+        cells = (
+            keys.assign(ExpirationDate=df['ExpirationDate'], Row=np.arange(len(df)))
+            .groupby(cls.GRAIN, dropna=False, sort=False)
+            .agg(PolicyCount=('ExpirationDate', 'size'),
+                 FirstExpiration=('ExpirationDate', 'min'),
+                 LastExpiration=('ExpirationDate', 'max'),
+                 FirstRow=('Row', 'min'))
+            .reset_index()
+        )
+        accounts = df[['AccountManager', 'PolicyType', 'AccountId']].drop_duplicates(ignore_index=True)
+        return cls(cells, accounts)
+
+    @classmethod
+    def from_counts(cls, policy_counts, unique_accounts):
+        """Build an overview-only cube from (AccountManager, PolicyType, Status) counts.
+
+        ``unique_accounts`` maps each type scope the cube may be restricted to (None for
+        all types, else a frozenset of policy types) to its distinct account count.
+        """
+        cells = policy_counts.assign(ExpirationMonth=None, FirstExpiration=pd.NaT)
+        if 'LastExpiration' not in cells:
+            cells['LastExpiration'] = pd.NaT
+        return cls(cells, unique_accounts=unique_accounts)
+
+    def restrict_types(self, policy_types):
+        """Return the cube for the given policy types only."""
+        cells = self.cells[self.cells['PolicyType'].isin(policy_types)]
+        if not self.complete:
+            return WorkloadCube(cells, unique_accounts={None: self._unique_accounts.get(frozenset(policy_types))})
+        return WorkloadCube(cells, self.accounts[self.accounts['PolicyType'].isin(policy_types)])
+
+    def policy_counts(self):
+        """Roll up to (AccountManager, PolicyType, Status) counts, like ``summarize_policy_counts``.
+
+        Counts are in first-appearance order, as ``summarize_policy_counts`` returns them.
+        """
+        return (
+            self.cells.groupby(['AccountManager', 'PolicyType', 'Status'], dropna=False, sort=False)['PolicyCount']
+            .sum()
+            .reset_index()
+        )
+
+    def unique_accounts(self):
+        if not self.complete:
+            return self._unique_accounts.get(None)
+        return self.accounts['AccountId'].nunique()
+
+    def memory_bytes(self):
+        """Deep memory usage of the cube's tables."""
+        total = int(self.cells.memory_usage(deep=True).sum())
+        if self.accounts is not None:
+            total += int(self.accounts.memory_usage(deep=True).sum())
+        return total
+
+
+def build_workload_cube(df):
+    """Build the WorkloadCube for a prepared policy frame."""
+    return WorkloadCube.from_policies(df)
+
+
+def policy_type_analysis(cube, top_managers=10, top_types=8):
+    """Return policy counts per type and a manager x type heatmap of the busiest managers and types.
+
+    Returns ``{'type_counts': DataFrame[PolicyType, Count], 'heatmap': DataFrame}``.
+    """
+    type_counts = (
+        cube.cells.groupby('PolicyType')['PolicyCount'].sum()
+        .sort_values(ascending=False, kind='stable')
+        .reset_index()
+    )
+    type_counts.columns = ['PolicyType', 'Count']
+
+    cross_tab = cube.cells.pivot_table(
+        index='AccountManager', columns='PolicyType', values='PolicyCount', aggfunc='sum', fill_value=0
+    )
+    busiest_managers = cross_tab.sum(axis=1).nlargest(top_managers).index
+    busiest_types = cross_tab.sum(axis=0).nlargest(top_types).index
+
+    return {'type_counts': type_counts, 'heatmap': cross_tab.loc[busiest_managers, busiest_types]}
+
+
+def manager_options(cube):
+    """Return the sorted account manager names available for comparison."""
+    return sorted(cube.cells['AccountManager'].unique())
+
+
+def manager_details(cube, managers):
+    """Return per-manager policy count, policy types, unique accounts and expiration range."""
+    cells = cube.cells[cube.cells['AccountManager'].isin(managers)]
+    manager_stats = cells.groupby('AccountManager').agg(**{
+        'Total Policies': ('PolicyCount', 'sum'),
+        'Policy Types': ('PolicyType', 'nunique'),
+        'Earliest Expiration': ('FirstExpiration', 'min'),
+        'Latest Expiration': ('LastExpiration', 'max'),
+    })
+    accounts = cube.accounts[cube.accounts['AccountManager'].isin(managers)]
+    unique_accounts = accounts.groupby('AccountManager')['AccountId'].nunique()
+    manager_stats.insert(2, 'Unique Accounts', unique_accounts.reindex(manager_stats.index, fill_value=0))
+    return manager_stats
+
+
+def expiration_timeline(cube, max_managers=MAX_TIMELINE_MANAGERS):
+    """Return policies expiring per month and, for few enough managers, per month and manager.
+
+    Returns ``{'monthly': DataFrame, 'by_manager': DataFrame or None}``.
+    """
+    monthly_exp = cube.cells.groupby('ExpirationMonth').agg({
+        'PolicyCount': 'sum',
+        'AccountManager': 'nunique'
+    }).reset_index()
+    monthly_exp.columns = ['Month', 'Policies Expiring', 'Account Managers Affected']
+
+    by_manager = None
+    if cube.cells['AccountManager'].nunique() <= max_managers:
+        by_manager = (
+            cube.cells.groupby(['ExpirationMonth', 'AccountManager'])['PolicyCount'].sum()
+            .reset_index(name='Count')
+        )
+    return {'monthly': monthly_exp, 'by_manager': by_manager}
+
+
+def core_lines_workload(cube, core_types=None, scheme=DEFAULT_WEIGHTING_SCHEME, schemes=None):
+    """Return the weighted core-lines workload under every weighting scheme.
+
+    Returns ``{'summary', 'manager_totals', 'scheme_totals', 'policy_breakdown'}`` or
+    None when no core-line policies are present: ``summary`` has Count and
+    WeightedCount (under ``scheme``) per (AccountManager, PolicyType),
+    ``manager_totals`` the same per manager sorted by weighted total,
+    ``scheme_totals`` each manager's Count and weighted total under every scheme, and
+    ``policy_breakdown`` is a manager x type pivot with a Total column.
+    """
+    core_cells = cube.restrict_types(core_types or get_core_policy_types()).cells
+    if core_cells.empty:
+        return None
+
+    # Weight every cube cell under every scheme, then roll all schemes up in one grouped pass
+    weighted = policy_weights(core_cells, schemes).mul(core_cells['PolicyCount'].to_numpy(), axis=0)
+    weighted.insert(0, 'Count', core_cells['PolicyCount'])
+    weighted.insert(0, 'PolicyType', core_cells['PolicyType'])
+    weighted.insert(0, 'AccountManager', core_cells['AccountManager'])
+    type_totals = weighted.groupby(['AccountManager', 'PolicyType']).sum().reset_index()
+
+    workload_summary = type_totals[['AccountManager', 'PolicyType', 'Count']].copy()
+    workload_summary['WeightedCount'] = type_totals[scheme]
+
+    scheme_totals = (
+        type_totals.drop(columns='PolicyType').groupby('AccountManager').sum()
+        .sort_values(scheme, ascending=False)
+    )
+
+    # Calculate totals per account manager
+    manager_totals = workload_summary.groupby('AccountManager').agg({
+        'Count': 'sum',
+        'WeightedCount': 'sum'
+    }).reset_index()
+    manager_totals = manager_totals.sort_values('WeightedCount', ascending=False)
+
+    policy_breakdown = workload_summary.pivot_table(
+        index='AccountManager',
+        columns='PolicyType',
+        values='Count',
+        fill_value=0
+    ).reset_index()
+    policy_breakdown['Total'] = policy_breakdown.iloc[:, 1:].sum(axis=1)
+    policy_breakdown = policy_breakdown.sort_values('Total', ascending=False)
+
+    return {
+        'summary': workload_summary,
+        'manager_totals': manager_totals,
+        'scheme_totals': scheme_totals,
+        'policy_breakdown': policy_breakdown,
+    }